@@ -0,0 +1,103 @@
+"""Request deadlines and client-disconnect cancellation for LLM-backed routes."""
+
+import asyncio
+import logging
+from typing import Awaitable, Optional, TypeVar
+
+from fastapi import HTTPException, Request
+
+from app.core.config import settings
+from app.services.deadlines import deadline_scope
+from app.services.llm_service import DeadlineExceededError
+
+DEADLINE_HEADER = "X-Request-Timeout"
+CLIENT_CLOSED_REQUEST = 499  # nginx convention; never seen by the departed client
+
+logger = logging.getLogger("cancellation")
+
+T = TypeVar("T")
+
+
+def request_deadline(request: Optional[Request], default_s: float) -> float:
+    """Read the request's time budget in seconds.
+
+    Clients may ask for a shorter or longer budget with the
+    ``X-Request-Timeout`` header; it is capped at ``max_request_deadline_s``.
+
+    Args:
+        request: The incoming request, if any.
+        default_s: The route's budget when the header is absent.
+
+    Returns:
+        The budget in seconds.
+
+    Raises:
+        HTTPException: If the header is not a positive number.
+    """
+    raw = request.headers.get(DEADLINE_HEADER) if request is not None else None
+    if raw is None:
+        return min(default_s, settings.max_request_deadline_s)
+    try:
+        timeout = float(raw)
+    except ValueError:
+        timeout = 0.0
+    if not timeout > 0:
+        raise HTTPException(status_code=400, detail=f"{DEADLINE_HEADER} must be a positive number of seconds")
+    return min(timeout, settings.max_request_deadline_s)
+
+
+async def _wait_for_disconnect(request: Request) -> None:
+    # The body has already been read, so the next message is the disconnect
+    while True:
+        message = await request.receive()
+        if message["type"] == "http.disconnect":
+            return
+
+
+async def run_cancellable(request: Optional[Request], work: Awaitable[T], default_s: float) -> T:
+    """Run a route's LLM work under its deadline, abandoning it if the client leaves.
+
+    The deadline is set with ``deadline_scope`` so provider calls made by
+    the work stop waiting for admission, retries or answers once it passes.
+    It is also enforced here, so work that ignores it is cancelled on time.
+    If the client disconnects first, the work is cancelled, which aborts
+    the in-flight provider request and frees its admission slot.
+
+    Args:
+        request: The incoming request, watched for a disconnect.
+        work: The awaitable producing the response payload.
+        default_s: The route's budget when the client does not set one.
+
+    Returns:
+        The result of ``work``.
+
+    Raises:
+        DeadlineExceededError: If the deadline passes first.
+        HTTPException: With status 499 if the client disconnected.
+    """
+    try:
+        timeout = request_deadline(request, default_s)
+    except HTTPException:
+        if asyncio.iscoroutine(work):
+            work.close()
+        raise
+    with deadline_scope(timeout):
+        # Tasks copy the current context, so the deadline travels with the work
+        task = asyncio.ensure_future(work)
+    watcher = asyncio.ensure_future(_wait_for_disconnect(request)) if request is not None else None
+    try:
+        waiting = {task} if watcher is None else {task, watcher}
+        done, _ = await asyncio.wait(waiting, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+        if task in done:
+            return task.result()
+        if watcher is not None and watcher in done:
+            logger.info("Client disconnected, cancelling generation")
+            raise HTTPException(status_code=CLIENT_CLOSED_REQUEST, detail="Client closed request")
+        raise DeadlineExceededError(f"Request deadline of {timeout:.1f}s exceeded")
+    finally:
+        for pending in (task, watcher):
+            if pending is not None and not pending.done():
+                pending.cancel()
+        if not task.done():
+            # Let the work unwind so admission slots are released before returning
+            await asyncio.gather(task, return_exceptions=True)
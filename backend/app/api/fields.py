@@ -0,0 +1,67 @@
+"""Sparse field selection (``?fields=``) for JSON responses."""
+
+import typing
+from typing import Dict, Optional, Sequence, Type, Union
+
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+# Pydantic ``include`` mapping: field name to True, or to a nested mapping
+Include = Dict[str, Union[bool, "Include"]]
+
+
+def _nested_model(model: Type[BaseModel], name: str) -> Optional[Type[BaseModel]]:
+    """The model class a field holds, looking through ``Optional``."""
+    annotation = model.model_fields[name].annotation
+    for candidate in (annotation, *typing.get_args(annotation)):
+        if isinstance(candidate, type) and issubclass(candidate, BaseModel):
+            return candidate
+    return None
+
+
+def parse_fields(fields: Optional[str], model: Type[BaseModel]) -> Optional[Include]:
+    """Parse a comma-separated field list such as ``status,progress,result.threat_model``.
+
+    Args:
+        fields: The ``fields`` query parameter; None or empty selects everything.
+        model: The response model the names refer to.
+
+    Returns:
+        An ``include`` mapping for ``model_dump``, or None for all fields.
+
+    Raises:
+        HTTPException: 400 if a name is not a field of the model.
+    """
+    if not fields:
+        return None
+    include: Include = {}
+    for path in (part.strip() for part in fields.split(",")):
+        if not path:
+            continue
+        node, current = include, model
+        names = path.split(".")
+        for depth, name in enumerate(names):
+            if current is None or name not in current.model_fields:
+                raise HTTPException(status_code=400, detail=f"Unknown field: {path}")
+            if depth == len(names) - 1:
+                node[name] = True
+                break
+            child = node.get(name)
+            if child is True:
+                # The whole parent is already selected
+                break
+            node = node.setdefault(name, {})
+            current = _nested_model(current, name)
+    return include or None
+
+
+def sparse_response(
+    content: Union[BaseModel, Sequence[BaseModel]], include: Include, headers: Optional[Dict[str, str]] = None
+) -> JSONResponse:
+    """Serialize only the selected fields, bypassing the route's response model."""
+    if isinstance(content, BaseModel):
+        body = content.model_dump(mode="json", include=include)
+    else:
+        body = [item.model_dump(mode="json", include=include) for item in content]
+    return JSONResponse(body, headers=headers)
@@ -0,0 +1,41 @@
+"""API routes exposing LLM provider usage and health."""
+
+from typing import List
+
+from fastapi import APIRouter
+
+from app.schemas.llm import LLMUsage, ProviderAdmissionStats, ProviderHealth, ProviderHedgeStats
+from app.services.admission import admission_controller
+from app.services.hedging import hedged_generator
+from app.services.resilience import resilience
+from app.services.usage_tracker import usage_tracker
+
+router = APIRouter(prefix="/api/llm", tags=["LLM"])
+
+
+@router.get("/usage", response_model=List[LLMUsage])
+async def get_usage() -> List[LLMUsage]:
+    """Get aggregated token usage per provider and model.
+    
+    Includes prompt-cache read and write token counts, so the effect of
+    provider-side prompt caching on input tokens can be verified.
+    """
+    return usage_tracker.snapshot()
+
+
+@router.get("/hedging", response_model=List[ProviderHedgeStats])
+async def get_hedging_stats() -> List[ProviderHedgeStats]:
+    """Get per-provider hedged generation wins, losses and latency percentiles."""
+    return hedged_generator.snapshot()
+
+
+@router.get("/admission", response_model=List[ProviderAdmissionStats])
+async def get_admission_stats() -> List[ProviderAdmissionStats]:
+    """Get each provider's adaptive concurrency limit, queue depth and remaining budgets."""
+    return admission_controller.snapshot()
+
+
+@router.get("/health", response_model=List[ProviderHealth])
+async def get_provider_health() -> List[ProviderHealth]:
+    """Get each provider's circuit breaker state and current adaptive timeout."""
+    return resilience.snapshot()
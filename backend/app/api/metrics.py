@@ -0,0 +1,54 @@
+"""Prometheus scrape endpoint and HTTP request instrumentation."""
+
+import time
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.services.metrics import HTTP_REQUEST_DURATION, metrics
+
+router = APIRouter(tags=["Metrics"])
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def get_metrics() -> PlainTextResponse:
+    """Expose all process metrics in the Prometheus text format."""
+    return PlainTextResponse(metrics.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording each HTTP request's latency by route template.
+
+    Routes are labelled with their template (``/api/threat-model/jobs/{job_id}``)
+    rather than the raw path so the number of series stays bounded. The
+    latency covers the full response, including streamed bodies.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            HTTP_REQUEST_DURATION.observe(
+                time.perf_counter() - started,
+                method=scope["method"],
+                route=route.path if route is not None else "unmatched",
+                status=str(status),
+            )
@@ -1,14 +1,29 @@
 """API routes for scenario generation and management."""
 
+import asyncio
+import math
 import uuid
-from typing import List
+from typing import Dict, List, Optional
 import datetime
 import logging
 
-from fastapi import APIRouter, HTTPException
-
-from app.schemas.scenario import CostEstimate, ScenarioRequest, ScenarioResponse, RerollSectionRequest
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.responses import JSONResponse
+
+from app.api.cancellation import run_cancellable
+from app.api.streaming import format_sse, ndjson_response, sse_response
+from app.schemas.scenario import (
+    BatchItemStatus, BatchScenarioRequest, BatchScenarioResult, CostEstimate, PendingProviderBatch,
+    ScenarioBatchState, ScenarioBatchStatus, ScenarioRequest, ScenarioResponse, RerollSectionRequest
+)
+from app.services.hedging import hedged_generator
+from app.services.job_service import job_service
 from app.services.llm_factory import LLMFactory
+from app.core.config import settings
+from app.services.llm_service import CircuitOpenError, DeadlineExceededError, LLMServiceError, LLMTimeoutError
+from app.services import token_counter
+from app.services.token_counter import ContextWindowExceededError
+from app.services.prompts import REROLL_INSTRUCTIONS, SCENARIO_INSTRUCTIONS, CacheablePrompt
 
 router = APIRouter(prefix="/api/scenarios", tags=["scenarios"])
 
@@ -33,94 +48,55 @@ def build_prompt(request: ScenarioRequest) -> str:
         else "Standard IT infrastructure"
     )
     
-    return f"""# ELITE CYBERSECURITY TABLETOP EXERCISE SCENARIO
-
-## EXECUTIVE SUMMARY
-Create a world-class, technically sophisticated cybersecurity tabletop exercise scenario that challenges participants at the highest level while remaining operationally realistic.
+    return CacheablePrompt(SCENARIO_INSTRUCTIONS, f"""
 
 ## ORGANIZATION PROFILE
 - **Company Name**: {request.company_name}
 - **Industry**: {request.industry}
 - **Organization Size**: {request.company_size.value}
-- **Technology Stack**: {', '.join(request.technologies) if request.technologies else 'Standard IT infrastructure'}
+- **Technology Stack**: {technologies_str}
 - **Threat Actor Profile**: {request.threat_actor.value}
 - **Scenario Type**: {request.scenario_type}
 - **Exercise Participants**: {', '.join(request.participants)}
-- **Exercise Duration**: {request.duration_hours} hours
-
-## SCENARIO REQUIREMENTS
-
-### 1. THREAT ACTOR INTELLIGENCE
-- **Actor Profile**: Detailed analysis of the threat actor's capabilities, motivations, and historical TTPs
-- **Attack Infrastructure**: Realistic command & control infrastructure, tools, and techniques
-- **Timeline**: Sophisticated attack timeline with multiple phases and escalation points
-- **Objectives**: Clear strategic and tactical objectives aligned with the threat actor type
-
-### 2. INITIAL COMPROMISE VECTOR
-- **Entry Point**: Realistic initial access method (phishing, supply chain, zero-day, etc.)
-- **Technical Details**: Specific vulnerabilities, exploits, and attack chains
-- **Indicators of Compromise (IoCs)**: Observable artifacts and behavioral patterns
-- **Evasion Techniques**: How the attacker avoids detection initially
-
-### 3. ATTACK PROGRESSION & ESCALATION
-- **Lateral Movement**: Realistic internal reconnaissance and privilege escalation
-- **Persistence Mechanisms**: How the attacker maintains access
-- **Data Exfiltration**: Methods and targets for data theft
-- **Impact Escalation**: How the attack affects business operations
-
-### 4. CRITICAL DECISION POINTS
-- **Technical Decisions**: Incident response, containment, and eradication choices
-- **Business Decisions**: Communication, legal, and operational continuity decisions
-- **Leadership Decisions**: Executive-level strategic choices and resource allocation
-- **External Coordination**: Law enforcement, vendors, and public relations decisions
-
-### 5. REALISTIC INJECTS & EVENTS
-- **Technical Injects**: System alerts, log anomalies, network traffic patterns
-- **Business Injects**: Customer complaints, regulatory inquiries, media attention
-- **Operational Injects**: System outages, data breaches, ransomware demands
-- **Timing**: Realistic timing for each inject based on real-world incident timelines
-
-### 6. LEARNING OBJECTIVES & OUTCOMES
-- **Technical Skills**: Specific cybersecurity skills to be tested and developed
-- **Leadership Skills**: Decision-making, communication, and crisis management
-- **Process Improvement**: Incident response procedures and playbook validation
-- **Team Dynamics**: Cross-functional collaboration and communication
-
-### 7. REAL-WORLD CONTEXT
-- **Industry-Specific Threats**: Threats relevant to the organization's industry
-- **Regulatory Implications**: Compliance requirements and legal considerations
-- **Stakeholder Impact**: Effects on customers, partners, and shareholders
-- **Market Consequences**: Competitive and reputational implications
-
-## DELIVERABLE FORMAT
-
-Structure your response with these sections:
-1. **Scenario Overview** - Executive summary and key objectives
-2. **Threat Actor Intelligence** - Detailed actor profile and capabilities
-3. **Attack Timeline** - Phase-by-phase progression with realistic timing
-4. **Technical Details** - Specific vulnerabilities, tools, and techniques
-5. **Decision Points** - Critical junctures requiring participant decisions
-6. **Injects Schedule** - Timed events and information releases
-7. **Expected Outcomes** - Learning objectives and success metrics
-8. **Debriefing Guide** - Key discussion points and lessons learned
-
-Ensure the scenario is technically accurate, operationally realistic, and provides genuine learning value for all participant roles."""
+- **Exercise Duration**: {request.duration_hours} hours""")
 
 
-@router.post("/generate", response_model=ScenarioResponse)
-async def generate_scenario(request: ScenarioRequest) -> ScenarioResponse:
-    """Generate a new tabletop exercise scenario.
+def build_reroll_prompt(request: RerollSectionRequest) -> str:
+    """Build the prompt for regenerating a single scenario section.
     
     Args:
-        request: The scenario generation request.
+        request: The reroll request with the section and its scenario context.
         
     Returns:
-        The generated scenario response.
-        
+        A formatted prompt string for the LLM.
+    """
+    return CacheablePrompt(REROLL_INSTRUCTIONS, f"""
+
+## TASK REQUIREMENTS
+Regenerate ONLY the section titled '{request.section_title}' within the existing scenario framework.
+
+## CONTEXT & CONSTRAINTS
+
+### Original Scenario Parameters:
+{request.context}
+
+### Complete Scenario Context:
+{request.original_scenario}
+
+### Current Section Content (to be improved):
+{request.section_title}:
+{request.section_content}""")
+
+
+def _select_providers(request: ScenarioRequest) -> list:
+    """List the providers a request may use, in preference order.
+    
+    A request that names a provider is pinned to it; otherwise every
+    configured provider is a candidate, which lets generation hedge.
+    
     Raises:
-        HTTPException: If no providers are available or generation fails.
+        HTTPException: If no providers are configured or the requested one is unavailable.
     """
-    # Get available providers
     import os
     if os.getenv('TESTING') == 'true':
         available_providers = ["openai", "anthropic"]
@@ -129,40 +105,294 @@ async def generate_scenario(request: ScenarioRequest) -> ScenarioResponse:
         if not available_providers:
             raise HTTPException(status_code=500, detail="No LLM providers configured")
     
-    # Select provider
-    provider = request.llm_provider or available_providers[0]
-    if provider not in available_providers:
-        raise HTTPException(status_code=400, detail=f"Provider {provider} not available")
+    if not request.llm_provider:
+        return list(available_providers)
+    if request.llm_provider not in available_providers:
+        raise HTTPException(status_code=400, detail=f"Provider {request.llm_provider} not available")
+    return [request.llm_provider]
+
+
+def _record_scenario(request: ScenarioRequest, scenario: str, cost: float, provider) -> ScenarioResponse:
+    """Store a generated scenario in history and build its response."""
+    scenario_id = str(uuid.uuid4())
+    created_at = datetime.datetime.utcnow().isoformat()
+    scenario_history.append({
+        "id": scenario_id,
+        "company_name": request.company_name,
+        "industry": request.industry,
+        "created_at": created_at,
+        "preview": scenario[:200],
+        "full": scenario,
+        "form_data": request.model_dump(),
+    })
+    return ScenarioResponse(
+        id=scenario_id,
+        scenario=scenario,
+        estimated_cost=cost,
+        provider_used=provider if isinstance(provider, str) else provider.value
+    )
+
+
+@router.post("/generate", response_model=ScenarioResponse)
+async def generate_scenario(request: ScenarioRequest, http_request: Request) -> ScenarioResponse:
+    """Generate a new tabletop exercise scenario.
     
-    # Create service and generate
+    Args:
+        request: The scenario generation request.
+        http_request: The HTTP request, watched for a client disconnect.
+        
+    Returns:
+        The generated scenario response.
+        
+    Raises:
+        HTTPException: If no providers are available or generation fails.
+    """
+    providers = _select_providers(request)
+    
+    # Generate, hedging across providers when enabled
     try:
-        service = LLMFactory.create(provider)
         prompt = build_prompt(request)
-        scenario = await service.generate(prompt)
-        cost = service.estimate_cost(prompt)
-        scenario_id = str(uuid.uuid4())
-        created_at = datetime.datetime.utcnow().isoformat()
-        # Store in history
-        scenario_history.append({
-            "id": scenario_id,
-            "company_name": request.company_name,
-            "industry": request.industry,
-            "created_at": created_at,
-            "preview": scenario[:200],
-            "full": scenario,
-            "form_data": request.model_dump(),
-        })
-        return ScenarioResponse(
-            id=scenario_id,
-            scenario=scenario,
-            estimated_cost=cost,
-            provider_used=provider if isinstance(provider, str) else provider.value
+        scenario, provider, service = await run_cancellable(
+            http_request, hedged_generator.generate(prompt, providers), settings.scenario_deadline_s
         )
+        cost = service.estimate_cost(prompt)
+        return _record_scenario(request, scenario, cost, provider)
+    except HTTPException:
+        raise
+    except ContextWindowExceededError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except CircuitOpenError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except (DeadlineExceededError, LLMTimeoutError) as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         logger.exception(f"Error generating scenario: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/generate-stream")
+async def generate_scenario_stream(request: ScenarioRequest):
+    """Generate a scenario and stream it back as Server-Sent-Events.
+    
+    Emits ``token`` events carrying text chunks as the provider produces
+    them, then a single ``done`` event with the scenario metadata, or an
+    ``error`` event if generation fails mid-stream.
+    
+    Args:
+        request: The scenario generation request.
+        
+    Returns:
+        A ``text/event-stream`` response.
+        
+    Raises:
+        HTTPException: If no providers are available.
+    """
+    provider = _select_providers(request)[0]
+    
+    async def events():
+        try:
+            service = LLMFactory.create(provider)
+            prompt = build_prompt(request)
+            chunks = []
+            async for chunk in service.generate_stream(prompt):
+                chunks.append(chunk)
+                yield format_sse("token", {"text": chunk})
+            cost = service.estimate_cost(prompt)
+            response = _record_scenario(request, "".join(chunks), cost, provider)
+            yield format_sse("done", response.model_dump(exclude={"scenario"}))
+        except Exception as e:
+            logger.exception(f"Error streaming scenario: {e}")
+            yield format_sse("error", {"detail": str(e)})
+    
+    return sse_response(events())
+
+
+def _failed_item(index: int, error: Exception) -> BatchScenarioResult:
+    detail = error.detail if isinstance(error, HTTPException) else str(error)
+    return BatchScenarioResult(index=index, status=BatchItemStatus.FAILED, error=detail)
+
+
+async def _generate_batch_item(index: int, item: ScenarioRequest, semaphore: asyncio.Semaphore) -> BatchScenarioResult:
+    """Generate one batch item interactively, turning any failure into a failed result."""
+    async with semaphore:
+        try:
+            providers = _select_providers(item)
+            prompt = build_prompt(item)
+            scenario, provider, service = await hedged_generator.generate(prompt, providers)
+            response = _record_scenario(item, scenario, service.estimate_cost(prompt), provider)
+            return BatchScenarioResult(index=index, status=BatchItemStatus.COMPLETED, result=response)
+        except Exception as e:
+            logger.warning(f"Batch item {index} failed: {e}")
+            return _failed_item(index, e)
+
+
+async def _submit_to_provider(provider, items: Dict[int, ScenarioRequest],
+                              failed: List[BatchScenarioResult]) -> Optional[PendingProviderBatch]:
+    """Submit one provider's share of a batch, failing its items if that is refused."""
+    try:
+        service = LLMFactory.create(provider)
+        prompts = {str(index): build_prompt(item) for index, item in items.items()}
+        provider_batch_id = await service.submit_batch(prompts)
+    except Exception as e:
+        logger.exception(f"Provider batch for {provider} failed: {e}")
+        failed.extend(_failed_item(index, e) for index in items)
+        return None
+    return PendingProviderBatch(provider_batch_id=provider_batch_id, provider=provider, items=items)
+
+
+async def _collect_finished(batch_id: str, pending: List[PendingProviderBatch]) -> bool:
+    """Store the results of provider jobs that have ended. Returns whether any had."""
+    collected = False
+    for job in pending:
+        try:
+            service = LLMFactory.create(job.provider)
+            outputs = await service.fetch_batch(job.provider_batch_id)
+        except Exception as e:
+            if isinstance(e, LLMServiceError) and e.retryable:
+                logger.warning(f"Checking provider batch {job.provider_batch_id} failed: {e}")
+                continue
+            logger.exception(f"Provider batch {job.provider_batch_id} failed: {e}")
+            results = [_failed_item(index, e) for index in job.items]
+        else:
+            if outputs is None:
+                continue
+            results = _collect_outputs(service, job.provider, job.provider_batch_id, job.items, outputs)
+        await asyncio.to_thread(job_service.store.finish_provider_batch, batch_id, job.provider_batch_id, results)
+        collected = True
+    return collected
+
+
+def _collect_outputs(service, provider, provider_batch_id: str, items: Dict[int, ScenarioRequest],
+                     outputs: Dict[str, object]) -> List[BatchScenarioResult]:
+    """Record the scenarios a finished provider batch produced."""
+    results = []
+    for index, item in items.items():
+        output = outputs.get(str(index))
+        if output is None:
+            output = LLMServiceError(f"Batch {provider_batch_id} returned no result for this item")
+        if isinstance(output, Exception):
+            results.append(_failed_item(index, output))
+            continue
+        cost = service.estimate_cost(build_prompt(item)) * service.batch_price_factor
+        response = _record_scenario(item, output, cost, provider)
+        results.append(BatchScenarioResult(index=index, status=BatchItemStatus.COMPLETED, result=response))
+    return results
+
+
+async def _submit_provider_batches(request: BatchScenarioRequest) -> ScenarioBatchStatus:
+    """Group a batch's items by provider, submit each group to its batch API and store the batch.
+    
+    Provider batches can take up to a day, so nothing waits on them: the
+    batch is kept in the shared job store, where any worker can serve its
+    status and collect the provider jobs that have ended.
+    """
+    failed: List[BatchScenarioResult] = []
+    groups: Dict[str, Dict[int, ScenarioRequest]] = {}
+    for index, item in enumerate(request.items):
+        try:
+            provider = _select_providers(item)[0]
+        except HTTPException as e:
+            failed.append(_failed_item(index, e))
+            continue
+        groups.setdefault(provider, {})[index] = item
+    submitted = await asyncio.gather(*(
+        _submit_to_provider(provider, items, failed) for provider, items in groups.items()
+    ))
+    pending = [job for job in submitted if job is not None]
+    status = ScenarioBatchStatus(
+        batch_id=str(uuid.uuid4()),
+        status=ScenarioBatchState.PROCESSING if pending else ScenarioBatchState.COMPLETED,
+        created_at=datetime.datetime.utcnow(),
+        total=len(request.items),
+        results=sorted(failed, key=lambda result: result.index),
+    )
+    await asyncio.to_thread(job_service.store.create_batch, status, pending)
+    return status
+
+
+def _retry_after() -> str:
+    return str(math.ceil(settings.llm_batch_poll_interval_s))
+
+
+@router.post("/generate-batch")
+async def generate_scenario_batch(request: BatchScenarioRequest):
+    """Generate several scenarios.
+    
+    Items are generated interactively with at most ``max_concurrency`` in
+    flight, and the response is newline-delimited JSON with one
+    ``BatchScenarioResult`` per item, in completion order; ``index`` ties
+    a line back to its request item. An item that fails produces a
+    ``failed`` line and does not affect the others.
+    
+    With ``use_provider_batch`` the items are grouped by provider and
+    submitted to its batch API, which is cheaper but may take up to a day.
+    The response is then a 202 with a ``ScenarioBatchStatus`` whose
+    ``batch_id`` is polled at ``GET /api/scenarios/batches/{batch_id}``.
+    
+    Args:
+        request: The items to generate and how to run them.
+        
+    Returns:
+        An ``application/x-ndjson`` response, or the submitted batch's status.
+    """
+    if request.use_provider_batch:
+        status = await _submit_provider_batches(request)
+        return JSONResponse(
+            status.model_dump(mode="json"),
+            status_code=202,
+            headers={"Location": f"{router.prefix}/batches/{status.batch_id}", "Retry-After": _retry_after()},
+        )
+    
+    semaphore = asyncio.Semaphore(request.max_concurrency)
+    
+    async def lines():
+        tasks = [asyncio.create_task(_generate_batch_item(index, item, semaphore))
+                 for index, item in enumerate(request.items)]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                result = await finished
+                yield result.model_dump_json() + "\n"
+        finally:
+            # If the client disconnected, stop generating items nobody will read
+            for task in tasks:
+                task.cancel()
+    
+    return ndjson_response(lines())
+
+
+@router.get("/batches/{batch_id}", response_model=ScenarioBatchStatus)
+async def get_scenario_batch(batch_id: str, response: Response) -> ScenarioBatchStatus:
+    """Check on a batch submitted to provider batch APIs.
+    
+    Unfinished provider jobs are checked at most once every
+    ``llm_batch_poll_interval_s`` across all workers.
+    
+    Args:
+        batch_id: The id returned when the batch was submitted.
+        response: The response, given a ``Retry-After`` hint while items are pending.
+        
+    Returns:
+        The batch's status and every item that has finished.
+        
+    Raises:
+        HTTPException: 404 if the batch is unknown.
+    """
+    batch = await asyncio.to_thread(job_service.store.get_batch, batch_id)
+    if batch is None:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    status, pending = batch
+    if pending and await asyncio.to_thread(
+        job_service.store.claim_batch_check, batch_id, settings.llm_batch_poll_interval_s
+    ) and await _collect_finished(batch_id, pending):
+        batch = await asyncio.to_thread(job_service.store.get_batch, batch_id)
+        if batch is None:
+            raise HTTPException(status_code=404, detail="Batch not found")
+        status, _ = batch
+    if status.status == ScenarioBatchState.PROCESSING:
+        response.headers["Retry-After"] = _retry_after()
+    return status
+
+
 @router.post("/estimate-cost", response_model=List[CostEstimate])
 async def estimate_cost(request: ScenarioRequest) -> List[CostEstimate]:
     """Estimate generation cost for all available providers.
@@ -189,8 +419,7 @@ async def estimate_cost(request: ScenarioRequest) -> List[CostEstimate]:
     
     for provider in available_providers:
         try:
-            service = LLMFactory.create(provider)
-            cost = service.estimate_cost(prompt)
+            cost = token_counter.estimate_cost(LLMFactory.get_model(provider), prompt)
             estimates.append(
                 CostEstimate(
                     provider=provider if isinstance(provider, str) else provider.value,
@@ -245,7 +474,7 @@ async def delete_scenario_history(scenario_id: str):
 
 
 @router.post("/reroll")
-async def reroll_section(request: RerollSectionRequest):
+async def reroll_section(request: RerollSectionRequest, http_request: Request):
     import os
     if os.getenv('TESTING') == 'true':
         available_providers = ["openai", "anthropic"]
@@ -257,86 +486,16 @@ async def reroll_section(request: RerollSectionRequest):
     if provider not in available_providers:
         raise HTTPException(status_code=400, detail=f"Provider {provider} not available")
     try:
-        service = LLMFactory.create(provider)
-        prompt = (
-            f"""# ELITE SCENARIO SECTION REGENERATION
-
-## EXECUTIVE SUMMARY
-You are a world-class cybersecurity tabletop exercise designer with 15+ years of experience in creating sophisticated, realistic, and educationally valuable scenarios. You specialize in crafting scenarios that challenge participants at the highest levels while maintaining operational realism.
-
-## TASK REQUIREMENTS
-Regenerate ONLY the section titled '{request.section_title}' within the existing scenario framework.
-
-## CONTEXT & CONSTRAINTS
-
-### Original Scenario Parameters:
-{request.context}
-
-### Complete Scenario Context:
-{request.original_scenario}
-
-### Current Section Content (to be improved):
-{request.section_title}:
-{request.section_content}
-
-## REGENERATION REQUIREMENTS
-
-### 1. QUALITY STANDARDS
-- **Technical Accuracy**: Ensure all technical details are current and accurate
-- **Operational Realism**: Maintain realistic business and technical constraints
-- **Educational Value**: Provide genuine learning opportunities for participants
-- **Engagement**: Create compelling and challenging content that holds attention
-
-### 2. CONTENT ENHANCEMENT
-- **Depth**: Add sophisticated technical and strategic elements
-- **Realism**: Incorporate current threat intelligence and attack trends
-- **Complexity**: Introduce realistic challenges and decision points
-- **Clarity**: Maintain clear, actionable information despite increased complexity
-
-### 3. CONSISTENCY REQUIREMENTS
-- **Style**: Match the tone, format, and structure of the original scenario
-- **Context**: Maintain consistency with all other sections and parameters
-- **Timeline**: Ensure temporal consistency with the overall scenario flow
-- **Characterization**: Keep threat actors, organizations, and events consistent
-
-### 4. SECTION-SPECIFIC ENHANCEMENTS
-
-#### For Technical Sections:
-- Include specific tools, techniques, and procedures (TTPs)
-- Add realistic indicators of compromise (IoCs)
-- Incorporate current vulnerability information
-- Provide technical depth while maintaining accessibility
-
-#### For Strategic Sections:
-- Include business impact considerations
-- Add stakeholder communication requirements
-- Incorporate regulatory and compliance implications
-- Address executive-level decision-making challenges
-
-#### For Operational Sections:
-- Include realistic resource constraints
-- Add time pressure and urgency elements
-- Incorporate cross-functional coordination requirements
-- Address real-world operational challenges
-
-## DELIVERABLE REQUIREMENTS
-
-1. **Return ONLY** the regenerated content for the '{request.section_title}' section
-2. **Maintain** the exact same formatting and structure as the original
-3. **Enhance** the content with more sophisticated, realistic, and valuable elements
-4. **Ensure** seamless integration with the rest of the scenario
-5. **Provide** actionable, educational, and challenging content
-
-## QUALITY ASSURANCE
-- Verify technical accuracy and current relevance
-- Ensure operational realism and business context
-- Confirm educational value and learning objectives
-- Validate consistency with overall scenario framework
-
-Focus on creating content that elevates the entire exercise to world-class standards while maintaining perfect integration with the existing scenario structure."""
+        # Routed through the generator so a double-clicked reroll shares one call
+        prompt = build_reroll_prompt(request)
+        new_section, _, _ = await run_cancellable(
+            http_request, hedged_generator.generate(prompt, [provider]), settings.reroll_deadline_s
         )
-        new_section = await service.generate(prompt)
         return {"section_title": request.section_title, "new_content": new_section}
+    except HTTPException:
+        raise
+    except (DeadlineExceededError, LLMTimeoutError) as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         logger.exception(f"Error rerolling section: {e}")
         raise HTTPException(status_code=500, detail=str(e))
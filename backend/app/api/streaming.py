@@ -0,0 +1,34 @@
+"""Helpers for Server-Sent-Events and NDJSON streaming responses."""
+
+import json
+from typing import Any, AsyncIterator
+
+from fastapi.responses import StreamingResponse
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no",  # Disable nginx response buffering
+}
+
+
+def format_sse(event: str, data: Any) -> str:
+    """Format a single Server-Sent-Event frame with a JSON payload.
+
+    Args:
+        event: The event name.
+        data: JSON-serializable event payload.
+
+    Returns:
+        The encoded SSE frame.
+    """
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def sse_response(events: AsyncIterator[str]) -> StreamingResponse:
+    """Wrap an async iterator of SSE frames in a streaming response."""
+    return StreamingResponse(events, media_type="text/event-stream", headers=SSE_HEADERS)
+
+
+def ndjson_response(lines: AsyncIterator[str]) -> StreamingResponse:
+    """Wrap an async iterator of newline-terminated JSON lines in a streaming response."""
+    return StreamingResponse(lines, media_type="application/x-ndjson", headers=SSE_HEADERS)
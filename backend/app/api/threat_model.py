@@ -1,12 +1,26 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Request
+from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Header, Query, Request, Response
 from typing import List, Optional
 from ..services import file_service
 from ..schemas.threat_model import (
     FileUploadResponse, ThreatModelRequest, ThreatModelResponse,
-    AsyncThreatModelRequest, JobResponse, JobStatusResponse, JobStatus
+    AsyncThreatModelRequest, JobResponse, JobStatusResponse, JobStatus, ResultCacheStats
 )
 from ..services.llm_factory import LLMFactory
+from ..services.llm_service import CircuitOpenError, DeadlineExceededError, LLMTimeoutError
+from ..core.config import settings
+from .cancellation import run_cancellable
+from .fields import parse_fields, sparse_response
+from .streaming import format_sse, sse_response
 from ..services.job_service import job_service
+from ..services.job_store import FINAL_STATUSES
+from ..services.hedging import hedged_generator
+from ..services.prompts import render_threat_model_prompt
+from ..services import token_counter
+from ..services.token_counter import ContextWindowExceededError
+from ..services.metrics import RATE_LIMIT_REJECTIONS
+import asyncio
+import base64
+import json
 import uuid
 import datetime
 import logging
@@ -56,6 +70,8 @@ def check_rate_limit(request: Request, limit: int, window: int = 60) -> bool:
     
     # Check if limit exceeded
     if len(rate_limit_storage[client_ip]) >= limit:
+        route = request.scope.get("route")
+        RATE_LIMIT_REJECTIONS.inc(route=route.path if route else request.url.path)
         return False
     
     # Add current request
@@ -127,112 +143,7 @@ def build_threat_model_prompt(request: ThreatModelRequest, file_content: str = N
     if framework == 'ATTACK_TREES':
         framework = 'Attack Trees'
 
-    return f"""# ELITE THREAT MODELING ANALYSIS
-
-## EXECUTIVE SUMMARY
-You are a world-class cybersecurity expert with 20+ years of experience in threat modeling, security architecture, and risk assessment. You specialize in identifying sophisticated attack vectors and providing actionable security recommendations.
-
-## ANALYSIS FRAMEWORK
-**Primary Framework**: {framework}
-**Analysis Depth**: Comprehensive threat modeling with real-world attack scenarios
-
-## SYSTEM UNDER ANALYSIS
-{content_to_analyze}
-
-## THREAT MODELING REQUIREMENTS
-
-### 1. SYSTEM ARCHITECTURE ANALYSIS
-- **Component Inventory**: Complete mapping of all system components, data flows, and trust boundaries
-- **Technology Stack Assessment**: Security implications of each technology choice
-- **Integration Points**: External dependencies, APIs, and third-party services
-- **Data Classification**: Sensitivity levels and regulatory requirements for all data types
-
-### 2. THREAT ACTOR PROFILING
-- **Adversary Types**: Nation-state actors, organized crime, insider threats, hacktivists
-- **Capability Assessment**: Technical sophistication, resources, and persistence
-- **Motivation Analysis**: Financial gain, espionage, sabotage, reputation damage
-- **Attack Surface Mapping**: All potential entry points and attack vectors
-
-### 3. COMPREHENSIVE THREAT ANALYSIS
-Using the {framework} framework, analyze each component for:
-
-#### STRIDE Threats (if applicable):
-- **Spoofing**: Identity impersonation, credential theft, session hijacking
-- **Tampering**: Data manipulation, code injection, configuration changes
-- **Repudiation**: Audit log deletion, transaction denial, evidence destruction
-- **Information Disclosure**: Data breaches, information leakage, side-channel attacks
-- **Denial of Service**: Resource exhaustion, service disruption, availability attacks
-- **Elevation of Privilege**: Privilege escalation, access control bypass, admin compromise
-
-#### Additional Threat Categories:
-- **Supply Chain Attacks**: Compromised dependencies, vendor risks, build system attacks
-- **Social Engineering**: Phishing, pretexting, baiting, quid pro quo
-- **Physical Security**: Physical access, hardware tampering, environmental threats
-- **Emerging Threats**: AI/ML attacks, quantum computing risks, zero-day exploits
-
-### 4. RISK ASSESSMENT & PRIORITIZATION
-- **Threat Likelihood**: Based on attacker capabilities, system exposure, and historical data
-- **Impact Assessment**: Business impact, financial loss, regulatory consequences
-- **Risk Scoring**: Quantitative risk assessment using industry-standard methodologies
-- **Priority Ranking**: Critical, High, Medium, Low based on likelihood × impact
-
-### 5. MITIGATION STRATEGY DEVELOPMENT
-- **Defense in Depth**: Multiple layers of security controls
-- **Zero Trust Architecture**: Never trust, always verify principles
-- **Security Controls**: Technical, administrative, and physical safeguards
-- **Monitoring & Detection**: Real-time threat detection and response capabilities
-- **Incident Response**: Preparedness and recovery procedures
-
-### 6. COMPLIANCE & REGULATORY CONSIDERATIONS
-- **Industry Standards**: ISO 27001, NIST, CIS Controls, OWASP
-- **Regulatory Requirements**: GDPR, HIPAA, SOX, PCI-DSS as applicable
-- **Best Practices**: Industry-specific security frameworks and guidelines
-
-## DELIVERABLE FORMAT
-
-Structure your analysis with these sections:
-
-### 1. EXECUTIVE SUMMARY
-- Key findings and critical risks
-- Overall security posture assessment
-- Strategic recommendations
-
-### 2. SYSTEM OVERVIEW
-- Architecture description and component mapping
-- Data flow analysis and trust boundaries
-- Technology stack security assessment
-
-### 3. THREAT LANDSCAPE
-- Threat actor profiles and capabilities
-- Attack surface analysis
-- Historical threat intelligence
-
-### 4. DETAILED THREAT ANALYSIS
-- Component-by-component threat assessment
-- Specific attack scenarios and vectors
-- Vulnerability analysis and exploitability
-
-### 5. RISK ASSESSMENT
-- Risk matrix with likelihood and impact
-- Priority ranking of threats
-- Risk acceptance criteria
-
-### 6. MITIGATION STRATEGIES
-- Technical controls and countermeasures
-- Process improvements and policies
-- Monitoring and detection capabilities
-
-### 7. SECURITY ROADMAP
-- Short-term (0-3 months) critical fixes
-- Medium-term (3-12 months) improvements
-- Long-term (1+ years) strategic initiatives
-
-### 8. COMPLIANCE ASSESSMENT
-- Regulatory gap analysis
-- Standards compliance status
-- Remediation requirements
-
-Ensure your analysis is technically accurate, actionable, and provides clear guidance for security improvement initiatives."""
+    return render_threat_model_prompt(framework, content_to_analyze)
 
 
 @router.post("/upload", response_model=FileUploadResponse)
@@ -365,16 +276,60 @@ async def delete_file(file_id: str):
         logger.exception(f"Error deleting file {file_id}: {e}")
         raise HTTPException(status_code=500, detail="Failed to delete file")
 
+def _select_providers(request: ThreatModelRequest) -> list:
+    """List the providers a request may use, in preference order.
+    
+    A request that names a provider is pinned to it; otherwise every
+    configured provider is a candidate, which lets generation hedge.
+    
+    Raises:
+        HTTPException: If no providers are configured or the requested one is unavailable.
+    """
+    available_providers = LLMFactory.get_available_providers()
+    if not available_providers:
+        raise HTTPException(status_code=500, detail="No LLM providers configured")
+    
+    if not request.llm_provider:
+        return list(available_providers)
+    if request.llm_provider not in available_providers:
+        raise HTTPException(status_code=400, detail=f"Provider {request.llm_provider} not available")
+    return [request.llm_provider]
+
+def _get_file_content(request: ThreatModelRequest) -> Optional[str]:
+    """Validate the referenced upload exists and return its content, if any.
+    
+    Raises:
+        HTTPException: If the referenced file does not exist.
+    """
+    file_content = None
+    if request.file_id:
+        try:
+            # In a real implementation, you would read the file content here
+            # For now, we'll just validate the file_id exists
+            files = file_service.list_files()
+            file_exists = any(f.file_id == request.file_id for f in files)
+            if not file_exists:
+                raise HTTPException(status_code=404, detail="File not found")
+        except HTTPException:
+            # Re-raise HTTP exceptions (like 404 File not found)
+            raise
+        except Exception as e:
+            logger.warning(f"Error accessing file {request.file_id}: {e}")
+            # Continue without file content
+    return file_content
+
 @router.post("/generate", response_model=ThreatModelResponse)
 async def generate_threat_model(
     request: ThreatModelRequest,
-    http_request: Request = None
+    http_request: Request = None,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. id,threat_model")
 ):
     """Generate a threat model using AI.
     
     Args:
         request: The threat model generation request
         http_request: FastAPI request object for rate limiting
+        fields: Only return these fields; ``content_analyzed`` echoes the input back
         
     Returns:
         ThreatModelResponse with generated threat model
@@ -397,43 +352,21 @@ async def generate_threat_model(
                 detail="Content too long or contains invalid characters. Maximum 50KB allowed."
             )
         
-        # Get available providers
-        available_providers = LLMFactory.get_available_providers()
-        if not available_providers:
-            raise HTTPException(status_code=500, detail="No LLM providers configured")
-        
-        # Select provider
-        provider = request.llm_provider or available_providers[0]
-        if provider not in available_providers:
-            raise HTTPException(status_code=400, detail=f"Provider {provider} not available")
-        
-        # Get file content if file_id provided
-        file_content = None
-        if request.file_id:
-            try:
-                # In a real implementation, you would read the file content here
-                # For now, we'll just validate the file_id exists
-                files = file_service.list_files()
-                file_exists = any(f.file_id == request.file_id for f in files)
-                if not file_exists:
-                    raise HTTPException(status_code=404, detail="File not found")
-            except HTTPException:
-                # Re-raise HTTP exceptions (like 404 File not found)
-                raise
-            except Exception as e:
-                logger.warning(f"Error accessing file {request.file_id}: {e}")
-                # Continue without file content
+        include = parse_fields(fields, ThreatModelResponse)
+        providers = _select_providers(request)
+        file_content = _get_file_content(request)
         
-        # Create service and generate
-        service = LLMFactory.create(provider)
+        # Generate, hedging across providers when enabled
         prompt = build_threat_model_prompt(request, file_content)
-        threat_model = await service.generate(prompt)
+        threat_model, provider, service = await run_cancellable(
+            http_request, hedged_generator.generate(prompt, providers), settings.threat_model_deadline_s
+        )
         cost = service.estimate_cost(prompt)
         threat_model_id = str(uuid.uuid4())
         
         logger.info(f"Threat model generated successfully: {threat_model_id}")
         
-        return ThreatModelResponse(
+        result = ThreatModelResponse(
             id=threat_model_id,
             threat_model=threat_model,
             estimated_cost=cost,
@@ -441,26 +374,95 @@ async def generate_threat_model(
             framework=request.framework,
             content_analyzed=request.content
         )
+        return sparse_response(result, include) if include else result
         
     except HTTPException:
         raise
+    except ContextWindowExceededError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except CircuitOpenError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except (DeadlineExceededError, LLMTimeoutError) as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         logger.exception(f"Error generating threat model: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/generate-stream")
+async def generate_threat_model_stream(
+    request: ThreatModelRequest,
+    http_request: Request = None
+):
+    """Generate a threat model and stream it back as Server-Sent-Events.
+    
+    Emits ``token`` events carrying text chunks as the provider produces
+    them, then a single ``done`` event with the threat model metadata, or an
+    ``error`` event if generation fails mid-stream.
+    
+    Args:
+        request: The threat model generation request
+        http_request: FastAPI request object for rate limiting
+        
+    Returns:
+        A ``text/event-stream`` response
+        
+    Raises:
+        HTTPException: If validation fails or rate limit exceeded
+    """
+    if not check_rate_limit(http_request, RATE_LIMIT_GENERATE):
+        raise HTTPException(
+            status_code=429, 
+            detail="Rate limit exceeded. Please wait before generating another threat model."
+        )
+    
+    if not validate_content(request.content):
+        raise HTTPException(
+            status_code=400, 
+            detail="Content too long or contains invalid characters. Maximum 50KB allowed."
+        )
+    
+    provider = _select_providers(request)[0]
+    file_content = _get_file_content(request)
+    
+    async def events():
+        try:
+            service = LLMFactory.create(provider)
+            prompt = build_threat_model_prompt(request, file_content)
+            chunks = []
+            async for chunk in service.generate_stream(prompt):
+                chunks.append(chunk)
+                yield format_sse("token", {"text": chunk})
+            result = ThreatModelResponse(
+                id=str(uuid.uuid4()),
+                threat_model="".join(chunks),
+                estimated_cost=service.estimate_cost(prompt),
+                provider_used=provider,
+                framework=request.framework,
+                content_analyzed=request.content
+            )
+            logger.info(f"Threat model streamed successfully: {result.id}")
+            yield format_sse("done", result.model_dump(mode="json", exclude={"threat_model", "content_analyzed"}))
+        except Exception as e:
+            logger.exception(f"Error streaming threat model: {e}")
+            yield format_sse("error", {"detail": str(e)})
+    
+    return sse_response(events())
+
 @router.post("/generate-async", response_model=JobResponse)
 async def generate_threat_model_async(
     request: AsyncThreatModelRequest,
-    http_request: Request = None
+    http_request: Request = None,
+    include_result: bool = Query(False, description="Return a cached result inline instead of only the job ID")
 ):
     """Generate a threat model asynchronously.
     
     Args:
         request: The async threat model generation request
         http_request: FastAPI request object for rate limiting
+        include_result: Include the result when the job was answered from cache
         
     Returns:
-        JobResponse with job ID
+        JobResponse with job ID and initial status
         
     Raises:
         HTTPException: If job creation fails or rate limit exceeded
@@ -485,7 +487,12 @@ async def generate_threat_model_async(
         
         logger.info(f"Async threat model job created: {job_id}")
         
-        return JobResponse(job_id=job_id)
+        job = await job_service.fetch_job_status(job_id)
+        return JobResponse(
+            job_id=job_id,
+            status=job.status,
+            result=job.result if include_result else None
+        )
         
     except HTTPException:
         raise
@@ -493,12 +500,43 @@ async def generate_threat_model_async(
         logger.exception(f"Error creating async job: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def _job_etag(job: JobStatusResponse) -> str:
+    return f'"{job.version}"'
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag in (tag[2:] if tag.startswith("W/") else tag for tag in tags)
+
 @router.get("/jobs/{job_id}", response_model=JobStatusResponse)
-async def get_job_status(job_id: str):
-    """Get the status of an async job.
+async def get_job_status(
+    job_id: str,
+    response: Response,
+    wait: float = Query(0, ge=0, description="Seconds to wait for a change to the If-None-Match version"),
+    if_none_match: Optional[str] = Header(None),
+    include_result: bool = Query(True, description="Embed the result; poll with false and fetch /result once"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. status,progress")
+):
+    """Get the status of an async job, optionally long-polling for a change.
+    
+    Every response carries the job's version as its ``ETag``. A request
+    with ``If-None-Match`` set to that ETag and a ``wait`` timeout is held
+    until the job changes or the timeout (capped at
+    ``job_long_poll_max_wait_s``) passes; if it is still unchanged the
+    response is ``304 Not Modified`` without a body.
+    
+    The embedded result is usually most of the response; pollers should
+    pass ``include_result=false`` or ``fields=`` and read the finished
+    result once from ``/jobs/{job_id}/result``.
     
     Args:
         job_id: The job ID
+        response: The response, used to set the ETag
+        wait: Seconds to wait for a change
+        if_none_match: ETag of the version the client already has
+        include_result: Whether to embed the result
+        fields: Only return these fields; ``result.threat_model`` selects within the result
         
     Returns:
         JobStatusResponse with job status
@@ -507,11 +545,27 @@ async def get_job_status(job_id: str):
         HTTPException: If job not found
     """
     try:
+        include = parse_fields(fields, JobStatusResponse)
         # Check if job exists first
-        status = job_service.get_job_status(job_id)
+        status = await job_service.fetch_job_status(job_id)
         if not status:
             raise HTTPException(status_code=404, detail="Job not found")
         
+        if _etag_matches(if_none_match, _job_etag(status)) and wait > 0:
+            status = await job_service.wait_for_change(
+                job_id, status.version, min(wait, settings.job_long_poll_max_wait_s)
+            )
+            if not status:
+                raise HTTPException(status_code=404, detail="Job not found")
+        
+        etag = _job_etag(status)
+        if _etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers={"ETag": etag})
+        if not include_result:
+            status = status.model_copy(update={"result": None})
+        if include:
+            return sparse_response(status, include, {"ETag": etag})
+        response.headers["ETag"] = etag
         return status
         
     except HTTPException:
@@ -520,6 +574,96 @@ async def get_job_status(job_id: str):
         logger.exception(f"Error getting job status {job_id}: {e}")
         raise HTTPException(status_code=500, detail="Failed to get job status")
 
+@router.get("/jobs/{job_id}/result", response_model=ThreatModelResponse)
+async def get_job_result(
+    job_id: str,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. threat_model")
+):
+    """Get the result of a completed job.
+    
+    A result never changes once the job completes, so it is served with
+    its ID as the ``ETag`` and may be cached by the client.
+    
+    Args:
+        job_id: The job ID
+        response: The response, used to set caching headers
+        if_none_match: ETag of the result the client already has
+        fields: Only return these fields
+        
+    Returns:
+        ThreatModelResponse of the job
+        
+    Raises:
+        HTTPException: 404 if the job does not exist, 409 if it has not completed
+    """
+    include = parse_fields(fields, ThreatModelResponse)
+    job = await job_service.fetch_job_status(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.status != JobStatus.COMPLETED or job.result is None:
+        raise HTTPException(status_code=409, detail=f"Job has no result (status: {job.status.value})")
+    
+    headers = {"ETag": f'"{job.result.id}"', "Cache-Control": "private, max-age=86400, immutable"}
+    if _etag_matches(if_none_match, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    if include:
+        return sparse_response(job.result, include, headers)
+    response.headers.update(headers)
+    return job.result
+
+@router.get("/jobs/{job_id}/events")
+async def stream_job_events(job_id: str):
+    """Push an async job's status changes as Server-Sent-Events.
+    
+    Emits a ``status`` event with the current state, then one per change
+    (without the result), and ends with a ``final`` event carrying the
+    full job, including its result, once it completes, fails or is
+    cancelled. Idle streams get a keep-alive comment every
+    ``job_events_heartbeat_s`` seconds.
+    
+    Changes are pushed from the worker process running the job; for a
+    job owned by another process the stream re-reads the job store
+    instead.
+    
+    Args:
+        job_id: The job ID
+        
+    Returns:
+        A ``text/event-stream`` response
+        
+    Raises:
+        HTTPException: If job not found
+    """
+    # Subscribe before reading the job so no change can slip in between
+    subscription = job_service.events.subscribe(job_id)
+    job = await job_service.fetch_job_status(job_id)
+    if job is None:
+        subscription.close()
+        raise HTTPException(status_code=404, detail="Job not found")
+    job = job.model_copy()
+    owned = job_id in job_service.jobs
+    interval = settings.job_events_heartbeat_s if owned else settings.job_store_flush_interval_s
+    
+    async def events():
+        with subscription:
+            current, sent = job, None
+            while True:
+                if current is None:
+                    yield ": keep-alive\n\n"
+                elif current.status in FINAL_STATUSES:
+                    yield format_sse("final", current.model_dump(mode="json"))
+                    return
+                elif sent is None or current.version > sent.version:
+                    yield format_sse("status", current.model_dump(mode="json", exclude={"result"}))
+                    sent = current
+                current = await subscription.get(timeout=interval)
+                if current is None and not owned:
+                    current = await job_service.fetch_job_status(job_id)
+    
+    return sse_response(events())
+
 @router.delete("/jobs/{job_id}")
 async def cancel_job(job_id: str):
     """Cancel an async job.
@@ -538,7 +682,8 @@ async def cancel_job(job_id: str):
         if not re.match(r'^[a-f0-9\-]+$', job_id):
             raise HTTPException(status_code=400, detail="Invalid job ID format")
         
-        success = job_service.cancel_job(job_id)
+        # A job owned by another worker process is cancelled through the store
+        success = await asyncio.to_thread(job_service.cancel_job, job_id)
         if not success:
             raise HTTPException(status_code=404, detail="Job not found or cannot be cancelled")
         
@@ -551,23 +696,71 @@ async def cancel_job(job_id: str):
         logger.exception(f"Error cancelling job {job_id}: {e}")
         raise HTTPException(status_code=500, detail="Failed to cancel job")
 
+def _encode_cursor(job: JobStatusResponse) -> str:
+    """Opaque cursor pointing just past ``job`` in the newest-first job listing."""
+    position = json.dumps([job.created_at.isoformat(), job.job_id])
+    return base64.urlsafe_b64encode(position.encode()).decode().rstrip("=")
+
+def _decode_cursor(cursor: str) -> tuple:
+    try:
+        created_at, job_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return datetime.datetime.fromisoformat(created_at), str(job_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
 @router.get("/jobs", response_model=List[JobStatusResponse])
-async def list_jobs(limit: int = 50):
-    """List recent jobs.
+async def list_jobs(
+    request: Request,
+    response: Response,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    status: Optional[List[JobStatus]] = Query(None),
+    provider: Optional[str] = None,
+    include_result: bool = False,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return for each job"),
+):
+    """List recent jobs, newest first.
     
     Args:
         limit: Maximum number of jobs to return (default: 50)
+        cursor: Value of the previous page's ``X-Next-Cursor`` header
+        status: Only list jobs in these statuses; may be repeated
+        provider: Only list jobs for this LLM provider
+        include_result: Include each job's result instead of a summary
+        fields: Only return these fields of each job
         
     Returns:
-        List of JobStatusResponse objects
+        List of JobStatusResponse objects. When more jobs may follow, the
+        ``X-Next-Cursor`` and ``Link: rel="next"`` headers point to the next page.
     """
+    include = parse_fields(fields, JobStatusResponse)
+    before = _decode_cursor(cursor) if cursor else None
     try:
-        jobs = job_service.list_jobs(limit=limit)
+        jobs = await asyncio.to_thread(
+            job_service.list_jobs,
+            limit=limit, before=before, statuses=status, provider=provider, include_result=include_result,
+        )
         logger.info(f"Retrieved {len(jobs)} jobs (limit: {limit})")
-        return jobs
     except Exception as e:
         logger.exception(f"Error listing jobs: {e}")
         raise HTTPException(status_code=500, detail="Failed to list jobs")
+    headers = {}
+    if len(jobs) == limit:
+        next_cursor = _encode_cursor(jobs[-1])
+        headers["X-Next-Cursor"] = next_cursor
+        headers["Link"] = f'<{request.url.include_query_params(cursor=next_cursor)}>; rel="next"'
+    if include:
+        return sparse_response(jobs, include, headers)
+    response.headers.update(headers)
+    return jobs
+
+@router.get("/cache/stats", response_model=ResultCacheStats)
+async def get_cache_stats():
+    """Get the job result cache's size, hit ratio and eviction counts."""
+    stats = job_service.cache.stats()
+    if job_service.disk_cache is not None:
+        stats.disk = await asyncio.to_thread(job_service.disk_cache.stats)
+    return stats
 
 @router.get("/providers")
 async def get_providers():
@@ -617,8 +810,7 @@ async def estimate_cost(request: ThreatModelRequest):
         
         for provider in available_providers:
             try:
-                service = LLMFactory.create(provider)
-                cost = service.estimate_cost(prompt)
+                cost = token_counter.estimate_cost(LLMFactory.get_model(provider), prompt)
                 estimates.append({
                     "provider": provider,
                     "estimated_cost": cost,
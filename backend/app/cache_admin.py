@@ -0,0 +1,67 @@
+"""Inspect, trim, export and import the on-disk job result cache.
+
+Exports are gzipped JSON Lines, so a cache warmed on one node can be
+shipped to and imported on another before it takes traffic.
+
+Usage (from the backend directory):
+    python -m app.cache_admin stats
+    python -m app.cache_admin export results.jsonl.gz
+    python -m app.cache_admin import results.jsonl.gz
+    python -m app.cache_admin purge --max-bytes 104857600 --older-than-days 30
+
+The cache file defaults to ``RESULT_CACHE_DISK_PATH``; pass ``--path`` to
+work on another one.
+"""
+
+import argparse
+import sys
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from app.core.config import settings
+from app.services.disk_cache import DiskResultCache
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--path", default=settings.result_cache_disk_path, help="SQLite file of the disk cache")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("stats", help="Print the number and compressed size of cached results")
+    export_parser = commands.add_parser("export", help="Write live entries to a gzipped JSON Lines file")
+    export_parser.add_argument("file", help="Output file, '-' for stdout")
+    import_parser = commands.add_parser("import", help="Load entries from a file written by export")
+    import_parser.add_argument("file", help="Input file, '-' for stdin")
+    purge_parser = commands.add_parser("purge", help="Drop expired, old and least recently used entries")
+    purge_parser.add_argument("--max-bytes", type=int, default=settings.result_cache_disk_max_bytes)
+    purge_parser.add_argument("--older-than-days", type=float, help="Also drop entries created before this")
+    args = parser.parse_args(argv)
+    if not args.path:
+        parser.error("no cache file: set RESULT_CACHE_DISK_PATH or pass --path")
+
+    cache = DiskResultCache(args.path)
+    if args.command == "stats":
+        print(cache.stats().model_dump_json(indent=2))
+    elif args.command == "export":
+        if args.file == "-":
+            count = cache.export_to(sys.stdout.buffer)
+        else:
+            with open(args.file, "wb") as f:
+                count = cache.export_to(f)
+        print(f"Exported {count} entries", file=sys.stderr)
+    elif args.command == "import":
+        if args.file == "-":
+            count = cache.import_from(sys.stdin.buffer)
+        else:
+            with open(args.file, "rb") as f:
+                count = cache.import_from(f)
+        print(f"Imported {count} entries", file=sys.stderr)
+    elif args.command == "purge":
+        older_than = None
+        if args.older_than_days is not None:
+            older_than = datetime.now() - timedelta(days=args.older_than_days)
+        removed, reclaimed = cache.purge(max_bytes=args.max_bytes, older_than=older_than)
+        print(f"Removed {removed} entries ({reclaimed} bytes)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
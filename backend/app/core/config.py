@@ -19,8 +19,285 @@ class Settings(BaseSettings):
         description="Anthropic API key for Claude models"
     )
     
+    # Models
+    openai_model: str = Field(
+        default="gpt-4o-mini",
+        description="OpenAI model used for generation"
+    )
+    anthropic_model: str = Field(
+        default="claude-3-5-sonnet-20241022",
+        description="Anthropic model used for generation"
+    )
+
+    # LLM HTTP connection pool
+    llm_max_connections: int = Field(
+        default=20,
+        description="Maximum concurrent HTTP connections per LLM provider client"
+    )
+    llm_max_keepalive_connections: int = Field(
+        default=10,
+        description="Maximum idle keep-alive connections kept per LLM provider client"
+    )
+    llm_keepalive_expiry: float = Field(
+        default=60.0,
+        description="Seconds an idle keep-alive connection is kept open"
+    )
+    llm_prewarm_connections: bool = Field(
+        default=True,
+        description="Open a connection to each configured provider at startup"
+    )
+
+    # Hedged generation
+    llm_hedging_enabled: bool = Field(
+        default=False,
+        description="Race a second provider when the first is slow to answer"
+    )
+    llm_hedge_delay_ms: int = Field(
+        default=3000,
+        description="Milliseconds to wait on the first provider before hedging"
+    )
+    llm_hedge_use_p95: bool = Field(
+        default=True,
+        description="Hedge at the first provider's observed p95 latency once enough samples exist"
+    )
+    llm_hedge_min_samples: int = Field(
+        default=20,
+        description="Latency samples required before the p95 threshold is used"
+    )
+
+    # Request coalescing
+    llm_coalesce_requests: bool = Field(
+        default=True,
+        description="Share one in-flight generation between concurrent identical requests"
+    )
+
+    # Provider admission control
+    llm_initial_concurrency: int = Field(
+        default=4,
+        description="Starting in-flight call limit per provider"
+    )
+    llm_min_concurrency: int = Field(
+        default=1,
+        description="Lowest in-flight call limit the adaptive controller backs off to"
+    )
+    llm_max_concurrency: int = Field(
+        default=32,
+        description="Highest in-flight call limit the adaptive controller grows to"
+    )
+    llm_latency_target_ms: int = Field(
+        default=60000,
+        description="Call latency above which the in-flight limit is reduced"
+    )
+    llm_rate_limit_max_requeues: int = Field(
+        default=3,
+        description="Times a call rejected with HTTP 429 is queued again before failing"
+    )
+    openai_rpm_limit: int = Field(
+        default=500,
+        description="OpenAI requests-per-minute budget"
+    )
+    openai_tpm_limit: int = Field(
+        default=200000,
+        description="OpenAI tokens-per-minute budget (prompt plus max_tokens)"
+    )
+    anthropic_rpm_limit: int = Field(
+        default=50,
+        description="Anthropic requests-per-minute budget"
+    )
+    anthropic_tpm_limit: int = Field(
+        default=80000,
+        description="Anthropic tokens-per-minute budget (prompt plus max_tokens)"
+    )
+
+    # Provider resilience
+    llm_max_retries: int = Field(
+        default=2,
+        description="Retries for transient provider failures (timeouts, 5xx, connection errors)"
+    )
+    llm_retry_base_delay_ms: int = Field(
+        default=500,
+        description="Base delay of the jittered exponential retry backoff"
+    )
+    llm_retry_max_delay_ms: int = Field(
+        default=8000,
+        description="Upper bound of a single retry backoff delay"
+    )
+    llm_timeout_s: float = Field(
+        default=120.0,
+        description="Per-call timeout used until enough latency samples exist, and its upper bound"
+    )
+    llm_min_timeout_s: float = Field(
+        default=15.0,
+        description="Lower bound of the adaptive per-call timeout"
+    )
+    llm_timeout_p99_multiplier: float = Field(
+        default=2.0,
+        description="Adaptive timeout as a multiple of the provider's observed p99 latency"
+    )
+    llm_timeout_min_samples: int = Field(
+        default=20,
+        description="Latency samples required before the adaptive timeout is used"
+    )
+    llm_breaker_failure_threshold: int = Field(
+        default=5,
+        description="Consecutive transient failures that open a provider's circuit breaker"
+    )
+    llm_breaker_reset_s: float = Field(
+        default=30.0,
+        description="Seconds an open circuit breaker waits before letting a probe call through"
+    )
+    llm_negative_cache_ttl_s: float = Field(
+        default=60.0,
+        description="Seconds a non-retryable failure is replayed for identical calls"
+    )
+
+    # Provider batch APIs
+    llm_batch_poll_interval_s: float = Field(
+        default=30.0,
+        description="Minimum seconds between provider status checks of a submitted batch; also the Retry-After hint"
+    )
+
+    # Simulated mock provider (development and load testing only)
+    mock_provider_enabled: bool = Field(
+        default=False,
+        description="Offer the simulated 'mock' provider outside test mode"
+    )
+    mock_ttft_median_ms: float = Field(
+        default=800.0,
+        description="Median simulated time to first token"
+    )
+    mock_ttft_sigma: float = Field(
+        default=0.5,
+        description="Log-normal sigma of the simulated time to first token"
+    )
+    mock_tokens_per_sec_mean: float = Field(
+        default=60.0,
+        description="Mean simulated decode speed in tokens per second"
+    )
+    mock_tokens_per_sec_stddev: float = Field(
+        default=15.0,
+        description="Standard deviation of the simulated decode speed"
+    )
+    mock_output_tokens_median: int = Field(
+        default=800,
+        description="Median simulated output length in tokens, capped at max_tokens"
+    )
+    mock_output_tokens_sigma: float = Field(
+        default=0.4,
+        description="Log-normal sigma of the simulated output length"
+    )
+    mock_error_rate: float = Field(
+        default=0.0,
+        ge=0.0,
+        le=1.0,
+        description="Fraction of simulated calls failing with a retryable server error"
+    )
+    mock_rate_limit_rate: float = Field(
+        default=0.0,
+        ge=0.0,
+        le=1.0,
+        description="Fraction of simulated calls rejected with HTTP 429"
+    )
+    mock_seed: Optional[int] = Field(
+        default=None,
+        description="Random seed for reproducible simulated runs"
+    )
+
+    # Request deadlines
+    max_request_deadline_s: float = Field(
+        default=300.0,
+        description="Upper bound on the X-Request-Timeout a client may ask for"
+    )
+    threat_model_deadline_s: float = Field(
+        default=180.0,
+        description="Default time budget of a synchronous threat model generation"
+    )
+    scenario_deadline_s: float = Field(
+        default=180.0,
+        description="Default time budget of a synchronous scenario generation"
+    )
+    reroll_deadline_s: float = Field(
+        default=60.0,
+        description="Default time budget of a scenario section reroll"
+    )
+
+    # Async jobs
+    job_workers: int = Field(
+        default=4,
+        ge=1,
+        description="Async jobs processed concurrently; further jobs wait in the priority queue"
+    )
+    job_priority_aging_s: float = Field(
+        default=30.0,
+        description="Queue wait that lifts a job one priority level, so low-priority jobs cannot starve"
+    )
+    job_long_poll_max_wait_s: float = Field(
+        default=60.0,
+        description="Longest wait a job status long-poll may ask for"
+    )
+    job_events_heartbeat_s: float = Field(
+        default=15.0,
+        description="Idle seconds between keep-alive comments on job event streams"
+    )
+    job_shutdown_grace_s: float = Field(
+        default=30.0,
+        description="Seconds running jobs may finish during shutdown before they are cancelled"
+    )
+    job_eta_default_s: float = Field(
+        default=60.0,
+        description="Assumed generation time for completion estimates until enough jobs have been measured"
+    )
+    job_poll_min_ms: int = Field(
+        default=500,
+        description="Shortest retry_after_ms hint given to clients polling a job"
+    )
+    job_poll_max_ms: int = Field(
+        default=10000,
+        description="Longest retry_after_ms hint given to clients polling a job"
+    )
+
+    # Job result cache
+    result_cache_max_bytes: int = Field(
+        default=64 * 1024 * 1024,
+        description="Memory budget of the in-process job result cache"
+    )
+    result_cache_ttl_s: float = Field(
+        default=7 * 24 * 3600,
+        description="Seconds a cached job result stays valid"
+    )
+    result_cache_disk_path: Optional[str] = Field(
+        default="./cache/results.db",
+        description="SQLite file of the on-disk result cache tier shared by all workers; empty to disable"
+    )
+    result_cache_disk_max_bytes: int = Field(
+        default=1024 * 1024 * 1024,
+        description="Compressed size the on-disk result cache is trimmed to"
+    )
+
+    # Maintenance
+    janitor_interval_s: float = Field(
+        default=300.0,
+        description="Seconds between background sweeps of expired jobs, batches, cached results and uploads; 0 disables them"
+    )
+    job_retention_s: float = Field(
+        default=7 * 24 * 3600,
+        description="Seconds a finished job stays retrievable, counted from its creation"
+    )
+    upload_retention_hours: float = Field(
+        default=24.0,
+        description="Hours an uploaded file is kept"
+    )
+    batch_retention_s: float = Field(
+        default=2 * 24 * 3600,
+        description="Seconds a provider scenario batch stays retrievable, counted from its submission"
+    )
+
     # Database
     database_url: str = "sqlite:///./threatforge.db"
+    job_store_flush_interval_s: float = Field(
+        default=1.0,
+        description="Longest delay before a job progress update is written to the job store"
+    )
     
     # Security
     secret_key: str = Field(
@@ -0,0 +1,309 @@
+"""In-process load-test harness for the ASGI app, driven against the simulated mock provider.
+
+Virtual users run closed loops of weighted operations through an
+``httpx.AsyncClient`` bound to the app, each from its own client address so
+per-IP rate limits apply as they would to real users. The report is JSON,
+so runs from different releases can be diffed.
+
+Usage (from the backend directory):
+    python -m app.loadtest --duration 60 --users 50 \\
+        --mix generate=4,generate_async=3,upload=1,reroll=2 --output report.json
+
+The simulated provider is enabled automatically when ``--provider mock``
+(the default) is used; its latency, output length and failure rates come
+from the ``MOCK_*`` settings, see ``app.services.mock_service``.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import resource
+import sys
+import time
+import uuid
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import httpx
+from pydantic import BaseModel, Field
+
+from app.core.config import settings
+from app.services.resilience import percentile
+
+OPERATIONS = ("generate", "generate_async", "upload", "reroll")
+TERMINAL_JOB_STATES = {"completed", "failed", "cancelled"}
+LAG_PROBE_INTERVAL = 0.1  # Seconds between event-loop lag probes
+
+UPLOAD_TEMPLATE = ('<mxfile><diagram name="{name}"><mxGraphModel><root>'
+                   '<mxCell id="0"/><mxCell id="1" parent="0" value="{name}"/>'
+                   '</root></mxGraphModel></diagram></mxfile>')
+
+
+class LoadTestConfig(BaseModel):
+    """Parameters of a load-test run."""
+    duration_s: float = Field(default=30.0, gt=0, description="How long virtual users keep sending requests")
+    users: int = Field(default=20, ge=1, description="Concurrent virtual users")
+    mix: Dict[str, float] = Field(
+        default={"generate": 4, "generate_async": 3, "upload": 1, "reroll": 2},
+        description="Relative weight of each operation"
+    )
+    provider: Optional[str] = Field(default="mock", description="Provider pinned on every generation request")
+    think_time_ms: float = Field(default=0.0, ge=0, description="Pause between a user's operations")
+    poll_interval_s: float = Field(default=0.5, gt=0, description="Delay between job status polls")
+    job_timeout_s: float = Field(default=120.0, gt=0, description="Give up polling a job after this long")
+    duplicate_ratio: float = Field(
+        default=0.0, ge=0, le=1,
+        description="Fraction of requests reusing a shared payload, to exercise caching and deduplication"
+    )
+    seed: Optional[int] = Field(default=None, description="Random seed for the operation mix")
+
+
+class _Recorder:
+    """Collects latencies and status codes per operation."""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.statuses: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    def record(self, operation: str, seconds: float, status: str, ok: bool) -> None:
+        self.latencies[operation].append(seconds)
+        self.statuses[operation][status] += 1
+        if not ok:
+            self.errors[operation] += 1
+
+    def summary(self, elapsed: float) -> Dict[str, dict]:
+        result = {}
+        for operation, samples in sorted(self.latencies.items()):
+            result[operation] = {
+                "count": len(samples),
+                "errors": self.errors[operation],
+                "throughput_rps": round(len(samples) / elapsed, 3),
+                "status_codes": dict(self.statuses[operation]),
+                "latency_ms": _latency_summary(samples),
+            }
+        return result
+
+
+def _latency_summary(samples: List[float]) -> Dict[str, Optional[float]]:
+    def ms(value: Optional[float]) -> Optional[float]:
+        return round(value * 1000, 2) if value is not None else None
+    return {
+        "p50": ms(percentile(samples, 0.50)),
+        "p95": ms(percentile(samples, 0.95)),
+        "p99": ms(percentile(samples, 0.99)),
+        "max": ms(max(samples) if samples else None),
+        "mean": ms(sum(samples) / len(samples) if samples else None),
+    }
+
+
+def _rss_mb() -> float:
+    """Current resident set size in MB (peak RSS where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+class LoadTest:
+    """One load-test run against an ASGI app."""
+
+    def __init__(self, app, config: LoadTestConfig):
+        self.app = app
+        self.config = config
+        self.random = random.Random(config.seed)
+        self.recorder = _Recorder()
+        self.lag_samples: List[float] = []
+        self.upload_ids: List[str] = []
+        operations = [op for op in OPERATIONS if config.mix.get(op, 0) > 0]
+        if not operations:
+            raise ValueError(f"Mix must give a positive weight to one of: {', '.join(OPERATIONS)}")
+        self.operations = operations
+        self.weights = [config.mix[op] for op in operations]
+
+    def _unique(self) -> str:
+        if self.random.random() < self.config.duplicate_ratio:
+            return "shared"
+        return uuid.uuid4().hex[:12]
+
+    def _scenario_payload(self) -> dict:
+        return {
+            "company_name": f"LoadCo-{self._unique()}",
+            "industry": "Finance",
+            "company_size": "medium",
+            "technologies": ["AWS", "Kubernetes"],
+            "threat_actor": "ransomware",
+            "llm_provider": self.config.provider,
+        }
+
+    async def _timed(self, client: httpx.AsyncClient, operation: str, method: str, url: str, **kwargs):
+        start = time.monotonic()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except Exception as e:
+            self.recorder.record(operation, time.monotonic() - start, type(e).__name__, ok=False)
+            return None
+        self.recorder.record(operation, time.monotonic() - start, str(response.status_code),
+                             ok=response.status_code < 400)
+        return response
+
+    async def _generate(self, client: httpx.AsyncClient) -> None:
+        await self._timed(client, "generate", "POST", "/api/scenarios/generate", json=self._scenario_payload())
+
+    async def _reroll(self, client: httpx.AsyncClient) -> None:
+        payload = {
+            "original_scenario": f"Scenario {self._unique()}\n## Timeline\nPhishing email received.",
+            "section_title": "Timeline",
+            "section_content": "Phishing email received.",
+            "context": self._scenario_payload(),
+            "llm_provider": self.config.provider,
+        }
+        await self._timed(client, "reroll", "POST", "/api/scenarios/reroll", json=payload)
+
+    async def _upload(self, client: httpx.AsyncClient) -> None:
+        body = UPLOAD_TEMPLATE.format(name=self._unique()).encode()
+        files = {"file": ("loadtest.drawio", body, "application/xml")}
+        response = await self._timed(client, "upload", "POST", "/api/threat-model/upload", files=files)
+        if response is not None and response.status_code == 200:
+            self.upload_ids.append(response.json()["file_id"])
+
+    async def _generate_async(self, client: httpx.AsyncClient) -> None:
+        """Submit a job and poll it to completion; the end-to-end time is the job's latency."""
+        payload = {
+            "content": f"Web application {self._unique()} with a login page, REST API and PostgreSQL database",
+            "framework": "STRIDE",
+            "llm_provider": self.config.provider,
+        }
+        start = time.monotonic()
+        response = await self._timed(client, "submit_job", "POST", "/api/threat-model/generate-async", json=payload)
+        if response is None or response.status_code != 200:
+            return
+        job_id = response.json()["job_id"]
+        status = "timeout"
+        while time.monotonic() - start < self.config.job_timeout_s:
+            poll = await self._timed(client, "poll_job", "GET", f"/api/threat-model/jobs/{job_id}")
+            if poll is not None and poll.status_code == 200 and poll.json()["status"] in TERMINAL_JOB_STATES:
+                status = poll.json()["status"]
+                break
+            await asyncio.sleep(self.config.poll_interval_s)
+        self.recorder.record("generate_async", time.monotonic() - start, status, ok=status == "completed")
+
+    async def _user(self, index: int, deadline: float) -> None:
+        # A distinct client address per user keeps per-IP rate limits realistic
+        address = f"10.{index // 65536 % 256}.{index // 256 % 256}.{index % 256}"
+        transport = httpx.ASGITransport(app=self.app, client=(address, 40000))
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=None) as client:
+            while time.monotonic() < deadline:
+                operation = self.random.choices(self.operations, self.weights)[0]
+                await getattr(self, f"_{operation}")(client)
+                if self.config.think_time_ms:
+                    await asyncio.sleep(self.config.think_time_ms / 1000)
+
+    async def _probe_lag(self) -> None:
+        """Measure how late the event loop wakes a sleeping task."""
+        while True:
+            start = time.monotonic()
+            await asyncio.sleep(LAG_PROBE_INTERVAL)
+            self.lag_samples.append(max(0.0, time.monotonic() - start - LAG_PROBE_INTERVAL))
+
+    async def _cleanup(self) -> None:
+        transport = httpx.ASGITransport(app=self.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest") as client:
+            for file_id in set(self.upload_ids):
+                await client.delete(f"/api/threat-model/files/{file_id}")
+
+    async def run(self) -> dict:
+        """Run the load test and return the report."""
+        rss_start = _rss_mb()
+        started = time.monotonic()
+        deadline = started + self.config.duration_s
+        probe = asyncio.create_task(self._probe_lag())
+        try:
+            await asyncio.gather(*(self._user(i, deadline) for i in range(self.config.users)))
+        finally:
+            probe.cancel()
+        elapsed = time.monotonic() - started
+        rss_end = _rss_mb()
+        await self._cleanup()
+        operations = self.recorder.summary(elapsed)
+        total = sum(op["count"] for name, op in operations.items() if name != "poll_job")
+        return {
+            "config": self.config.model_dump(),
+            "elapsed_s": round(elapsed, 3),
+            "requests": total,
+            "throughput_rps": round(total / elapsed, 3),
+            "operations": operations,
+            "event_loop_lag_ms": _latency_summary(self.lag_samples),
+            "memory": {
+                "rss_start_mb": round(rss_start, 2),
+                "rss_end_mb": round(rss_end, 2),
+                "rss_growth_mb": round(rss_end - rss_start, 2),
+            },
+        }
+
+
+async def run_load_test(config: LoadTestConfig, asgi_app=None) -> dict:
+    """Run a load test against the app with its lifespan active.
+
+    Args:
+        config: Run parameters.
+        asgi_app: FastAPI app to drive; defaults to ``app.main.app``.
+
+    Returns:
+        The JSON-serializable report.
+    """
+    if asgi_app is None:
+        from app.main import app as asgi_app
+    async with asgi_app.router.lifespan_context(asgi_app):
+        return await LoadTest(asgi_app, config).run()
+
+
+def _parse_mix(value: str) -> Dict[str, float]:
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name not in OPERATIONS:
+            raise argparse.ArgumentTypeError(f"Unknown operation '{name}'; choose from {', '.join(OPERATIONS)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds to run")
+    parser.add_argument("--users", type=int, default=20, help="Concurrent virtual users")
+    parser.add_argument("--mix", type=_parse_mix, help="Weights, e.g. generate=4,generate_async=3,upload=1,reroll=2")
+    parser.add_argument("--provider", default="mock", help="Provider pinned on generation requests")
+    parser.add_argument("--think-ms", type=float, default=0.0, help="Pause between a user's operations")
+    parser.add_argument("--poll-interval", type=float, default=0.5, help="Seconds between job polls")
+    parser.add_argument("--duplicate-ratio", type=float, default=0.0, help="Fraction of requests reusing a payload")
+    parser.add_argument("--seed", type=int, help="Random seed for the operation mix")
+    parser.add_argument("--output", help="Write the JSON report to this file instead of stdout")
+    args = parser.parse_args(argv)
+    if args.provider == "mock":
+        settings.mock_provider_enabled = True
+
+    config = LoadTestConfig(
+        duration_s=args.duration,
+        users=args.users,
+        provider=args.provider,
+        think_time_ms=args.think_ms,
+        poll_interval_s=args.poll_interval,
+        duplicate_ratio=args.duplicate_ratio,
+        seed=args.seed,
+        **({"mix": args.mix} if args.mix else {}),
+    )
+    report = json.dumps(asyncio.run(run_load_test(config)), indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report + "\n")
+    else:
+        print(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,38 @@
 """Main FastAPI application module for ThreatForge."""
 
+import os
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.scenarios import router as scenarios_router
 from app.api import threat_model
+from app.api.llm import router as llm_router
+from app.api.metrics import MetricsMiddleware, router as metrics_router
+from app.core.config import settings
+from app.services.client_registry import client_registry
+from app.services.janitor import janitor
+from app.services.job_service import job_service
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open pooled LLM clients and start maintenance on startup; drain jobs and close clients on shutdown."""
+    if os.getenv('TESTING') != 'true':
+        await client_registry.warmup()
+    janitor.start()
+    yield
+    await janitor.stop()
+    # Jobs still need the clients, so they are stopped first
+    await job_service.shutdown(settings.job_shutdown_grace_s)
+    await client_registry.aclose()
+
 
 app = FastAPI(
     title="ThreatForge",
     description="AI-powered cybersecurity tabletop exercise scenario generator",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -17,11 +41,15 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Link", "X-Next-Cursor"],
 )
+app.add_middleware(MetricsMiddleware)
 
 # Include routers
 app.include_router(scenarios_router)
 app.include_router(threat_model.router)
+app.include_router(llm_router)
+app.include_router(metrics_router)
 
 @app.get("/")
 async def root() -> dict[str, str]:
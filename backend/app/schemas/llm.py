@@ -0,0 +1,61 @@
+"""Schemas describing LLM provider usage and health."""
+
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+
+class LLMUsage(BaseModel):
+    """Token usage reported by a provider, for one call or aggregated."""
+    provider: str = Field(..., description="LLM provider name")
+    model: str = Field(..., description="Model identifier")
+    requests: int = Field(default=0, ge=0, description="Number of completed calls")
+    input_tokens: int = Field(default=0, ge=0, description="Uncached input tokens billed at full price")
+    output_tokens: int = Field(default=0, ge=0, description="Generated output tokens")
+    cache_read_tokens: int = Field(default=0, ge=0, description="Input tokens served from the provider prompt cache")
+    cache_write_tokens: int = Field(default=0, ge=0, description="Input tokens written to the provider prompt cache")
+
+
+class ModelSpec(BaseModel):
+    """Pricing and limits for a single model. Prices are USD per million tokens."""
+    input_price: float = Field(..., ge=0, description="Price of uncached input tokens")
+    output_price: float = Field(..., ge=0, description="Price of output tokens")
+    cache_read_price: float = Field(default=0.0, ge=0, description="Price of input tokens read from the prompt cache")
+    cache_write_price: float = Field(default=0.0, ge=0, description="Price of input tokens written to the prompt cache")
+    context_window: int = Field(..., gt=0, description="Maximum prompt plus output tokens")
+    max_output_tokens: int = Field(..., gt=0, description="Maximum output tokens per call")
+
+
+class ProviderHedgeStats(BaseModel):
+    """Hedged generation outcomes and latency for one provider."""
+    provider: str = Field(..., description="LLM provider name")
+    requests: int = Field(default=0, ge=0, description="Calls sent to this provider")
+    hedges: int = Field(default=0, ge=0, description="Times this provider was raced as the hedge")
+    wins: int = Field(default=0, ge=0, description="Races this provider answered first")
+    losses: int = Field(default=0, ge=0, description="Races this provider was cancelled in")
+    errors: int = Field(default=0, ge=0, description="Calls that failed")
+    p50_latency_ms: Optional[float] = Field(None, description="Median successful call latency")
+    p95_latency_ms: Optional[float] = Field(None, description="95th percentile successful call latency")
+
+
+class ProviderAdmissionStats(BaseModel):
+    """State of the admission controller for one provider."""
+    provider: str = Field(..., description="LLM provider name")
+    concurrency_limit: float = Field(..., description="Current adaptive in-flight call limit")
+    in_flight: int = Field(..., ge=0, description="Calls currently running")
+    queued: int = Field(..., ge=0, description="Callers waiting for admission")
+    admitted: int = Field(default=0, ge=0, description="Calls admitted since startup")
+    rate_limited: int = Field(default=0, ge=0, description="Calls rejected by the provider with HTTP 429")
+    requests_available: float = Field(..., description="Requests left in the per-minute budget")
+    tokens_available: float = Field(..., description="Tokens left in the per-minute budget")
+
+
+class ProviderHealth(BaseModel):
+    """Circuit breaker and timeout state for one provider."""
+    provider: str = Field(..., description="LLM provider name")
+    state: str = Field(..., description="Circuit breaker state (closed, open, half_open)")
+    consecutive_failures: int = Field(..., ge=0, description="Transient failures since the last success")
+    retry_at: Optional[datetime] = Field(None, description="When an open breaker lets the next probe through")
+    timeout_s: float = Field(..., description="Current per-call timeout")
+    p99_latency_ms: Optional[float] = Field(None, description="99th percentile successful call latency")
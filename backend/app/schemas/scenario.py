@@ -1,7 +1,8 @@
 """Pydantic models for scenario-related data structures."""
 
+from datetime import datetime
 from enum import Enum
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 from pydantic import BaseModel, Field
 
@@ -93,3 +94,68 @@ class RerollSectionRequest(BaseModel):
     section_content: str = Field(..., description="Current content of that section")
     context: dict = Field(..., description="Original form data/context for scenario generation")
     llm_provider: Optional[LLMProvider] = Field(default=None, description="LLM provider to use")
+
+
+class BatchScenarioRequest(BaseModel):
+    """Request model for generating several scenarios in one call."""
+    
+    items: List[ScenarioRequest] = Field(
+        ...,
+        min_length=1,
+        max_length=100,
+        description="Scenario requests to generate"
+    )
+    max_concurrency: int = Field(
+        default=4,
+        ge=1,
+        le=16,
+        description="Maximum scenarios generated at the same time"
+    )
+    use_provider_batch: bool = Field(
+        default=False,
+        description="Submit to the providers' discounted batch APIs and poll for results instead of streaming them"
+    )
+
+
+class BatchItemStatus(str, Enum):
+    """Outcome of one item in a batch."""
+    
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+class BatchScenarioResult(BaseModel):
+    """The outcome of one item in a batch."""
+    
+    index: int = Field(description="Position of the item in the request")
+    status: BatchItemStatus = Field(description="Whether the item was generated")
+    result: Optional[ScenarioResponse] = Field(default=None, description="The generated scenario")
+    error: Optional[str] = Field(default=None, description="Why the item failed")
+
+
+class ScenarioBatchState(str, Enum):
+    """Progress of a batch submitted to provider batch APIs."""
+    
+    PROCESSING = "processing"
+    COMPLETED = "completed"
+
+
+class ScenarioBatchStatus(BaseModel):
+    """Status of a batch submitted to provider batch APIs."""
+    
+    batch_id: str = Field(description="Id to poll the batch with")
+    status: ScenarioBatchState = Field(description="Whether every item has finished")
+    created_at: datetime = Field(description="When the batch was submitted")
+    total: int = Field(description="Number of items in the batch")
+    results: List[BatchScenarioResult] = Field(
+        default_factory=list,
+        description="Finished items, in request order"
+    )
+
+
+class PendingProviderBatch(BaseModel):
+    """A provider batch job of a scenario batch that has not been collected yet."""
+    
+    provider_batch_id: str = Field(description="Id the provider's batch API returned")
+    provider: LLMProvider = Field(description="Provider running the job")
+    items: Dict[int, ScenarioRequest] = Field(description="The batch's request items in the job, by index")
@@ -229,6 +229,8 @@ class AsyncThreatModelRequest(BaseModel):
 class JobResponse(BaseModel):
     """Response model for job creation."""
     job_id: str = Field(..., description="Unique job identifier")
+    status: Optional[JobStatus] = Field(None, description="Job status right after creation; completed on a cache hit")
+    result: Optional[ThreatModelResponse] = Field(None, description="Cached result, when requested with include_result")
     
     @field_validator('job_id')
 
@@ -248,6 +250,11 @@ class JobStatusResponse(BaseModel):
     created_at: datetime = Field(..., description="Job creation timestamp")
     updated_at: datetime = Field(..., description="Last update timestamp")
     estimated_completion: Optional[datetime] = Field(None, description="Estimated completion time")
+    retry_after_ms: Optional[int] = Field(None, ge=0, description="Suggested wait before polling again; absent once the job is final")
+    queue_position: Optional[int] = Field(None, ge=1, description="1-based position in the job queue while pending")
+    version: int = Field(0, ge=0, description="Incremented on every status change; served as the ETag")
+    provider: Optional[str] = Field(None, description="Provider requested, or the one that produced the result")
+    framework: Optional[str] = Field(None, description="Threat modeling framework")
     result: Optional[ThreatModelResponse] = Field(None, description="Job result if completed")
     error: Optional[str] = Field(None, description="Error message if failed")
     processing_time_ms: Optional[int] = Field(None, description="Total processing time")
@@ -297,6 +304,25 @@ class CacheEntry(BaseModel):
             raise ValueError('Access count cannot be negative')
         return v
 
+class DiskCacheStats(BaseModel):
+    """Size of the on-disk result cache tier."""
+    path: str = Field(..., description="SQLite file holding the cache")
+    entries: int = Field(..., description="Results stored on disk")
+    bytes: int = Field(..., description="Compressed size of the stored results")
+
+class ResultCacheStats(BaseModel):
+    """Size and effectiveness of the job result cache."""
+    entries: int = Field(..., description="Results currently cached")
+    bytes: int = Field(..., description="Estimated memory held by cached results")
+    max_bytes: int = Field(..., description="Byte budget of the cache")
+    hits: int = Field(..., description="Lookups that returned a cached result")
+    misses: int = Field(..., description="Lookups that found nothing or an expired result")
+    hit_ratio: float = Field(..., description="Fraction of lookups that hit")
+    evictions: int = Field(..., description="Results evicted to make room")
+    expirations: int = Field(..., description="Results dropped after their expiry or by cleanup")
+    rejections: int = Field(..., description="Results not admitted because cached ones were more popular")
+    disk: Optional[DiskCacheStats] = Field(None, description="On-disk tier, if enabled")
+
 class ThreatModelMetadata(BaseModel):
     """Metadata for threat model analysis."""
     system_name: Optional[str] = Field(None, description="Name of the analyzed system")
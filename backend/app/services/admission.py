@@ -0,0 +1,214 @@
+"""Adaptive per-provider admission control for LLM calls."""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from threading import Lock
+from typing import Deque, Dict, List, Optional
+
+from app.core.config import settings
+from app.schemas.llm import ProviderAdmissionStats
+
+logger = logging.getLogger("admission")
+
+DECREASE_FACTOR = 0.5  # Multiplicative decrease on HTTP 429
+LATENCY_DECREASE_FACTOR = 0.9  # Gentler decrease when calls exceed the latency target
+
+
+class TokenBucket:
+    """Budget that refills continuously up to a per-minute capacity."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.available = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.available = min(self.capacity, self.available + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until the amount can be taken; zero if available now."""
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.available >= amount:
+            return 0.0
+        return (amount - self.available) / self.rate
+
+    def take(self, amount: float) -> None:
+        self.available -= min(amount, self.capacity)
+
+    def refund(self, amount: float) -> None:
+        self._refill()
+        self.available = min(self.capacity, self.available + amount)
+
+
+class AdmissionPermit:
+    """Admission granted to a single call; returned through ``release``."""
+
+    def __init__(self, provider: str, tokens: int):
+        self.provider = provider
+        self.tokens = tokens
+        self.started = time.monotonic()
+        self.released = False
+
+
+def _wake(waiter: asyncio.Future) -> None:
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+class ProviderAdmission:
+    """AIMD concurrency limit plus request and token budgets for one provider.
+
+    Each successful call under the latency target grows the in-flight limit
+    by roughly one per window of calls; an HTTP 429 halves it and a slow call
+    shrinks it slightly. Callers over the limit or budget wait in a queue
+    instead of failing.
+    """
+
+    def __init__(self, provider: str, rpm_limit: int, tpm_limit: int):
+        self.provider = provider
+        self.limit = float(max(settings.llm_min_concurrency,
+                               min(settings.llm_initial_concurrency, settings.llm_max_concurrency)))
+        self.in_flight = 0
+        self.admitted = 0
+        self.rate_limited = 0
+        self.requests = TokenBucket(rpm_limit)
+        self.tokens = TokenBucket(tpm_limit)
+        self.waiters: Deque[asyncio.Future] = deque()
+        self.lock = Lock()
+
+    def _try_admit(self, tokens: int) -> Optional[float]:
+        """Admit now and return 0, or return seconds to wait (None: until a release)."""
+        if self.in_flight >= int(self.limit):
+            return None
+        wait = max(self.requests.wait_time(1), self.tokens.wait_time(tokens))
+        if wait > 0:
+            return wait
+        self.requests.take(1)
+        self.tokens.take(tokens)
+        self.in_flight += 1
+        self.admitted += 1
+        return 0.0
+
+    async def acquire(self, tokens: int) -> AdmissionPermit:
+        """Wait until the call fits the concurrency limit and per-minute budgets.
+
+        Args:
+            tokens: Estimated prompt plus output tokens of the call.
+
+        Returns:
+            A permit that must be passed to ``release`` when the call ends.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            with self.lock:
+                wait = self._try_admit(tokens)
+                if wait == 0.0:
+                    return AdmissionPermit(self.provider, tokens)
+                waiter = loop.create_future()
+                self.waiters.append(waiter)
+            try:
+                await asyncio.wait({waiter}, timeout=wait)
+            except asyncio.CancelledError:
+                with self.lock:
+                    if waiter in self.waiters:
+                        self.waiters.remove(waiter)
+                    elif waiter.done():
+                        # We were woken for a free slot; hand it to the next caller
+                        self._wake_waiters()
+                raise
+            with self.lock:
+                if waiter in self.waiters:
+                    self.waiters.remove(waiter)
+
+    def _wake_waiters(self) -> None:
+        """Wake as many queued callers as there are free slots. Caller holds the lock."""
+        free = max(1, int(self.limit) - self.in_flight)
+        for _ in range(min(free, len(self.waiters))):
+            waiter = self.waiters.popleft()
+            waiter.get_loop().call_soon_threadsafe(_wake, waiter)
+
+    def release(self, permit: AdmissionPermit, rate_limited: bool = False,
+                success: bool = True, actual_tokens: Optional[int] = None) -> None:
+        """Return a permit and feed the call's outcome into the AIMD limit.
+
+        Args:
+            permit: The permit returned by ``acquire``.
+            rate_limited: Whether the provider answered with HTTP 429.
+            success: Whether the call completed successfully.
+            actual_tokens: Tokens the provider reported, used to refund the
+                unused part of the estimate.
+        """
+        with self.lock:
+            if permit.released:
+                return
+            permit.released = True
+            self.in_flight -= 1
+            latency_ms = (time.monotonic() - permit.started) * 1000
+            if rate_limited:
+                self.rate_limited += 1
+                self.limit = max(settings.llm_min_concurrency, self.limit * DECREASE_FACTOR)
+                logger.warning(f"{self.provider} rate limited; concurrency limit now {self.limit:.1f}")
+            elif success and latency_ms > settings.llm_latency_target_ms:
+                self.limit = max(settings.llm_min_concurrency, self.limit * LATENCY_DECREASE_FACTOR)
+            elif success:
+                self.limit = min(settings.llm_max_concurrency, self.limit + 1.0 / self.limit)
+            if actual_tokens is not None and actual_tokens < permit.tokens:
+                self.tokens.refund(permit.tokens - actual_tokens)
+            self._wake_waiters()
+
+    def stats(self) -> ProviderAdmissionStats:
+        with self.lock:
+            self.requests._refill()
+            self.tokens._refill()
+            return ProviderAdmissionStats(
+                provider=self.provider,
+                concurrency_limit=round(self.limit, 2),
+                in_flight=self.in_flight,
+                queued=len(self.waiters),
+                admitted=self.admitted,
+                rate_limited=self.rate_limited,
+                requests_available=round(self.requests.available, 2),
+                tokens_available=round(self.tokens.available, 2),
+            )
+
+
+class AdmissionController:
+    """Holds one ``ProviderAdmission`` per provider, created on first use."""
+
+    def __init__(self):
+        self.providers: Dict[str, ProviderAdmission] = {}
+        self.providers_lock = Lock()
+
+    def _budgets(self, provider: str):
+        if provider == "openai":
+            return settings.openai_rpm_limit, settings.openai_tpm_limit
+        elif provider == "anthropic":
+            return settings.anthropic_rpm_limit, settings.anthropic_tpm_limit
+        # Providers without published limits get an effectively unlimited budget
+        return 1_000_000, 1_000_000_000
+
+    def for_provider(self, provider: str) -> ProviderAdmission:
+        with self.providers_lock:
+            admission = self.providers.get(provider)
+            if admission is None:
+                admission = self.providers[provider] = ProviderAdmission(provider, *self._budgets(provider))
+            return admission
+
+    def snapshot(self) -> List[ProviderAdmissionStats]:
+        with self.providers_lock:
+            admissions = list(self.providers.values())
+        return [admission.stats() for admission in admissions]
+
+    def reset(self) -> None:
+        with self.providers_lock:
+            self.providers.clear()
+
+
+# Global admission controller instance
+admission_controller = AdmissionController()
@@ -1,53 +1,127 @@
+from typing import AsyncIterator, Dict, Optional, Union
 import anthropic
-from typing import Optional
-from app.services.llm_service import LLMService
+from app.services.llm_service import (
+    LLMRateLimitError, LLMService, LLMServiceError, LLMTimeoutError, retry_after_seconds
+)
 from app.core.config import settings
+from app.services.client_registry import client_registry
+from app.services.prompts import SYSTEM_PROMPT, split_prompt
+from app.services.usage_tracker import usage_tracker
+from app.services import token_counter
+from app.schemas.llm import LLMUsage
+
+CACHE_CONTROL = {"type": "ephemeral"}
+
 
 class AnthropicService(LLMService):
+    batch_price_factor = 0.5  # Message Batches are billed at half price
+
     def __init__(self, api_key: Optional[str] = None):
         self.api_key = api_key or settings.anthropic_api_key
         if not self.api_key:
             raise ValueError("Anthropic API key not provided")
-        self.client = anthropic.AsyncAnthropic(api_key=self.api_key)
-        self.model = "claude-3-5-sonnet-20241022"
+        self.client = client_registry.get_client("anthropic", self.api_key)
+        self.model = settings.anthropic_model
+        self.last_usage: Optional[LLMUsage] = None
+
+    def _build_request(self, prompt: str, max_tokens: int) -> dict:
+        # Cache breakpoints after the system prompt and after the static
+        # template body; only the request-specific tail is billed as fresh input.
+        static_prefix, dynamic_suffix = split_prompt(prompt)
+        if static_prefix:
+            content = [
+                {"type": "text", "text": static_prefix, "cache_control": CACHE_CONTROL},
+                {"type": "text", "text": dynamic_suffix}
+            ]
+        else:
+            content = prompt
+        return {
+            "model": self.model,
+            "max_tokens": max_tokens,
+            "temperature": 0.7,
+            "system": [{"type": "text", "text": SYSTEM_PROMPT, "cache_control": CACHE_CONTROL}],
+            "messages": [{"role": "user", "content": content}]
+        }
         
     async def generate(self, prompt: str, max_tokens: int = 2000) -> str:
+        token_counter.check_context_window(self.model, prompt, max_tokens)
         try:
-            response = await self.client.messages.create(
-                model=self.model,
-                max_tokens=max_tokens,
-                temperature=0.7,
-                system="""You are an elite cybersecurity expert with 15+ years of experience in threat modeling, incident response, and security architecture. You specialize in creating highly realistic, technically accurate, and operationally relevant cybersecurity scenarios.
-
-Your expertise includes:
-- Advanced persistent threats (APTs) and nation-state actors
-- Modern attack techniques (living-off-the-land, supply chain attacks, zero-day exploits)
-- Industry-specific threat landscapes and compliance requirements
-- Real-world incident response procedures and decision-making frameworks
-- Emerging technologies and their security implications
-
-You excel at creating scenarios that:
-- Challenge participants with realistic technical and business constraints
-- Incorporate current threat intelligence and attack trends
-- Provide clear learning objectives and measurable outcomes
-- Balance technical depth with executive-level strategic thinking
-- Include realistic injects that test both technical skills and leadership decision-making
-
-Always provide scenarios that are actionable, educational, and reflect real-world cybersecurity challenges.""",
-                messages=[
-                    {"role": "user", "content": prompt}
-                ]
+            response = await self.client.beta.prompt_caching.messages.create(
+                **self._build_request(prompt, max_tokens)
             )
+            self._record_usage(response.usage)
             return response.content[0].text
         except Exception as e:
-            raise Exception(f"Anthropic generation failed: {str(e)}")
+            raise self._translate_error("generation", e) from e
+
+    async def generate_stream(self, prompt: str, max_tokens: int = 2000) -> AsyncIterator[str]:
+        token_counter.check_context_window(self.model, prompt, max_tokens)
+        try:
+            async with self.client.beta.prompt_caching.messages.stream(
+                **self._build_request(prompt, max_tokens)
+            ) as stream:
+                async for text in stream.text_stream:
+                    yield text
+                self._record_usage((await stream.get_final_message()).usage)
+        except Exception as e:
+            raise self._translate_error("streaming", e) from e
+    
+    async def submit_batch(self, prompts: Dict[str, str], max_tokens: int = 2000) -> str:
+        requests = []
+        for custom_id, prompt in prompts.items():
+            token_counter.check_context_window(self.model, prompt, max_tokens)
+            requests.append({"custom_id": custom_id, "params": self._build_request(prompt, max_tokens)})
+        try:
+            batch = await self.client.beta.messages.batches.create(requests=requests)
+        except Exception as e:
+            raise self._translate_error("batch", e) from e
+        return batch.id
+
+    async def fetch_batch(self, batch_id: str) -> Optional[Dict[str, Union[str, LLMServiceError]]]:
+        results: Dict[str, Union[str, LLMServiceError]] = {}
+        try:
+            batches = self.client.beta.messages.batches
+            batch = await batches.retrieve(batch_id)
+            if batch.processing_status != "ended":
+                return None
+            async for item in await batches.results(batch_id):
+                if item.result.type == "succeeded":
+                    self._record_usage(item.result.message.usage)
+                    results[item.custom_id] = item.result.message.content[0].text
+                else:
+                    error = getattr(item.result, "error", None)
+                    results[item.custom_id] = LLMServiceError(
+                        f"Anthropic batch item {item.result.type}: {error or ''}".rstrip(": "),
+                        provider="anthropic"
+                    )
+        except Exception as e:
+            raise self._translate_error("batch", e) from e
+        return results
+
+    def _record_usage(self, usage) -> None:
+        self.last_usage = LLMUsage(
+            provider="anthropic",
+            model=self.model,
+            requests=1,
+            input_tokens=usage.input_tokens,
+            output_tokens=usage.output_tokens,
+            cache_read_tokens=getattr(usage, "cache_read_input_tokens", None) or 0,
+            cache_write_tokens=getattr(usage, "cache_creation_input_tokens", None) or 0
+        )
+        usage_tracker.record(self.last_usage)
+    
+    def _translate_error(self, kind: str, e: Exception) -> LLMServiceError:
+        message = f"Anthropic {kind} failed: {str(e)}"
+        if isinstance(e, anthropic.RateLimitError):
+            return LLMRateLimitError(message, provider="anthropic", retry_after=retry_after_seconds(e))
+        if isinstance(e, anthropic.APITimeoutError):
+            return LLMTimeoutError(message, provider="anthropic")
+        if isinstance(e, anthropic.APIConnectionError):
+            return LLMServiceError(message, provider="anthropic", retryable=True)
+        if isinstance(e, anthropic.APIStatusError):
+            retryable = e.status_code >= 500 or e.status_code == 408
+            return LLMServiceError(message, provider="anthropic", status_code=e.status_code, retryable=retryable)
+        return LLMServiceError(message, provider="anthropic")
     
     def estimate_cost(self, prompt: str, max_tokens: int = 2000) -> float:
-        # Claude 3 Sonnet pricing (as of 2024)
-        input_price = 0.003  # per 1K tokens
-        output_price = 0.015  # per 1K tokens
-        
-        # Rough estimation
-        prompt_tokens = len(prompt) / 4  # ~4 chars per token
-        
-        return (prompt_tokens / 1000 * input_price) + (max_tokens / 1000 * output_price)
+        return token_counter.estimate_cost(self.model, prompt, max_tokens)
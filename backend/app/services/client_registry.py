@@ -0,0 +1,119 @@
+"""Process-wide registry of pooled, long-lived LLM provider clients."""
+
+import asyncio
+import logging
+from threading import Lock
+from typing import Any, Dict, Optional, Tuple
+
+import anthropic
+import httpx
+from openai import AsyncOpenAI
+
+from app.core.config import settings
+
+logger = logging.getLogger("client_registry")
+
+
+class LLMClientRegistry:
+    """Registry that hands out one pooled SDK client per provider/API key.
+
+    Creating an ``AsyncOpenAI`` or ``AsyncAnthropic`` client per request throws
+    away its HTTP connection pool, so every generation pays a fresh TCP/TLS
+    handshake. The registry keeps clients alive for the lifetime of the
+    process and is opened and closed by the FastAPI lifespan.
+    """
+
+    def __init__(self):
+        self.clients: Dict[Tuple[str, str], Any] = {}
+        self.clients_lock = Lock()
+
+    def _build_http_client(self) -> httpx.AsyncClient:
+        """Build an HTTP client with the configured pool limits."""
+        limits = httpx.Limits(
+            max_connections=settings.llm_max_connections,
+            max_keepalive_connections=settings.llm_max_keepalive_connections,
+            keepalive_expiry=settings.llm_keepalive_expiry,
+        )
+        return httpx.AsyncClient(
+            limits=limits,
+            timeout=httpx.Timeout(600.0, connect=10.0),
+            follow_redirects=True,
+        )
+
+    def _build_client(self, provider: str, api_key: str) -> Any:
+        """Build a new SDK client for the provider backed by a pooled HTTP client."""
+        http_client = self._build_http_client()
+        # Retries are owned by ManagedLLMService so they share its backoff,
+        # circuit breaker and admission accounting
+        if provider == "openai":
+            return AsyncOpenAI(api_key=api_key, http_client=http_client, max_retries=0)
+        elif provider == "anthropic":
+            return anthropic.AsyncAnthropic(api_key=api_key, http_client=http_client, max_retries=0)
+        raise ValueError(f"Unknown provider: {provider}")
+
+    def get_client(self, provider: str, api_key: str) -> Any:
+        """Get the shared SDK client for a provider and API key.
+
+        Args:
+            provider: Provider name ("openai" or "anthropic").
+            api_key: API key the client authenticates with.
+
+        Returns:
+            A long-lived ``AsyncOpenAI`` or ``AsyncAnthropic`` client.
+
+        Raises:
+            ValueError: If the provider is not supported.
+        """
+        key = (provider, api_key)
+        with self.clients_lock:
+            client = self.clients.get(key)
+            if client is None:
+                client = self._build_client(provider, api_key)
+                self.clients[key] = client
+                logger.info(f"Created pooled {provider} client")
+            return client
+
+    def _configured_keys(self) -> Dict[str, str]:
+        """Return the API keys configured in settings, by provider."""
+        keys = {}
+        if settings.openai_api_key:
+            keys["openai"] = settings.openai_api_key
+        if settings.anthropic_api_key:
+            keys["anthropic"] = settings.anthropic_api_key
+        return keys
+
+    async def _warm_client(self, provider: str, client: Any) -> None:
+        """Open a keep-alive connection to the provider's API host."""
+        try:
+            await client._client.head(str(client.base_url))
+            logger.info(f"Pre-warmed {provider} connection pool")
+        except Exception as e:
+            logger.warning(f"Failed to pre-warm {provider} connection pool: {e}")
+
+    async def warmup(self, providers: Optional[Dict[str, str]] = None) -> None:
+        """Create clients for configured providers and pre-open their connections.
+
+        Args:
+            providers: Optional mapping of provider name to API key. Defaults to
+                the keys configured in settings.
+        """
+        keys = providers if providers is not None else self._configured_keys()
+        clients = {provider: self.get_client(provider, api_key) for provider, api_key in keys.items()}
+        if not settings.llm_prewarm_connections:
+            return
+        await asyncio.gather(*(self._warm_client(p, c) for p, c in clients.items()))
+
+    async def aclose(self) -> None:
+        """Close every pooled client and release its connections."""
+        with self.clients_lock:
+            clients = list(self.clients.values())
+            self.clients.clear()
+        for client in clients:
+            try:
+                await client.close()
+            except Exception as e:
+                logger.warning(f"Error closing LLM client: {e}")
+
+
+# Global client registry instance
+client_registry = LLMClientRegistry()
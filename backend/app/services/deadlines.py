@@ -0,0 +1,66 @@
+"""Per-request deadlines carried to LLM calls through a context variable."""
+
+import time
+from contextlib import contextmanager
+from contextvars import Context, ContextVar, copy_context
+from typing import Iterator, Optional
+
+from app.services.llm_service import DeadlineExceededError
+
+# Absolute time.monotonic() by which the current request must be answered
+_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+
+@contextmanager
+def deadline_scope(timeout_s: Optional[float]) -> Iterator[Optional[float]]:
+    """Set the deadline for LLM calls made in this context.
+
+    The deadline is inherited by tasks created inside the scope, so it
+    follows a generation through hedging. Coalesced calls are shared by
+    callers with different deadlines, so they run without one and each
+    caller stops waiting at its own. A nested scope can only tighten an
+    outer deadline, never extend it.
+
+    Args:
+        timeout_s: Seconds from now, or None to keep the current deadline.
+
+    Yields:
+        The effective absolute deadline, or None if there is none.
+    """
+    current = _deadline.get()
+    deadline = current
+    if timeout_s is not None:
+        candidate = time.monotonic() + timeout_s
+        deadline = candidate if current is None else min(current, candidate)
+    token = _deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _deadline.reset(token)
+
+
+def detached_context() -> Context:
+    """A copy of the current context without a deadline, for work shared by several callers."""
+    context = copy_context()
+    context.run(_deadline.set, None)
+    return context
+
+
+def remaining() -> Optional[float]:
+    """Seconds left before the current deadline, or None if there is none."""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def check(provider: Optional[str] = None) -> Optional[float]:
+    """Return the seconds left, raising if the deadline has already passed.
+
+    Raises:
+        DeadlineExceededError: If the current deadline has passed.
+    """
+    left = remaining()
+    if left is not None and left <= 0:
+        raise DeadlineExceededError("Request deadline exceeded", provider=provider)
+    return left
@@ -0,0 +1,280 @@
+"""Compressed on-disk tier of the job result cache, shared by the workers of a host."""
+
+import gzip
+import json
+import logging
+import time
+import zlib
+from datetime import datetime
+from pathlib import Path
+from threading import Lock
+from typing import IO, Dict, Iterable, Iterator, Optional, Tuple
+
+from sqlalchemy import (
+    Column, DateTime, Index, Integer, LargeBinary, MetaData, String, Table, bindparam, delete, func, select, text,
+    update
+)
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.engine import Engine
+
+from app.schemas.threat_model import CacheEntry, DiskCacheStats
+from app.services.job_store import create_store_engine
+
+logger = logging.getLogger("disk_cache")
+
+COMPRESSION_LEVEL = 6
+ACCESS_FLUSH_INTERVAL_S = 60.0  # Longest a lookup's access time waits to be written
+
+metadata = MetaData()
+
+results_table = Table(
+    "results",
+    metadata,
+    Column("cache_key", String(128), primary_key=True),
+    Column("data", LargeBinary, nullable=False),  # zlib-compressed CacheEntry JSON
+    Column("size", Integer, nullable=False),
+    Column("created_at", DateTime, nullable=False),
+    Column("last_accessed", DateTime, nullable=False),
+    Column("expires_at", DateTime, nullable=True),
+    Index("ix_results_expires_at", "expires_at"),
+    Index("ix_results_last_accessed", "last_accessed"),
+)
+
+# Single-row running count and byte total of ``results``, kept current by
+# TOTAL_TRIGGERS so purges and stats never sum the whole table
+results_total_table = Table(
+    "results_total",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("entries", Integer, nullable=False),
+    Column("bytes", Integer, nullable=False),
+)
+
+TOTAL_TRIGGERS = (
+    """CREATE TRIGGER IF NOT EXISTS results_total_insert AFTER INSERT ON results BEGIN
+        UPDATE results_total SET entries = entries + 1, bytes = bytes + NEW.size;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS results_total_update AFTER UPDATE OF size ON results BEGIN
+        UPDATE results_total SET bytes = bytes + NEW.size - OLD.size;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS results_total_delete AFTER DELETE ON results BEGIN
+        UPDATE results_total SET entries = entries - 1, bytes = bytes - OLD.size;
+    END""",
+)
+
+
+class DiskResultCache:
+    """SQLite file of compressed cache entries keyed by request fingerprint.
+
+    Sits behind the in-memory ``ResultCache``: a memory miss falls back to
+    disk, so results survive restarts and worker recycling, and every
+    gunicorn worker on the host shares them through one WAL-mode file.
+    Entries can be exported to and imported from gzipped JSON Lines to
+    ship a warmed cache to another node.
+
+    Lookups only read: the access times that order least-recently-used
+    purges are buffered and written in one batch at most every
+    ``ACCESS_FLUSH_INTERVAL_S``, and before a purge. Every method blocks
+    on the file, so callers on the event loop use a worker thread.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._engine: Optional[Engine] = None
+        self._lock = Lock()
+        # Access times not yet written, and when they were last written
+        self._accessed: Dict[str, datetime] = {}
+        self._accessed_flushed_at = time.monotonic()
+        self._accessed_lock = Lock()
+
+    @property
+    def engine(self) -> Engine:
+        with self._lock:
+            if self._engine is None:
+                Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+                engine = create_store_engine(f"sqlite:///{self.path}")
+                with engine.begin() as connection:
+                    metadata.create_all(connection)
+                    for trigger in TOTAL_TRIGGERS:
+                        connection.execute(text(trigger))
+                    # Files written before the totals existed are summed once
+                    if connection.execute(select(results_total_table.c.id)).first() is None:
+                        connection.execute(results_total_table.insert().from_select(
+                            ["id", "entries", "bytes"],
+                            select(1, func.count(), func.coalesce(func.sum(results_table.c.size), 0)),
+                        ))
+                self._engine = engine
+            return self._engine
+
+    @staticmethod
+    def _totals(connection) -> Tuple[int, int]:
+        """Current (entries, compressed bytes) from the running totals."""
+        return tuple(connection.execute(
+            select(results_total_table.c.entries, results_total_table.c.bytes)
+        ).one())
+
+    @staticmethod
+    def _encode(entry: CacheEntry) -> bytes:
+        return zlib.compress(entry.model_dump_json().encode(), COMPRESSION_LEVEL)
+
+    @staticmethod
+    def _decode(data: bytes) -> CacheEntry:
+        return CacheEntry.model_validate_json(zlib.decompress(data))
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        """Load a live entry, or None if it is missing or expired.
+
+        Expired rows are left for ``purge`` so a lookup never writes.
+        """
+        now = datetime.now()
+        with self.engine.connect() as connection:
+            row = connection.execute(
+                select(results_table.c.data, results_table.c.expires_at).where(results_table.c.cache_key == key)
+            ).first()
+        if row is None or (row.expires_at is not None and row.expires_at <= now):
+            return None
+        self._record_access(key, now)
+        return self._decode(row.data)
+
+    def _record_access(self, key: str, when: datetime) -> None:
+        with self._accessed_lock:
+            self._accessed[key] = when
+            due = time.monotonic() - self._accessed_flushed_at >= ACCESS_FLUSH_INTERVAL_S
+        if due:
+            self.flush_access_times()
+
+    def flush_access_times(self) -> int:
+        """Write buffered access times in one transaction. Returns the number written."""
+        with self._accessed_lock:
+            accessed, self._accessed = self._accessed, {}
+            self._accessed_flushed_at = time.monotonic()
+        if not accessed:
+            return 0
+        statement = (
+            update(results_table)
+            .where(results_table.c.cache_key == bindparam("accessed_key"))
+            .values(last_accessed=bindparam("accessed_at"))
+        )
+        with self.engine.begin() as connection:
+            connection.execute(statement, [
+                {"accessed_key": key, "accessed_at": when} for key, when in accessed.items()
+            ])
+        return len(accessed)
+
+    def put(self, key: str, entry: CacheEntry) -> None:
+        """Store or replace an entry."""
+        self.put_many([(key, entry)])
+
+    def put_many(self, items: Iterable[Tuple[str, CacheEntry]]) -> None:
+        """Store or replace entries in one transaction."""
+        rows = []
+        for key, entry in items:
+            data = self._encode(entry)
+            rows.append({
+                "cache_key": key,
+                "data": data,
+                "size": len(data),
+                "created_at": entry.created_at,
+                "last_accessed": entry.last_accessed,
+                "expires_at": entry.expires_at,
+            })
+        if not rows:
+            return
+        statement = insert(results_table)
+        statement = statement.on_conflict_do_update(
+            index_elements=[results_table.c.cache_key],
+            set_={name: statement.excluded[name] for name in rows[0] if name != "cache_key"},
+        )
+        with self.engine.begin() as connection:
+            connection.execute(statement, rows)
+
+    def purge(self, max_bytes: Optional[int] = None, older_than: Optional[datetime] = None) -> Tuple[int, int]:
+        """Drop expired entries, entries created before ``older_than``, and then
+        the least recently used ones until the file holds at most ``max_bytes``.
+
+        Expired and least recently used entries are found through their
+        indexes and the size comes from the running total, so a purge reads
+        only the rows it removes. Buffered access
+        times are written first so the least recently used order is current.
+
+        Returns:
+            Tuple of (entries removed, compressed bytes reclaimed).
+        """
+        self.flush_access_times()
+        conditions = [results_table.c.expires_at <= datetime.now()]
+        if older_than is not None:
+            conditions.append(results_table.c.created_at < older_than)
+        removed = reclaimed = 0
+        with self.engine.begin() as connection:
+            for condition in conditions:
+                count, size = connection.execute(
+                    select(func.count(), func.coalesce(func.sum(results_table.c.size), 0)).where(condition)
+                ).one()
+                if count:
+                    connection.execute(delete(results_table).where(condition))
+                    removed += count
+                    reclaimed += size
+            if max_bytes is not None:
+                excess = self._totals(connection)[1] - max_bytes
+                if excess > 0:
+                    victims = []
+                    rows = connection.execute(
+                        select(results_table.c.cache_key, results_table.c.size)
+                        .order_by(results_table.c.last_accessed)
+                    )
+                    for key, size in rows:
+                        if excess <= 0:
+                            break
+                        victims.append(key)
+                        excess -= size
+                        reclaimed += size
+                    removed += connection.execute(
+                        delete(results_table).where(results_table.c.cache_key.in_(victims))
+                    ).rowcount
+        return removed, reclaimed
+
+    def stats(self) -> DiskCacheStats:
+        with self.engine.connect() as connection:
+            entries, size = self._totals(connection)
+        return DiskCacheStats(path=self.path, entries=entries, bytes=size)
+
+    def entries(self) -> Iterator[Tuple[str, CacheEntry]]:
+        """Iterate over every live entry."""
+        now = datetime.now()
+        with self.engine.connect() as connection:
+            rows = connection.execute(
+                select(results_table.c.cache_key, results_table.c.data, results_table.c.expires_at)
+            )
+            for key, data, expires_at in rows:
+                if expires_at is None or expires_at > now:
+                    yield key, self._decode(data)
+
+    def export_to(self, stream: IO[bytes]) -> int:
+        """Write every live entry as gzipped JSON Lines. Returns the number written."""
+        count = 0
+        with gzip.open(stream, "wt", encoding="utf-8") as out:
+            for key, entry in self.entries():
+                out.write(json.dumps({"cache_key": key, "entry": entry.model_dump(mode="json")}) + "\n")
+                count += 1
+        return count
+
+    def import_from(self, stream: IO[bytes], batch_size: int = 500) -> int:
+        """Load entries written by ``export_to``, replacing existing ones. Returns the number read."""
+        count = 0
+        batch = []
+        with gzip.open(stream, "rt", encoding="utf-8") as lines:
+            for line in lines:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                batch.append((record["cache_key"], CacheEntry.model_validate(record["entry"])))
+                if len(batch) >= batch_size:
+                    self.put_many(batch)
+                    count += len(batch)
+                    batch = []
+        self.put_many(batch)
+        return count + len(batch)
+
+    def clear(self) -> None:
+        with self.engine.begin() as connection:
+            connection.execute(delete(results_table))
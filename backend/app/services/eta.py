@@ -0,0 +1,100 @@
+"""Learned job stage durations for completion estimates and polling hints."""
+
+import itertools
+from threading import Lock
+from typing import Dict, Iterable, Optional, Tuple
+
+from app.core.config import settings
+
+# Stages of a job's run, in order
+STAGES = ("prepare", "generate", "finalize")
+
+SMOOTHING = 0.2  # Weight of the newest observation in the moving average
+MIN_SAMPLES = 3  # Observations a key needs before it is trusted over a broader one
+
+# (provider, framework, size bucket); None matches any value
+StatsKey = Tuple[Optional[str], Optional[str], Optional[int]]
+
+
+def size_bucket(content: str) -> int:
+    """Power-of-two bucket of a request's approximate token count (0: under 256)."""
+    return (len(content) // 4 // 256).bit_length()
+
+
+class _Stat:
+    __slots__ = ("mean", "count")
+
+    def __init__(self, value: float):
+        self.mean = value
+        self.count = 1
+
+    def add(self, value: float) -> None:
+        self.mean += SMOOTHING * (value - self.mean)
+        self.count += 1
+
+
+class StageEstimator:
+    """Moving averages of stage durations by provider, framework and prompt size.
+
+    Every observation updates the exact key and each broader key that
+    leaves some of its dimensions unspecified, so an estimate for a rarely
+    seen combination falls back to the closest one with enough samples,
+    and finally to a configured prior.
+    """
+
+    def __init__(self):
+        self.stats: Dict[Tuple[str, StatsKey], _Stat] = {}
+        self.lock = Lock()
+
+    @staticmethod
+    def _keys(provider, framework: Optional[str], bucket: Optional[int]) -> Iterable[StatsKey]:
+        """The key itself first, then ever broader ones; framework is dropped before size.
+
+        Providers may arrive as names or ``LLMProvider`` members; both map to
+        the name so a provider's observations and estimates share one key.
+        """
+        if provider is not None:
+            provider = provider.value if hasattr(provider, 'value') else str(provider)
+        for drop_provider, drop_size, drop_framework in itertools.product((False, True), repeat=3):
+            yield (
+                None if drop_provider else provider,
+                None if drop_framework else framework,
+                None if drop_size else bucket,
+            )
+
+    def record(self, stage: str, provider: Optional[str], framework: Optional[str], bucket: Optional[int],
+               duration_s: float) -> None:
+        with self.lock:
+            for key in set(self._keys(provider, framework, bucket)):
+                stat = self.stats.get((stage, key))
+                if stat is None:
+                    self.stats[(stage, key)] = _Stat(duration_s)
+                else:
+                    stat.add(duration_s)
+
+    def estimate(self, stage: str, provider: Optional[str], framework: Optional[str],
+                 bucket: Optional[int]) -> float:
+        """Expected duration of a stage in seconds."""
+        with self.lock:
+            for key in self._keys(provider, framework, bucket):
+                stat = self.stats.get((stage, key))
+                if stat is not None and stat.count >= MIN_SAMPLES:
+                    return stat.mean
+        return settings.job_eta_default_s if stage == "generate" else 0.0
+
+    def remaining(self, stage: str, provider: Optional[str], framework: Optional[str],
+                  bucket: Optional[int]) -> float:
+        """Expected duration of ``stage`` and every stage after it."""
+        return sum(
+            self.estimate(later, provider, framework, bucket) for later in STAGES[STAGES.index(stage):]
+        )
+
+
+def retry_after_ms(remaining_s: float, stage_s: float) -> int:
+    """Suggest when to poll again for a change expected in ``remaining_s`` seconds.
+
+    A change that is overdue is polled for at a quarter of its stage's
+    expected length rather than as fast as allowed.
+    """
+    wait_s = remaining_s if remaining_s > 0 else stage_s / 4
+    return int(min(max(wait_s * 1000, settings.job_poll_min_ms), settings.job_poll_max_ms))
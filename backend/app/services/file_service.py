@@ -1,17 +1,19 @@
 """File service for handling file uploads and management."""
 
+import heapq
 import uuid
 import logging
 import os
-from datetime import datetime
+from datetime import datetime, timedelta
 from pathlib import Path
-from typing import List, Optional
+from typing import List, Optional, Tuple
 import mimetypes
 import hashlib
 import re
 from fastapi import UploadFile, HTTPException
 
 from ..schemas.threat_model import FileUploadResponse, SupportedFileTypes
+from .metrics import UPLOAD_BYTES, UPLOAD_DEDUPE_HITS, UPLOADS
 
 logger = logging.getLogger(__name__)
 
@@ -35,6 +37,8 @@ MAX_FILES_PER_USER = 50  # Limit files per session
 
 # In-memory storage (in production, use database)
 db_files: dict[str, FileUploadResponse] = {}
+# (upload_date, file_id) heap, so cleanup visits only files old enough to go
+upload_index: List[Tuple[datetime, str]] = []
 
 def ensure_upload_dir() -> None:
     """Ensure the upload directory exists and has proper permissions."""
@@ -170,6 +174,9 @@ def save_upload(file: UploadFile) -> FileUploadResponse:
         duplicate_id = check_duplicate_file(contents)
         if duplicate_id:
             logger.info(f"Duplicate file detected, returning existing file: {duplicate_id}")
+            UPLOADS.inc()
+            UPLOAD_BYTES.inc(size)
+            UPLOAD_DEDUPE_HITS.inc()
             return db_files[duplicate_id]
         
         # Determine file type
@@ -209,6 +216,9 @@ def save_upload(file: UploadFile) -> FileUploadResponse:
         
         # Store in memory
         db_files[file_id] = meta
+        heapq.heappush(upload_index, (upload_date, file_id))
+        UPLOADS.inc()
+        UPLOAD_BYTES.inc(size)
         
         logger.info(f"File saved successfully: {file.filename} (ID: {file_id}, Size: {size} bytes)")
         
@@ -276,29 +286,36 @@ def delete_file(file_id: str) -> bool:
 
 def cleanup_old_files(max_age_hours: int = 24) -> int:
     """Clean up old files to prevent storage bloat."""
-    try:
-        current_time = datetime.utcnow()
-        files_to_delete = []
-        
-        for file_id, file_info in db_files.items():
-            age_hours = (current_time - file_info.upload_date).total_seconds() / 3600
-            if age_hours > max_age_hours:
-                files_to_delete.append(file_id)
-        
-        deleted_count = 0
-        for file_id in files_to_delete:
-            try:
-                delete_file(file_id)
-                deleted_count += 1
-            except Exception as e:
-                logger.warning(f"Failed to delete old file {file_id}: {e}")
-        
+    return sweep_old_files(max_age_hours)[0]
+
+def sweep_old_files(max_age_hours: float = 24) -> Tuple[int, int]:
+    """Delete files uploaded more than ``max_age_hours`` ago.
+    
+    Pops the oldest uploads off ``upload_index`` until it reaches one that
+    is recent enough, so the cost depends on the number of expired files,
+    not on the number stored.
+    
+    Returns:
+        Tuple of (files deleted, bytes reclaimed).
+    """
+    cutoff = datetime.utcnow() - timedelta(hours=max_age_hours)
+    deleted_count = reclaimed = 0
+    while upload_index and upload_index[0][0] < cutoff:
+        _, file_id = heapq.heappop(upload_index)
+        file_info = db_files.get(file_id)
+        if file_info is None:
+            # Already deleted through the API
+            continue
+        try:
+            delete_file(file_id)
+            deleted_count += 1
+            reclaimed += file_info.size
+        except Exception as e:
+            logger.warning(f"Failed to delete old file {file_id}: {e}")
+    
+    if deleted_count:
         logger.info(f"Cleaned up {deleted_count} old files")
-        return deleted_count
-        
-    except Exception as e:
-        logger.error(f"Error during cleanup: {e}")
-        return 0
+    return deleted_count, reclaimed
 
 def get_storage_stats() -> dict:
     """Get storage statistics."""
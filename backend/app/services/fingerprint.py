@@ -0,0 +1,95 @@
+"""Canonical fingerprints of generation requests, used as result cache keys.
+
+Two requests get the same fingerprint when they would produce the same
+result: text is Unicode-normalized, whitespace-collapsed and case-folded,
+an uploaded diagram is identified by its content hash rather than its file
+ID, and the model and prompt template version are part of the key so a
+model upgrade or template change stops serving results made by the old one.
+"""
+
+import hashlib
+import json
+import unicodedata
+from typing import Any, Dict, Optional
+
+from app.schemas.threat_model import AsyncThreatModelRequest
+from app.services import file_service
+from app.services.llm_factory import LLMFactory
+from app.services.llm_service import LLMProvider
+from app.services.prompts import THREAT_MODEL_PROMPT_VERSION
+
+# Bump when the fields or normalization below change
+FINGERPRINT_VERSION = 1
+
+
+def normalize_text(text: Optional[str]) -> Optional[str]:
+    """Fold text to the form that identifies it for caching.
+
+    Applies NFKC normalization, case folding and whitespace collapsing, so
+    ``"Web  App\\n"`` and ``"web app"`` compare equal.
+    """
+    if text is None:
+        return None
+    return " ".join(unicodedata.normalize("NFKC", text).casefold().split())
+
+
+def normalize_framework(framework: str) -> str:
+    """Normalize a framework name; ``ATTACK_TREES`` and ``Attack Trees`` are the same."""
+    return normalize_text(framework.replace("_", " "))
+
+
+def fingerprint(fields: Dict[str, Any]) -> str:
+    """Hash already normalized fields with BLAKE2b.
+
+    The fields are serialized as sorted, compact JSON, so the key does not
+    depend on argument order and no value can run into the next one.
+    """
+    canonical = json.dumps(
+        {"v": FINGERPRINT_VERSION, **fields}, sort_keys=True, separators=(",", ":"), ensure_ascii=False
+    )
+    return hashlib.blake2b(canonical.encode(), digest_size=32).hexdigest()
+
+
+def _provider_models(provider: Optional[str]) -> Dict[str, Optional[str]]:
+    """Models that may answer a request: the pinned provider's, or every provider's."""
+    providers = [provider] if provider else [member.value for member in LLMProvider]
+    models = {}
+    for name in providers:
+        try:
+            models[name] = LLMFactory.get_model(name)
+        except ValueError:
+            # Unknown providers fail when the job runs; nothing gets cached
+            models[name] = None
+    return models
+
+
+def _file_content_hash(file_id: Optional[str]) -> Optional[str]:
+    if not file_id:
+        return None
+    meta = file_service.db_files.get(file_id)
+    if meta is None:
+        # Unknown files contribute nothing to the prompt
+        return None
+    # Files stored before hashing was added can only be told apart by ID
+    return getattr(meta, "content_hash", None) or f"id:{file_id}"
+
+
+def threat_model_fingerprint(request: AsyncThreatModelRequest) -> str:
+    """Fingerprint a threat model generation request.
+
+    Args:
+        request: The validated request.
+
+    Returns:
+        A 64-character hex digest.
+    """
+    provider = normalize_text(request.llm_provider) or None
+    return fingerprint({
+        "kind": "threat_model",
+        "content": normalize_text(request.content),
+        "framework": normalize_framework(request.framework),
+        "file": _file_content_hash(request.file_id),
+        "provider": provider,
+        "models": _provider_models(provider),
+        "prompt_version": THREAT_MODEL_PROMPT_VERSION,
+    })
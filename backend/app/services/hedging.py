@@ -0,0 +1,193 @@
+"""Hedged generation: race a second provider when the first one is slow."""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from threading import Lock
+from typing import Deque, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.schemas.llm import ProviderHedgeStats
+from app.services.llm_factory import LLMFactory
+from app.services.llm_service import CircuitOpenError, LLMService, LLMServiceError
+from app.services.resilience import percentile, resilience
+from app.services.single_flight import SingleFlight, normalize_key
+
+logger = logging.getLogger("hedging")
+
+LATENCY_WINDOW = 500  # Successful call latencies kept per provider
+
+
+def _provider_name(provider) -> str:
+    return provider.value if hasattr(provider, 'value') else str(provider)
+
+
+def _should_fail_over(error: Exception) -> bool:
+    """Whether another provider may succeed where this one failed."""
+    return isinstance(error, CircuitOpenError) or (isinstance(error, LLMServiceError) and error.retryable)
+
+
+def _consume_result(task: asyncio.Task) -> None:
+    """Retrieve a cancelled loser's outcome so it is never reported as unhandled."""
+    if not task.cancelled():
+        task.exception()
+
+
+class HedgedGenerator:
+    """Sends a prompt to one provider and, if it is slow, races a second one.
+
+    The hedge fires after ``llm_hedge_delay_ms``, or at the primary provider's
+    observed p95 latency once enough samples exist, so only the slowest ~5%
+    of requests pay for a second generation. The first successful answer
+    wins and the other call is cancelled.
+
+    Providers whose circuit breaker is open are moved to the back of the
+    candidate list, and when hedging is off a call that fails transiently
+    (after its own retries) or fast-fails on an open breaker is rerouted to
+    the next candidate.
+
+    Identical generations (same prompt, candidates and token budget) that
+    overlap in time are coalesced: later callers share the in-flight result.
+    """
+
+    def __init__(self):
+        self.latencies: Dict[str, Deque[float]] = {}
+        self.stats: Dict[str, ProviderHedgeStats] = {}
+        self.stats_lock = Lock()
+        self.flights = SingleFlight()
+
+    def _stats(self, provider: str) -> ProviderHedgeStats:
+        stats = self.stats.get(provider)
+        if stats is None:
+            stats = self.stats[provider] = ProviderHedgeStats(provider=provider)
+            self.latencies[provider] = deque(maxlen=LATENCY_WINDOW)
+        return stats
+
+    def _record(self, provider: str, **increments) -> None:
+        with self.stats_lock:
+            stats = self._stats(provider)
+            for field, amount in increments.items():
+                setattr(stats, field, getattr(stats, field) + amount)
+
+    def _record_latency(self, provider: str, seconds: float) -> None:
+        with self.stats_lock:
+            self._stats(provider)
+            self.latencies[provider].append(seconds)
+
+    def hedge_delay(self, provider) -> float:
+        """Seconds to wait on a provider before sending the hedge request."""
+        delay = settings.llm_hedge_delay_ms / 1000
+        if settings.llm_hedge_use_p95:
+            with self.stats_lock:
+                samples = list(self.latencies.get(_provider_name(provider), ()))
+            if len(samples) >= settings.llm_hedge_min_samples:
+                delay = percentile(samples, 0.95)
+        return delay
+
+    async def _attempt(self, provider, prompt: str, max_tokens: int) -> Tuple[str, object, LLMService]:
+        name = _provider_name(provider)
+        self._record(name, requests=1)
+        start = time.monotonic()
+        try:
+            service = LLMFactory.create(provider)
+            text = await service.generate(prompt, max_tokens)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self._record(name, errors=1)
+            raise
+        self._record_latency(name, time.monotonic() - start)
+        return text, provider, service
+
+    async def generate(self, prompt: str, providers: List, max_tokens: int = 2000) -> Tuple[str, object, LLMService]:
+        """Generate text, hedging across providers when enabled.
+
+        Concurrent calls with the same prompt, providers and token budget
+        attach to the generation already in flight instead of starting one.
+
+        Args:
+            prompt: The input prompt for text generation.
+            providers: Candidate providers in preference order. Hedging only
+                happens when it is enabled and more than one is given.
+            max_tokens: Maximum number of tokens to generate.
+
+        Returns:
+            Tuple of (generated text, provider that answered, its service).
+
+        Raises:
+            Exception: The last provider error if every attempt fails.
+        """
+        if not settings.llm_coalesce_requests:
+            return await self._generate(prompt, providers, max_tokens)
+        key = normalize_key(",".join(_provider_name(p) for p in providers), max_tokens, prompt)
+        return await self.flights.run(key, lambda: self._generate(prompt, providers, max_tokens))
+
+    async def _generate(self, prompt: str, providers: List, max_tokens: int) -> Tuple[str, object, LLMService]:
+        providers = resilience.order_by_health(providers)
+        if not settings.llm_hedging_enabled or len(providers) < 2:
+            for index, provider in enumerate(providers):
+                try:
+                    return await self._attempt(provider, prompt, max_tokens)
+                except Exception as e:
+                    if index == len(providers) - 1 or not _should_fail_over(e):
+                        raise
+                    logger.warning(f"Rerouting from {_provider_name(provider)} to "
+                                   f"{_provider_name(providers[index + 1])}: {e}")
+
+        primary, secondary = providers[0], providers[1]
+        pending = {asyncio.create_task(self._attempt(primary, prompt, max_tokens))}
+        hedge_started = False
+        last_error: Optional[BaseException] = None
+        timeout: Optional[float] = self.hedge_delay(primary)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        text, provider, service = task.result()
+                        if hedge_started:
+                            self._record(_provider_name(provider), wins=1)
+                            if pending:
+                                loser = secondary if provider == primary else primary
+                                self._record(_provider_name(loser), losses=1)
+                        return text, provider, service
+                    last_error = task.exception()
+                    if not hedge_started and not _should_fail_over(last_error):
+                        # The secondary would be sent the same doomed request
+                        raise last_error
+                # Hedge on timeout, or immediately if the primary failed transiently
+                if not hedge_started:
+                    hedge_started = True
+                    timeout = None
+                    self._record(_provider_name(secondary), hedges=1)
+                    logger.info(f"Hedging slow {_provider_name(primary)} request with {_provider_name(secondary)}")
+                    pending.add(asyncio.create_task(self._attempt(secondary, prompt, max_tokens)))
+            raise last_error
+        finally:
+            for task in pending:
+                task.cancel()
+                task.add_done_callback(_consume_result)
+
+    def snapshot(self) -> List[ProviderHedgeStats]:
+        """Return per-provider counters with current latency percentiles."""
+        with self.stats_lock:
+            result = []
+            for provider, stats in self.stats.items():
+                samples = list(self.latencies[provider])
+                p50, p95 = percentile(samples, 0.5), percentile(samples, 0.95)
+                result.append(stats.model_copy(update={
+                    "p50_latency_ms": p50 * 1000 if p50 is not None else None,
+                    "p95_latency_ms": p95 * 1000 if p95 is not None else None,
+                }))
+            return result
+
+    def reset(self) -> None:
+        """Clear all counters and latency samples."""
+        with self.stats_lock:
+            self.stats.clear()
+            self.latencies.clear()
+
+
+# Global hedged generator instance
+hedged_generator = HedgedGenerator()
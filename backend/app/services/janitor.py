@@ -0,0 +1,102 @@
+"""Periodic background maintenance: expiring jobs, scenario batches, cached results and uploads."""
+
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.services import file_service
+from app.services.job_service import job_service
+from app.services.metrics import JANITOR_RECLAIMED_BYTES, JANITOR_REMOVED, JANITOR_SWEEP_DURATION
+
+logger = logging.getLogger("janitor")
+
+# A sweep removes what has expired and returns (items removed, bytes reclaimed)
+Sweep = Callable[[], Tuple[int, int]]
+
+
+class Janitor:
+    """Runs registered sweeps every ``interval_s`` seconds, scheduled on the app's event loop.
+
+    Sweeps are driven by expiry-ordered indexes and stop at the first entry
+    that has not expired, so a pass costs time proportional to what it
+    removes. Passes run on a worker thread, since sweeps delete from the
+    job store, the disk cache and the upload directory. Each sweep's
+    duration, removals and reclaimed bytes are exported as metrics; a
+    failing sweep is logged and does not stop the others.
+    """
+
+    def __init__(self, interval_s: float):
+        self.interval_s = interval_s
+        self.sweeps: Dict[str, Sweep] = {}
+        self.task: Optional[asyncio.Task] = None
+
+    def register(self, name: str, sweep: Sweep) -> None:
+        self.sweeps[name] = sweep
+
+    def run_once(self) -> Dict[str, Tuple[int, int]]:
+        """Run every sweep once.
+
+        Returns:
+            Mapping of sweep name to (items removed, bytes reclaimed) for the
+            sweeps that succeeded.
+        """
+        results = {}
+        for name, sweep in self.sweeps.items():
+            start = time.perf_counter()
+            try:
+                removed, reclaimed = sweep()
+            except Exception:
+                logger.exception(f"Maintenance sweep {name} failed")
+                continue
+            finally:
+                duration = time.perf_counter() - start
+                JANITOR_SWEEP_DURATION.observe(duration, sweep=name)
+            JANITOR_REMOVED.inc(removed, sweep=name)
+            JANITOR_RECLAIMED_BYTES.inc(reclaimed, sweep=name)
+            if removed:
+                logger.info(f"Sweep {name} removed {removed} items, {reclaimed} bytes in {duration * 1000:.1f}ms")
+            results[name] = (removed, reclaimed)
+        return results
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval_s)
+            await asyncio.to_thread(self.run_once)
+
+    def start(self) -> None:
+        """Start sweeping on the running loop. Does nothing if the interval is 0."""
+        if self.interval_s > 0 and self.task is None:
+            self.task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self.task is None:
+            return
+        self.task.cancel()
+        try:
+            await self.task
+        except asyncio.CancelledError:
+            pass
+        self.task = None
+
+
+def _sweep_disk_cache() -> Tuple[int, int]:
+    if job_service.disk_cache is None:
+        return 0, 0
+    return job_service.disk_cache.purge(max_bytes=settings.result_cache_disk_max_bytes)
+
+
+def _sweep_scenario_batches() -> Tuple[int, int]:
+    cutoff = datetime.utcnow() - timedelta(seconds=settings.batch_retention_s)
+    return job_service.store.delete_batches_before(cutoff)
+
+
+# Global janitor instance
+janitor = Janitor(settings.janitor_interval_s)
+janitor.register("jobs", job_service.sweep_finished_jobs)
+janitor.register("scenario_batches", _sweep_scenario_batches)
+janitor.register("result_cache", lambda: job_service.cache.purge_expired())
+janitor.register("disk_cache", _sweep_disk_cache)
+janitor.register("uploads", lambda: file_service.sweep_old_files(settings.upload_retention_hours))
@@ -0,0 +1,79 @@
+"""Fan-out of job status changes to subscribers waiting on any event loop."""
+
+import asyncio
+from threading import Lock
+from typing import Dict, Optional, Set
+
+from app.schemas.threat_model import JobStatusResponse
+
+
+class JobSubscription:
+    """A subscriber's queue of status snapshots for one job.
+
+    Created on the subscriber's event loop; updates are handed over with
+    ``call_soon_threadsafe`` so publishers may run on any loop or thread.
+    An idle subscription costs one pending future, nothing polls.
+    """
+
+    def __init__(self, bus: "JobEventBus", job_id: str):
+        self.bus = bus
+        self.job_id = job_id
+        self.loop = asyncio.get_running_loop()
+        self.queue: asyncio.Queue = asyncio.Queue()
+
+    def _deliver(self, job: JobStatusResponse) -> None:
+        try:
+            self.loop.call_soon_threadsafe(self.queue.put_nowait, job)
+        except RuntimeError:
+            # The subscriber's loop is closed; it will never read again
+            self.close()
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[JobStatusResponse]:
+        """Wait for the next update, or return None after ``timeout`` seconds."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self) -> None:
+        self.bus.unsubscribe(self)
+
+    def __enter__(self) -> "JobSubscription":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class JobEventBus:
+    """Delivers every published job snapshot to that job's current subscribers."""
+
+    def __init__(self):
+        self.subscribers: Dict[str, Set[JobSubscription]] = {}
+        self.lock = Lock()
+
+    def subscribe(self, job_id: str) -> JobSubscription:
+        """Start receiving updates for a job. Must be called on the subscriber's loop."""
+        subscription = JobSubscription(self, job_id)
+        with self.lock:
+            self.subscribers.setdefault(job_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: JobSubscription) -> None:
+        with self.lock:
+            subscribers = self.subscribers.get(subscription.job_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self.subscribers[subscription.job_id]
+
+    def publish(self, job: JobStatusResponse) -> None:
+        """Send a snapshot of a job to its subscribers. Safe to call from any thread."""
+        with self.lock:
+            subscribers = list(self.subscribers.get(job.job_id, ()))
+        for subscription in subscribers:
+            subscription._deliver(job)
+
+    def subscriber_count(self) -> int:
+        with self.lock:
+            return sum(len(subscribers) for subscribers in self.subscribers.values())
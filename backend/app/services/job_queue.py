@@ -0,0 +1,85 @@
+"""Priority queue of async jobs waiting for a worker."""
+
+import heapq
+import itertools
+import time
+from threading import Lock
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+
+# Head start of each priority, in units of job_priority_aging_s
+PRIORITY_RANK = {"high": 0, "normal": 1, "low": 2}
+
+
+class JobQueue:
+    """Orders waiting jobs by priority, aging older ones so none starve.
+
+    A job's sort key is its enqueue time plus ``job_priority_aging_s`` per
+    priority step below high. A high-priority job therefore overtakes a
+    normal one only if it arrived less than one aging interval later, and
+    every waiting job eventually reaches the head. Because the key is fixed
+    at enqueue time the heap never needs re-sorting as jobs age.
+
+    Removal is lazy: a removed entry stays in the heap, marked dead, until
+    it is popped.
+    """
+
+    def __init__(self):
+        self.heap: List[list] = []
+        self.entries: Dict[str, list] = {}
+        self.counter = itertools.count()
+        self.lock = Lock()
+
+    def push(self, job_id: str, priority: str, item: Any) -> None:
+        """Queue a job with its payload."""
+        key = time.monotonic() + PRIORITY_RANK.get(priority, 1) * settings.job_priority_aging_s
+        entry = [key, next(self.counter), job_id, item]
+        with self.lock:
+            self.entries[job_id] = entry
+            heapq.heappush(self.heap, entry)
+
+    def pop(self) -> Optional[Tuple[str, Any]]:
+        """Remove and return the next ``(job_id, item)``, or None if the queue is empty."""
+        with self.lock:
+            while self.heap:
+                _, _, job_id, item = heapq.heappop(self.heap)
+                if job_id is not None:
+                    del self.entries[job_id]
+                    return job_id, item
+        return None
+
+    def remove(self, job_id: str) -> bool:
+        """Drop a waiting job. Returns False if it is not queued."""
+        with self.lock:
+            entry = self.entries.pop(job_id, None)
+            if entry is None:
+                return False
+            entry[2] = None
+            return True
+
+    def position(self, job_id: str) -> Optional[int]:
+        """1-based position of a waiting job, or None if it is not queued."""
+        with self.lock:
+            entry = self.entries.get(job_id)
+            if entry is None:
+                return None
+            rank = (entry[0], entry[1])
+            return 1 + sum(1 for other in self.entries.values() if (other[0], other[1]) < rank)
+
+    def job_ids(self) -> List[str]:
+        """Ids of the waiting jobs, in no particular order."""
+        with self.lock:
+            return list(self.entries)
+
+    def drain(self) -> List[str]:
+        """Empty the queue, returning the ids of the jobs that were waiting."""
+        with self.lock:
+            job_ids = list(self.entries)
+            self.entries.clear()
+            self.heap.clear()
+        return job_ids
+
+    def __len__(self) -> int:
+        with self.lock:
+            return len(self.entries)
@@ -1,37 +1,97 @@
 """Service for managing async threat model generation jobs."""
 
 import asyncio
+import heapq
+import math
+import time
 import uuid
-import hashlib
 import json
 from datetime import datetime, timedelta
-from typing import Dict, Optional, List
-from threading import Lock
+from typing import Dict, Optional, List, Set, Tuple
+from threading import Event, Lock, Thread
+
+from sqlalchemy.exc import SQLAlchemyError
 
 from app.schemas.threat_model import (
     JobStatus, JobStatusResponse, ThreatModelResponse, 
     AsyncThreatModelRequest, CacheEntry
 )
+from app.core.config import settings
+from app.services.job_events import JobEventBus
+from app.services.job_queue import JobQueue
+from app.services.job_store import FINAL_STATUSES, JobStore
 from app.services.llm_factory import LLMFactory
+from app.services.hedging import hedged_generator
 from app.services import file_service
+from app.services.prompts import render_threat_model_prompt
+from app.services.disk_cache import DiskResultCache
+from app.services.eta import StageEstimator, retry_after_ms, size_bucket
+from app.services.fingerprint import threat_model_fingerprint
+from app.services.result_cache import ResultCache
+from app.services.metrics import JOB_CACHE_LOOKUPS, JOB_ETA_ERROR, metrics
 import logging
 
 logger = logging.getLogger("job_service")
 
 class JobService:
-    """Service for managing async threat model generation jobs."""
+    """Service for managing async threat model generation jobs.
+    
+    New jobs wait in a priority queue and at most ``job_workers`` run at
+    once, so a burst of submissions cannot start unbounded provider calls
+    and high-priority jobs overtake bulk ones.
+    
+    ``jobs`` holds the jobs this process created; every job is also
+    written to a ``JobStore`` so a poll that lands on another worker
+    process can still answer. Writes happen on a dedicated writer thread,
+    so a locked database never stalls the event loop: creation and final
+    states wake it at once, progress updates are batched and written
+    behind. Reads from the event loop go through ``fetch_job_status`` and
+    worker threads.
+    
+    Every change is also published on ``events`` for push subscribers.
     
-    def __init__(self):
+    Results are cached in memory, and when ``result_cache_disk_path`` is
+    set, also in a compressed SQLite file. A memory hit completes a job
+    at submission; a memory miss is looked up on disk from a worker
+    thread once the job starts.
+    
+    Completion estimates come from measured stage durations (``eta``) and
+    are revised as each stage starts; polls get a ``retry_after_ms`` hint
+    pointing at the job's next expected change.
+    """
+    
+    def __init__(self, store: Optional[JobStore] = None):
         self.jobs: Dict[str, JobStatusResponse] = {}
-        self.cache: Dict[str, CacheEntry] = {}
+        self.cache = ResultCache(settings.result_cache_max_bytes)
+        self.disk_cache: Optional[DiskResultCache] = (
+            DiskResultCache(settings.result_cache_disk_path) if settings.result_cache_disk_path else None
+        )
+        # Running task of every unfinished job, so it is neither garbage
+        # collected mid-flight nor left running after a cancel
+        self.tasks: Dict[str, asyncio.Task] = {}
+        self.queue = JobQueue()
+        self.events = JobEventBus()
+        self.store = store or JobStore(settings.database_url)
+        # Jobs changed since they were last written to the store
+        self.dirty: Set[str] = set()
+        self.writer: Optional[Thread] = None
+        self.flush_requested = Event()
+        # Serializes flushes, so an older snapshot never overwrites a newer one
+        self.flush_lock = Lock()
+        # (created_at, job_id) of finished jobs, oldest first, so expiry
+        # sweeps visit only the jobs they remove
+        self.finished_index: List[Tuple[datetime, str]] = []
+        self.eta = StageEstimator()
+        # Per unfinished job: when its next change is expected, and the
+        # expected length of the stage it is in
+        self.next_change: Dict[str, Tuple[datetime, float]] = {}
+        # Completion time promised at submission, to measure estimate error
+        self.submitted_eta: Dict[str, datetime] = {}
         self.jobs_lock = Lock()
-        self.cache_lock = Lock()
         
     def _generate_cache_key(self, request: AsyncThreatModelRequest) -> str:
-        """Generate a cache key based on request parameters."""
-        # Create a hash of the request content and parameters
-        content = f"{request.content}:{request.framework}:{request.file_id}:{request.llm_provider}"
-        return hashlib.md5(content.encode()).hexdigest()
+        """Generate a cache key from the request's canonical fingerprint."""
+        return threat_model_fingerprint(request)
     
     def _get_file_content(self, file_id: Optional[str]) -> Optional[str]:
         """Get file content if file_id is provided."""
@@ -52,115 +112,7 @@ class JobService:
         content_to_analyze = request.content
         if file_content:
             content_to_analyze = f"Diagram Content:\n{file_content}\n\nAdditional Context:\n{request.content}"
-        
-
-        return f"""# ELITE THREAT MODELING ANALYSIS
-
-## EXECUTIVE SUMMARY
-You are a world-class cybersecurity expert with 20+ years of experience in threat modeling, security architecture, and risk assessment. You specialize in identifying sophisticated attack vectors and providing actionable security recommendations.
-
-## ANALYSIS FRAMEWORK
-**Primary Framework**: {request.framework}
-**Analysis Depth**: Comprehensive threat modeling with real-world attack scenarios
-
-## SYSTEM UNDER ANALYSIS
-{content_to_analyze}
-
-## THREAT MODELING REQUIREMENTS
-
-### 1. SYSTEM ARCHITECTURE ANALYSIS
-- **Component Inventory**: Complete mapping of all system components, data flows, and trust boundaries
-- **Technology Stack Assessment**: Security implications of each technology choice
-- **Integration Points**: External dependencies, APIs, and third-party services
-- **Data Classification**: Sensitivity levels and regulatory requirements for all data types
-
-### 2. THREAT ACTOR PROFILING
-- **Adversary Types**: Nation-state actors, organized crime, insider threats, hacktivists
-- **Capability Assessment**: Technical sophistication, resources, and persistence
-- **Motivation Analysis**: Financial gain, espionage, sabotage, reputation damage
-- **Attack Surface Mapping**: All potential entry points and attack vectors
-
-### 3. COMPREHENSIVE THREAT ANALYSIS
-Using the {request.framework} framework, analyze each component for:
-
-#### STRIDE Threats (if applicable):
-- **Spoofing**: Identity impersonation, credential theft, session hijacking
-- **Tampering**: Data manipulation, code injection, configuration changes
-- **Repudiation**: Audit log deletion, transaction denial, evidence destruction
-- **Information Disclosure**: Data breaches, information leakage, side-channel attacks
-- **Denial of Service**: Resource exhaustion, service disruption, availability attacks
-- **Elevation of Privilege**: Privilege escalation, access control bypass, admin compromise
-
-#### Additional Threat Categories:
-- **Supply Chain Attacks**: Compromised dependencies, vendor risks, build system attacks
-- **Social Engineering**: Phishing, pretexting, baiting, quid pro quo
-- **Physical Security**: Physical access, hardware tampering, environmental threats
-- **Emerging Threats**: AI/ML attacks, quantum computing risks, zero-day exploits
-
-### 4. RISK ASSESSMENT & PRIORITIZATION
-- **Threat Likelihood**: Based on attacker capabilities, system exposure, and historical data
-- **Impact Assessment**: Business impact, financial loss, regulatory consequences
-- **Risk Scoring**: Quantitative risk assessment using industry-standard methodologies
-- **Priority Ranking**: Critical, High, Medium, Low based on likelihood × impact
-
-### 5. MITIGATION STRATEGY DEVELOPMENT
-- **Defense in Depth**: Multiple layers of security controls
-- **Zero Trust Architecture**: Never trust, always verify principles
-- **Security Controls**: Technical, administrative, and physical safeguards
-- **Monitoring & Detection**: Real-time threat detection and response capabilities
-- **Incident Response**: Preparedness and recovery procedures
-
-### 6. COMPLIANCE & REGULATORY CONSIDERATIONS
-- **Industry Standards**: ISO 27001, NIST, CIS Controls, OWASP
-- **Regulatory Requirements**: GDPR, HIPAA, SOX, PCI-DSS as applicable
-- **Best Practices**: Industry-specific security frameworks and guidelines
-
-## DELIVERABLE FORMAT
-
-Structure your analysis with these sections:
-
-### 1. EXECUTIVE SUMMARY
-- Key findings and critical risks
-- Overall security posture assessment
-- Strategic recommendations
-
-### 2. SYSTEM OVERVIEW
-- Architecture description and component mapping
-- Data flow analysis and trust boundaries
-- Technology stack security assessment
-
-### 3. THREAT LANDSCAPE
-- Threat actor profiles and capabilities
-- Attack surface analysis
-- Historical threat intelligence
-
-### 4. DETAILED THREAT ANALYSIS
-- Component-by-component threat assessment
-- Specific attack scenarios and vectors
-- Vulnerability analysis and exploitability
-
-### 5. RISK ASSESSMENT
-- Risk matrix with likelihood and impact
-- Priority ranking of threats
-- Risk acceptance criteria
-
-### 6. MITIGATION STRATEGIES
-- Technical controls and countermeasures
-- Process improvements and policies
-- Monitoring and detection capabilities
-
-### 7. SECURITY ROADMAP
-- Short-term (0-3 months) critical fixes
-- Medium-term (3-12 months) improvements
-- Long-term (1+ years) strategic initiatives
-
-### 8. COMPLIANCE ASSESSMENT
-- Regulatory gap analysis
-- Standards compliance status
-- Remediation requirements
-
-Ensure your analysis is technically accurate, actionable, and provides clear guidance for security improvement initiatives."""
-
+        return render_threat_model_prompt(request.framework, content_to_analyze)
     
     def create_job(self, request: AsyncThreatModelRequest) -> str:
         """Create a new async job for threat model generation."""
@@ -169,51 +121,227 @@ Ensure your analysis is technically accurate, actionable, and provides clear gui
         
         # Check cache first
         cache_key = getattr(request, 'cache_key', None) or self._generate_cache_key(request)
-        with self.cache_lock:
-            if cache_key in self.cache:
-                # Return cached result immediately
-                cached_entry = self.cache[cache_key]
-                cached_entry.access_count += 1
-                cached_entry.last_accessed = now
-                
-                # Create a completed job with cached result
-                job = JobStatusResponse(
-                    job_id=job_id,
-                    status=JobStatus.COMPLETED,
-                    progress=100,
-                    message="Result retrieved from cache",
-                    result=cached_entry.threat_model,
-                    created_at=now,
-                    updated_at=now
-                )
-                with self.jobs_lock:
-                    self.jobs[job_id] = job
-                return job_id
+        cached_entry = self._lookup_cached(cache_key)
+        if cached_entry is not None:
+            # Return cached result immediately
+            
+            # Create a completed job with cached result
+            job = JobStatusResponse(
+                job_id=job_id,
+                status=JobStatus.COMPLETED,
+                progress=100,
+                message="Result retrieved from cache",
+                result=cached_entry.threat_model,
+                provider=cached_entry.threat_model.provider_used,
+                framework=request.framework,
+                created_at=now,
+                updated_at=now
+            )
+            with self.jobs_lock:
+                self.jobs[job_id] = job
+                self._index_finished(job)
+            self._mark_dirty(job_id, urgent=True)
+            return job_id
         
-        # Create new job
+        # Create new job; it starts once the jobs ahead of it have run
+        wait_s = self._queue_wait_s()
+        run_s = self.eta.remaining("prepare", request.llm_provider, request.framework, size_bucket(request.content))
+        estimated_completion = now + timedelta(seconds=wait_s + run_s)
         job = JobStatusResponse(
             job_id=job_id,
             status=JobStatus.PENDING,
             progress=0,
             message="Job created, waiting to start",
+            provider=request.llm_provider,
+            framework=request.framework,
             created_at=now,
             updated_at=now,
-            estimated_completion=now + timedelta(minutes=5)  # Rough estimate
+            estimated_completion=estimated_completion
         )
         
         with self.jobs_lock:
             self.jobs[job_id] = job
+            self.next_change[job_id] = (now + timedelta(seconds=wait_s), wait_s)
+            self.submitted_eta[job_id] = estimated_completion
+        self._mark_dirty(job_id, urgent=True)
         
-        # Start async processing
-        asyncio.create_task(self._process_job(job_id, request, cache_key))
+        # Queue, and start right away if a worker slot is free
+        self.queue.push(job_id, request.priority, (request, cache_key))
+        self._dispatch()
         
         return job_id
     
+    def _queue_wait_s(self) -> float:
+        """Expected wait before a job submitted now starts, from the work ahead of it."""
+        with self.jobs_lock:
+            running = len(self.tasks)
+        waiting = len(self.queue)
+        if running + waiting < settings.job_workers:
+            return 0.0
+        # Jobs ahead of it run in waves of job_workers
+        waves = math.ceil((waiting + 1) / settings.job_workers)
+        return waves * self.eta.remaining("prepare", None, None, None)
+    
+    def _enter_stage(self, job_id: str, stage: str, request: AsyncThreatModelRequest,
+                     provider: Optional[str] = None) -> datetime:
+        """Note that a job entered ``stage``; returns its revised completion estimate."""
+        provider = provider or request.llm_provider
+        bucket = size_bucket(request.content)
+        stage_s = self.eta.estimate(stage, provider, request.framework, bucket)
+        now = datetime.now()
+        with self.jobs_lock:
+            self.next_change[job_id] = (now + timedelta(seconds=stage_s), stage_s)
+        return now + timedelta(seconds=self.eta.remaining(stage, provider, request.framework, bucket))
+    
+    def _lookup_cached(self, cache_key: str) -> Optional[CacheEntry]:
+        """Look a result up in memory.
+        
+        With a disk tier, a memory miss is counted once the job has
+        checked the disk (``_lookup_disk``) off the event loop.
+        """
+        entry = self.cache.lookup(cache_key)
+        if entry is not None:
+            JOB_CACHE_LOOKUPS.inc(result="hit")
+        elif self.disk_cache is None:
+            JOB_CACHE_LOOKUPS.inc(result="miss")
+        return entry
+    
+    def _lookup_disk(self, cache_key: str) -> Optional[CacheEntry]:
+        """Look a memory miss up on disk, promoting a hit to memory. Blocks on the file."""
+        entry = None
+        try:
+            entry = self.disk_cache.get(cache_key)
+        except SQLAlchemyError:
+            logger.exception("Reading the disk result cache failed")
+        if entry is None:
+            JOB_CACHE_LOOKUPS.inc(result="miss")
+            return None
+        JOB_CACHE_LOOKUPS.inc(result="disk_hit")
+        entry.access_count += 1
+        entry.last_accessed = datetime.now()
+        self.cache.put(cache_key, entry)
+        return entry
+    
+    async def _store_cached(self, cache_key: str, entry: CacheEntry) -> None:
+        """Write a result to every cache tier, the disk from a worker thread."""
+        self.cache.put(cache_key, entry)
+        if self.disk_cache is not None:
+            try:
+                await asyncio.to_thread(self.disk_cache.put, cache_key, entry)
+            except SQLAlchemyError:
+                logger.exception("Writing the disk result cache failed")
+    
+    def _dispatch(self) -> None:
+        """Start queued jobs, best first, while fewer than ``job_workers`` are running.
+        
+        Runs on submission and whenever a job's task finishes, so there are
+        no long-lived worker tasks tied to one event loop.
+        """
+        while True:
+            with self.jobs_lock:
+                # Tasks on a closed event loop can never finish and hold no provider call
+                for job_id, task in list(self.tasks.items()):
+                    if task.done() or task.get_loop().is_closed():
+                        del self.tasks[job_id]
+                if len(self.tasks) >= settings.job_workers:
+                    return
+                entry = self.queue.pop()
+                if entry is None:
+                    return
+                job_id, (request, cache_key) = entry
+                job = self.jobs.get(job_id)
+                if job is None or job.status != JobStatus.PENDING:
+                    continue
+                # Registered under the lock so a concurrent cancel always finds the task
+                task = asyncio.create_task(self._process_job(job_id, request, cache_key))
+                self.tasks[job_id] = task
+            task.add_done_callback(lambda done, job_id=job_id: self._finish_task(job_id, done))
+    
+    def _finish_task(self, job_id: str, task: asyncio.Task) -> None:
+        with self.jobs_lock:
+            if self.tasks.get(job_id) is task:
+                del self.tasks[job_id]
+        self._dispatch()
+    
+    def _mark_dirty(self, job_id: str, urgent: bool = False) -> None:
+        """Queue a job for writing to the store by the writer thread.
+        
+        Urgent changes (creation and final states) wake the writer at once;
+        others are written by its next flush, at most
+        ``job_store_flush_interval_s`` later, together with everything else
+        that changed meanwhile.
+        """
+        with self.jobs_lock:
+            self.dirty.add(job_id)
+            if self.writer is None:
+                self.writer = Thread(target=self._write_behind, name="job-store-writer", daemon=True)
+                self.writer.start()
+        if urgent:
+            self.flush_requested.set()
+    
+    def _write_behind(self) -> None:
+        """Writer thread: flush when woken, and every interval while jobs are active.
+        
+        Active jobs keep it polling so cancellations made through other
+        worker processes are noticed.
+        """
+        while True:
+            self.flush_requested.wait(settings.job_store_flush_interval_s)
+            self.flush_requested.clear()
+            with self.jobs_lock:
+                idle = not self.dirty and not self.tasks and len(self.queue) == 0
+            if not idle:
+                self.flush()
+    
+    def flush(self) -> None:
+        """Write every changed job to the store in one batch.
+        
+        Also picks up cancellations made through other worker processes
+        for jobs this process is running or has queued. Blocks on the
+        database, so it runs on the writer thread or another worker thread.
+        """
+        with self.flush_lock:
+            with self.jobs_lock:
+                job_ids, self.dirty = self.dirty, set()
+                jobs = [self.jobs[job_id].model_copy() for job_id in job_ids if job_id in self.jobs]
+                active = list(self.tasks) + self.queue.job_ids()
+            try:
+                self.store.save(jobs)
+                remote = self.store.statuses(active)
+            except SQLAlchemyError as e:
+                # Keep serving from memory; the changes are retried with the next flush
+                logger.error(f"Failed to write {len(jobs)} jobs to the job store: {e}")
+                with self.jobs_lock:
+                    self.dirty.update(job_ids)
+                return
+        for job_id, status in remote.items():
+            if status == JobStatus.CANCELLED:
+                self.cancel_job(job_id)
+    
+    @staticmethod
+    def _cancel_task(task: asyncio.Task) -> None:
+        """Cancel a task from any thread or event loop."""
+        try:
+            task.get_loop().call_soon_threadsafe(task.cancel)
+        except RuntimeError:
+            # Its loop is already closed, so the task can no longer run
+            pass
+    
     async def _process_job(self, job_id: str, request: AsyncThreatModelRequest, cache_key: str):
         """Process a threat model generation job asynchronously."""
+        started = time.monotonic()
         try:
+            # A memory miss may still be on disk, which is read off the event loop
+            if self.disk_cache is not None:
+                cached_entry = await asyncio.to_thread(self._lookup_disk, cache_key)
+                if cached_entry is not None:
+                    self._update_job_status(job_id, JobStatus.COMPLETED, 100, "Result retrieved from cache",
+                                            result=cached_entry.threat_model)
+                    return
+            
             # Update status to processing
-            self._update_job_status(job_id, JobStatus.PROCESSING, 10, "Starting threat model generation...")
+            self._update_job_status(job_id, JobStatus.PROCESSING, 10, "Starting threat model generation...",
+                                    estimated_completion=self._enter_stage(job_id, "prepare", request))
             
             # Get available providers
             import os
@@ -224,12 +352,15 @@ Ensure your analysis is technically accurate, actionable, and provides clear gui
                 if not available_providers:
                     raise Exception("No LLM providers configured")
             
-            # Select provider
-            provider = request.llm_provider or available_providers[0]
-            if provider not in available_providers:
-                raise Exception(f"Provider {provider} not available")
+            # Select providers; unpinned requests may hedge across all of them
+            if request.llm_provider:
+                if request.llm_provider not in available_providers:
+                    raise Exception(f"Provider {request.llm_provider} not available")
+                providers = [request.llm_provider]
+            else:
+                providers = list(available_providers)
             
-            self._update_job_status(job_id, JobStatus.PROCESSING, 20, f"Using {provider} provider...")
+            self._update_job_status(job_id, JobStatus.PROCESSING, 20, f"Using {providers[0]} provider...")
             
             # Get file content if provided
             file_content = self._get_file_content(request.file_id)
@@ -240,14 +371,17 @@ Ensure your analysis is technically accurate, actionable, and provides clear gui
             prompt = self._build_prompt(request, file_content)
             self._update_job_status(job_id, JobStatus.PROCESSING, 40, "Building analysis prompt...")
             
-            # Create service and generate
-            service = LLMFactory.create(provider)
-            self._update_job_status(job_id, JobStatus.PROCESSING, 50, "Generating threat model with AI...")
+            # Generate, hedging across providers when enabled
+            generation_started = time.monotonic()
+            self._update_job_status(job_id, JobStatus.PROCESSING, 50, "Generating threat model with AI...",
+                                    estimated_completion=self._enter_stage(job_id, "generate", request))
             
-            threat_model = await service.generate(prompt)
+            threat_model, provider, service = await hedged_generator.generate(prompt, providers)
             cost = service.estimate_cost(prompt)
             
-            self._update_job_status(job_id, JobStatus.PROCESSING, 80, "Finalizing threat model...")
+            generation_finished = time.monotonic()
+            self._update_job_status(job_id, JobStatus.PROCESSING, 80, "Finalizing threat model...",
+                                    estimated_completion=self._enter_stage(job_id, "finalize", request, provider))
             
             # Create result
             result = ThreatModelResponse(
@@ -260,63 +394,258 @@ Ensure your analysis is technically accurate, actionable, and provides clear gui
             )
             
             # Cache the result
-            with self.cache_lock:
-                self.cache[cache_key] = CacheEntry(
-                    cache_key=cache_key,
-                    threat_model=result,
-                    created_at=datetime.now(),
-                    access_count=1,
-                    last_accessed=datetime.now()
-                )
+            if self._is_cancelled(job_id):
+                return
+            now = datetime.now()
+            await self._store_cached(cache_key, CacheEntry(
+                cache_key=cache_key,
+                threat_model=result,
+                created_at=now,
+                access_count=1,
+                last_accessed=now,
+                expires_at=now + timedelta(seconds=settings.result_cache_ttl_s)
+            ))
             
-            # Complete the job
+            # Complete the job, and learn how long its stages took
             self._update_job_status(job_id, JobStatus.COMPLETED, 100, "Threat model generation completed", result=result)
+            bucket = size_bucket(request.content)
+            for stage, duration_s in (
+                ("prepare", generation_started - started),
+                ("generate", generation_finished - generation_started),
+                ("finalize", time.monotonic() - generation_finished),
+            ):
+                self.eta.record(stage, provider, request.framework, bucket, duration_s)
             
+        except asyncio.CancelledError:
+            # Aborting the generation releases its provider slot; record why if nobody has
+            self._update_job_status(job_id, JobStatus.CANCELLED, 0, "Job cancelled")
+            raise
         except Exception as e:
             logger.exception(f"Error processing job {job_id}: {e}")
             self._update_job_status(job_id, JobStatus.FAILED, 0, f"Job failed: {str(e)}", error=str(e))
     
     def _update_job_status(self, job_id: str, status: JobStatus, progress: int, message: str, 
-                          result: Optional[ThreatModelResponse] = None, error: Optional[str] = None):
-        """Update job status and progress."""
+                          result: Optional[ThreatModelResponse] = None, error: Optional[str] = None,
+                          estimated_completion: Optional[datetime] = None):
+        """Update job status and progress. A job in a final status is never changed."""
         with self.jobs_lock:
-            if job_id in self.jobs:
-                job = self.jobs[job_id]
-                job.status = status
-                job.progress = progress
-                job.message = message
-                job.updated_at = datetime.now()
-                if result:
-                    job.result = result
-                if error:
-                    job.error = error
+            job = self.jobs.get(job_id)
+            if job is None or job.status in FINAL_STATUSES:
+                return
+            job.status = status
+            job.progress = progress
+            job.message = message
+            job.updated_at = datetime.now()
+            job.version += 1
+            if result:
+                job.result = result
+                job.provider = result.provider_used
+            if error:
+                job.error = error
+            if estimated_completion:
+                job.estimated_completion = estimated_completion
+            if status in FINAL_STATUSES:
+                self._index_finished(job)
+                self._forget_progress(job_id, completed=status == JobStatus.COMPLETED)
+            snapshot = job.model_copy()
+        self.events.publish(snapshot)
+        self._mark_dirty(job_id, urgent=status in FINAL_STATUSES)
+    
+    def _forget_progress(self, job_id: str, completed: bool = False) -> None:
+        """Drop the progress tracking of a finished job. Call with ``jobs_lock`` held."""
+        self.next_change.pop(job_id, None)
+        promised = self.submitted_eta.pop(job_id, None)
+        if completed and promised is not None:
+            JOB_ETA_ERROR.observe(abs((datetime.now() - promised).total_seconds()))
+    
+    def _index_finished(self, job: JobStatusResponse) -> None:
+        """Record a job that reached a final status. Call with ``jobs_lock`` held."""
+        heapq.heappush(self.finished_index, (job.created_at, job.job_id))
     
     def get_job_status(self, job_id: str) -> Optional[JobStatusResponse]:
-        """Get the status of a job."""
+        """Get the status of a job, with its current queue position if it is waiting.
+        
+        Jobs created by another worker process are read from the store, so
+        on the event loop use ``fetch_job_status`` instead.
+        """
+        job = self._local_job_status(job_id)
+        return job if job is not None else self._stored_job_status(job_id)
+    
+    async def fetch_job_status(self, job_id: str) -> Optional[JobStatusResponse]:
+        """``get_job_status`` for the event loop: a store read runs on a worker thread."""
+        job = self._local_job_status(job_id)
+        return job if job is not None else await asyncio.to_thread(self._stored_job_status, job_id)
+    
+    def _local_job_status(self, job_id: str) -> Optional[JobStatusResponse]:
+        """A job this process owns, with its queue position and polling hint refreshed."""
+        now = datetime.now()
+        with self.jobs_lock:
+            job = self.jobs.get(job_id)
+            if job is not None:
+                job.queue_position = self.queue.position(job_id) if job.status == JobStatus.PENDING else None
+                change = self.next_change.get(job_id)
+                job.retry_after_ms = (
+                    retry_after_ms((change[0] - now).total_seconds(), change[1]) if change is not None else None
+                )
+            return job
+    
+    def _stored_job_status(self, job_id: str) -> Optional[JobStatusResponse]:
+        """A job owned by another worker process, read from the store."""
+        now = datetime.now()
+        job = self.store.get(job_id)
+        if job is not None:
+            # Only the owning process knows the queue and the stages
+            job.queue_position = None
+            job.retry_after_ms = None
+            if job.status not in FINAL_STATUSES and job.estimated_completion is not None:
+                job.retry_after_ms = retry_after_ms(
+                    (job.estimated_completion - now).total_seconds(), settings.job_eta_default_s
+                )
+        return job
+    
+    async def wait_for_change(self, job_id: str, version: int, timeout: float) -> Optional[JobStatusResponse]:
+        """Wait until a job's version differs from ``version`` or ``timeout`` seconds pass.
+        
+        Wakes on the job's published changes rather than polling; a job
+        owned by another worker process is re-read from the store every
+        ``job_store_flush_interval_s`` instead.
+        
+        Returns:
+            The job as it is when the wait ends, or None if it does not exist.
+        """
+        deadline = time.monotonic() + timeout
+        with self.events.subscribe(job_id) as subscription:
+            job = await self.fetch_job_status(job_id)
+            owned = job_id in self.jobs
+            while job is not None and job.version == version:
+                left = deadline - time.monotonic()
+                if left <= 0:
+                    break
+                await subscription.get(timeout=left if owned else min(left, settings.job_store_flush_interval_s))
+                job = await self.fetch_job_status(job_id)
+        return job
+    
+    def _is_cancelled(self, job_id: str) -> bool:
+        with self.jobs_lock:
+            job = self.jobs.get(job_id)
+            return job is not None and job.status == JobStatus.CANCELLED
+    
+    def cancel_job(self, job_id: str, message: str = "Job cancelled by user") -> bool:
+        """Cancel a pending or processing job.
+        
+        The job's task is cancelled too, which aborts its in-flight provider
+        request and frees the admission slot it holds.
+        """
         with self.jobs_lock:
-            return self.jobs.get(job_id)
+            job = self.jobs.get(job_id)
+            if job is not None:
+                if job.status not in [JobStatus.PENDING, JobStatus.PROCESSING]:
+                    return False
+                job.status = JobStatus.CANCELLED
+                job.message = message
+                job.updated_at = datetime.now()
+                job.version += 1
+                job.queue_position = None
+                task = self.tasks.pop(job_id, None)
+                self._index_finished(job)
+                self._forget_progress(job_id)
+                snapshot = job.model_copy()
+        if job is None:
+            return self._cancel_remote_job(job_id, message)
+        self.queue.remove(job_id)
+        if task is not None:
+            self._cancel_task(task)
+        self.events.publish(snapshot)
+        self._mark_dirty(job_id, urgent=True)
+        return True
+    
+    def _cancel_remote_job(self, job_id: str, message: str) -> bool:
+        """Cancel a job owned by another worker process through the store.
+        
+        The owner stops the job when its next flush sees the cancellation.
+        """
+        job = self.store.get(job_id)
+        if job is None or job.status not in [JobStatus.PENDING, JobStatus.PROCESSING]:
+            return False
+        job.status = JobStatus.CANCELLED
+        job.message = message
+        job.updated_at = datetime.now()
+        job.version += 1
+        job.queue_position = None
+        self.store.save([job])
+        return True
     
-    def cancel_job(self, job_id: str) -> bool:
-        """Cancel a pending or processing job."""
+    async def shutdown(self, grace_s: float) -> None:
+        """Let running jobs finish for up to ``grace_s`` seconds, then cancel the rest.
+        
+        Queued jobs are cancelled without starting. Returns once
+        every job task on this event loop has finished, so no provider call
+        outlives the shutdown.
+        """
+        loop = asyncio.get_running_loop()
+        for job_id in self.queue.drain():
+            self.cancel_job(job_id, message="Job cancelled by server shutdown")
         with self.jobs_lock:
-            if job_id in self.jobs:
-                job = self.jobs[job_id]
-                if job.status in [JobStatus.PENDING, JobStatus.PROCESSING]:
-                    job.status = JobStatus.CANCELLED
-                    job.message = "Job cancelled by user"
-                    job.updated_at = datetime.now()
-                    return True
-        return False
-    
-    def list_jobs(self, limit: int = 50) -> List[JobStatusResponse]:
-        """List recent jobs."""
+            tasks = dict(self.tasks)
+        local = {job_id: task for job_id, task in tasks.items() if task.get_loop() is loop}
+        if local and grace_s > 0:
+            logger.info(f"Waiting up to {grace_s}s for {len(local)} running jobs")
+            await asyncio.wait(local.values(), timeout=grace_s)
+        for job_id, task in tasks.items():
+            if not task.done():
+                self.cancel_job(job_id, message="Job cancelled by server shutdown")
+        remaining = [task for task in local.values() if not task.done()]
+        if remaining:
+            await asyncio.gather(*remaining, return_exceptions=True)
+        await asyncio.to_thread(self.flush)
+    
+    def list_jobs(
+        self,
+        limit: int = 50,
+        before: Optional[Tuple[datetime, str]] = None,
+        statuses: Optional[List[JobStatus]] = None,
+        provider: Optional[str] = None,
+        include_result: bool = True,
+    ) -> List[JobStatusResponse]:
+        """List jobs of all worker processes, newest first.
+        
+        The page is read from the store's ``created_at`` index once this
+        process's pending changes are flushed, so its cost depends on
+        ``limit`` rather than on how many jobs exist. Jobs owned by this
+        process are served from their live copies. Blocks on the
+        database, so call it from a worker thread.
+        
+        Args:
+            limit: Maximum number of jobs to return.
+            before: ``(created_at, job_id)`` of the last job already listed.
+            statuses: Only list jobs in one of these statuses.
+            provider: Only list jobs for this provider.
+            include_result: Include each job's result; summaries leave it out.
+        """
+        self.flush()
+        jobs = self.store.list(limit, before=before, statuses=statuses, provider=provider)
         with self.jobs_lock:
-            jobs = list(self.jobs.values())
-            jobs.sort(key=lambda x: x.created_at, reverse=True)
-            return jobs[:limit]
+            for index, job in enumerate(jobs):
+                local = self.jobs.get(job.job_id)
+                if local is None:
+                    # Only the owning process knows the queue
+                    job.queue_position = None
+                    continue
+                jobs[index] = local = local.model_copy()
+                local.queue_position = (
+                    self.queue.position(local.job_id) if local.status == JobStatus.PENDING else None
+                )
+        if not include_result:
+            for job in jobs:
+                job.result = None
+        return jobs
     
     def cleanup_old_jobs(self, days: int = 7):
-        """Clean up old completed/failed jobs."""
+        """Clean up old completed/failed jobs.
+        
+        Scans every job, so it honours any cutoff; the janitor's periodic
+        sweeps use the cheaper ``sweep_finished_jobs``.
+        """
         cutoff = datetime.now() - timedelta(days=days)
         with self.jobs_lock:
             jobs_to_remove = [
@@ -326,17 +655,82 @@ Ensure your analysis is technically accurate, actionable, and provides clear gui
             ]
             for job_id in jobs_to_remove:
                 del self.jobs[job_id]
+        # This process's copies are authoritative for its own jobs
+        self.store.delete(jobs_to_remove)
+        self.store.delete_finished_before(cutoff)
+    
+    def sweep_finished_jobs(self) -> Tuple[int, int]:
+        """Drop finished jobs older than ``job_retention_s``, visiting only those.
+        
+        Returns:
+            Tuple of (jobs removed from memory, approximate bytes reclaimed).
+        """
+        cutoff = datetime.now() - timedelta(seconds=settings.job_retention_s)
+        removed: List[str] = []
+        reclaimed = 0
+        with self.jobs_lock:
+            while self.finished_index and self.finished_index[0][0] < cutoff:
+                _, job_id = heapq.heappop(self.finished_index)
+                job = self.jobs.pop(job_id, None)
+                if job is None:
+                    # Already removed by cleanup_old_jobs
+                    continue
+                removed.append(job_id)
+                reclaimed += len(job.model_dump_json())
+        self.store.delete(removed)
+        # Indexed by (status, created_at), so this too reads only old rows
+        self.store.delete_finished_before(cutoff)
+        return len(removed), reclaimed
     
     def cleanup_old_cache(self, days: int = 30):
-        """Clean up old cache entries."""
+        """Clean up old and expired cache entries.
+        
+        Scans every entry; the janitor's periodic sweeps use ``cache.purge_expired``.
+        """
         cutoff = datetime.now() - timedelta(days=days)
-        with self.cache_lock:
-            cache_to_remove = [
-                cache_key for cache_key, entry in self.cache.items()
-                if entry.created_at < cutoff
-            ]
-            for cache_key in cache_to_remove:
-                del self.cache[cache_key]
+        self.cache.remove_where(lambda entry: entry.created_at < cutoff)
+        self.cache.purge_expired()
+        if self.disk_cache is not None:
+            self.disk_cache.purge(max_bytes=settings.result_cache_disk_max_bytes, older_than=cutoff)
+    
+    def status_counts(self) -> Dict[JobStatus, int]:
+        """Count jobs in each status."""
+        counts = {status: 0 for status in JobStatus}
+        with self.jobs_lock:
+            for job in self.jobs.values():
+                counts[job.status] += 1
+        return counts
 
 # Global job service instance
-job_service = JobService() 
\ No newline at end of file
+job_service = JobService()
+
+metrics.gauge_callback(
+    "threatforge_jobs",
+    "Jobs currently held by the job service, by status",
+    ("status",),
+    lambda: {(status.value,): count for status, count in job_service.status_counts().items()},
+)
+metrics.gauge_callback(
+    "threatforge_job_queue_depth",
+    "Jobs waiting in the priority queue for a worker",
+    (),
+    lambda: {(): len(job_service.queue)},
+)
+metrics.gauge_callback(
+    "threatforge_job_subscribers",
+    "Open push subscriptions to job status changes",
+    (),
+    lambda: {(): job_service.events.subscriber_count()},
+)
+metrics.gauge_callback(
+    "threatforge_job_cache_entries",
+    "Results held in the job result cache",
+    (),
+    lambda: {(): len(job_service.cache)},
+)
+metrics.gauge_callback(
+    "threatforge_job_cache_bytes",
+    "Estimated memory held by the job result cache",
+    (),
+    lambda: {(): job_service.cache.bytes},
+)
@@ -0,0 +1,366 @@
+"""SQL-backed store that shares async job and scenario batch state between worker processes."""
+
+import logging
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timedelta
+from threading import Lock
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import (
+    Column, DateTime, Index, Integer, MetaData, String, Table, Text, and_, create_engine, delete, event, func,
+    inspect, or_, select, text, update
+)
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.pool import StaticPool
+
+from app.schemas.scenario import BatchScenarioResult, PendingProviderBatch, ScenarioBatchState, ScenarioBatchStatus
+from app.schemas.threat_model import JobStatus, JobStatusResponse
+
+logger = logging.getLogger("job_store")
+
+FINAL_STATUSES = (JobStatus.COMPLETED, JobStatus.FAILED, JobStatus.CANCELLED)
+
+metadata = MetaData()
+
+jobs_table = Table(
+    "jobs",
+    metadata,
+    Column("job_id", String(64), primary_key=True),
+    Column("status", String(16), nullable=False),
+    Column("created_at", DateTime, nullable=False),
+    Column("updated_at", DateTime, nullable=False),
+    Column("provider", String(32), nullable=True),
+    Column("data", Text, nullable=False),  # JobStatusResponse as JSON
+    Index("ix_jobs_status_created_at", "status", "created_at"),
+    Index("ix_jobs_created_at", "created_at"),
+    Index("ix_jobs_provider_created_at", "provider", "created_at"),
+)
+
+# A scenario batch submitted to provider batch APIs
+batches_table = Table(
+    "scenario_batches",
+    metadata,
+    Column("batch_id", String(64), primary_key=True),
+    Column("total", Integer, nullable=False),
+    Column("created_at", DateTime, nullable=False),
+    Column("checked_at", DateTime, nullable=True),  # Last time a worker polled its providers
+    Index("ix_scenario_batches_created_at", "created_at"),
+)
+
+# Finished items of a batch, one row each so concurrent collectors never overwrite each other
+batch_results_table = Table(
+    "scenario_batch_results",
+    metadata,
+    Column("batch_id", String(64), primary_key=True),
+    Column("item_index", Integer, primary_key=True),
+    Column("data", Text, nullable=False),  # BatchScenarioResult as JSON
+)
+
+# Provider batch jobs whose results have not been collected yet
+provider_batches_table = Table(
+    "scenario_provider_batches",
+    metadata,
+    Column("provider_batch_id", String(128), primary_key=True),
+    Column("batch_id", String(64), nullable=False),
+    Column("data", Text, nullable=False),  # PendingProviderBatch as JSON
+    Index("ix_scenario_provider_batches_batch_id", "batch_id"),
+)
+
+_UPSERT_DIALECTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
+MEMORY_URLS = ("sqlite://", "sqlite:///:memory:")
+
+
+def _configure_sqlite(dbapi_connection, _record) -> None:
+    cursor = dbapi_connection.cursor()
+    # WAL lets one worker write while others read; NORMAL sync is safe with WAL
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA busy_timeout=5000")
+    cursor.close()
+
+
+def _add_missing_columns(engine: Engine) -> None:
+    """Bring a jobs table created by an older release up to date.
+
+    Columns added since are nullable, so adding them is enough; rows
+    written before simply do not match filters on them.
+    """
+    existing = {column["name"] for column in inspect(engine).get_columns(jobs_table.name)}
+    missing = [column for column in jobs_table.columns if column.name not in existing]
+    if not missing:
+        return
+    with engine.begin() as connection:
+        for column in missing:
+            column_type = column.type.compile(dialect=engine.dialect)
+            connection.execute(text(f"ALTER TABLE {jobs_table.name} ADD COLUMN {column.name} {column_type}"))
+    for index in jobs_table.indexes:
+        index.create(engine, checkfirst=True)
+
+
+def create_store_engine(url: str) -> Engine:
+    """Create an engine for a store shared by worker processes, using WAL on SQLite."""
+    if not url.startswith("sqlite"):
+        return create_engine(url, pool_pre_ping=True)
+    options = {"connect_args": {"check_same_thread": False}}
+    if url in MEMORY_URLS:
+        # One shared connection, or every checkout would see an empty database
+        options["poolclass"] = StaticPool
+    engine = create_engine(url, **options)
+    event.listen(engine, "connect", _configure_sqlite)
+    return engine
+
+
+class JobStore:
+    """Persists job status rows so any worker process can serve a poll.
+
+    Rows hold the full ``JobStatusResponse`` as JSON next to indexed
+    ``status``, ``provider`` and ``created_at`` columns used for listing
+    and cleanup.
+    A row in a final status is never overwritten, so a worker that lost
+    a race cannot undo a cancellation made through another worker.
+
+    Scenario batches submitted to provider batch APIs live here too, so a
+    poll can land on any worker: the batch row, one row per finished item
+    and one per provider job still running.
+
+    The engine is created on first use so importing the module does not
+    touch the database. Methods block on the database and may be called
+    from any thread; the job service keeps them off the event loop.
+    """
+
+    def __init__(self, url: str):
+        self.url = url
+        self._engine: Optional[Engine] = None
+        self._lock = Lock()
+        # An in-memory database is a single shared connection, so threads take turns
+        self._memory_lock: Optional[Lock] = Lock() if url in MEMORY_URLS else None
+
+    @property
+    def engine(self) -> Engine:
+        with self._lock:
+            if self._engine is None:
+                self._engine = create_store_engine(self.url)
+                metadata.create_all(self._engine)
+                _add_missing_columns(self._engine)
+            return self._engine
+
+    @contextmanager
+    def _connect(self, write: bool = False) -> Iterator[Connection]:
+        """A connection, inside a transaction that commits on exit if ``write``."""
+        engine = self.engine
+        with self._memory_lock or nullcontext():
+            with (engine.begin() if write else engine.connect()) as connection:
+                yield connection
+
+    @staticmethod
+    def _row(job: JobStatusResponse) -> dict:
+        return {
+            "job_id": job.job_id,
+            "status": job.status.value,
+            "created_at": job.created_at,
+            "updated_at": job.updated_at,
+            "provider": job.provider,
+            "data": job.model_dump_json(),
+        }
+
+    @staticmethod
+    def _job(data: str) -> JobStatusResponse:
+        return JobStatusResponse.model_validate_json(data)
+
+    def _insert(self):
+        insert = _UPSERT_DIALECTS.get(self.engine.dialect.name)
+        if insert is None:
+            raise ValueError(f"Job store does not support the {self.engine.dialect.name} dialect")
+        return insert
+
+    def save(self, jobs: Iterable[JobStatusResponse]) -> None:
+        """Insert or update jobs in one transaction, skipping rows already final."""
+        rows = [self._row(job) for job in jobs]
+        if not rows:
+            return
+        statement = self._insert()(jobs_table)
+        statement = statement.on_conflict_do_update(
+            index_elements=[jobs_table.c.job_id],
+            set_={name: statement.excluded[name] for name in ("status", "updated_at", "provider", "data")},
+            # Spelled out rather than NOT IN, which cannot be used with executemany
+            where=and_(*(jobs_table.c.status != status.value for status in FINAL_STATUSES)),
+        )
+        with self._connect(write=True) as connection:
+            connection.execute(statement, rows)
+
+    def get(self, job_id: str) -> Optional[JobStatusResponse]:
+        """Load a job by id."""
+        with self._connect() as connection:
+            data = connection.execute(
+                select(jobs_table.c.data).where(jobs_table.c.job_id == job_id)
+            ).scalar_one_or_none()
+        return self._job(data) if data is not None else None
+
+    def statuses(self, job_ids: Sequence[str]) -> dict:
+        """Map each stored job id to its status."""
+        if not job_ids:
+            return {}
+        with self._connect() as connection:
+            rows = connection.execute(
+                select(jobs_table.c.job_id, jobs_table.c.status).where(jobs_table.c.job_id.in_(job_ids))
+            )
+            return {job_id: JobStatus(status) for job_id, status in rows}
+
+    def list(
+        self,
+        limit: int = 50,
+        before: Optional[Tuple[datetime, str]] = None,
+        statuses: Optional[Sequence[JobStatus]] = None,
+        provider: Optional[str] = None,
+    ) -> List[JobStatusResponse]:
+        """Most recently created jobs first, one page at a time.
+
+        Args:
+            limit: Maximum number of jobs to return.
+            before: ``(created_at, job_id)`` of the last job of the previous
+                page; only jobs ordered after it are returned.
+            statuses: Only return jobs in one of these statuses.
+            provider: Only return jobs for this provider.
+
+        Pages are read through the ``created_at`` indexes with a keyset
+        condition, so a page costs the same however many jobs are stored.
+        """
+        query = select(jobs_table.c.data)
+        if before is not None:
+            created_at, job_id = before
+            query = query.where(or_(
+                jobs_table.c.created_at < created_at,
+                and_(jobs_table.c.created_at == created_at, jobs_table.c.job_id < job_id),
+            ))
+        if statuses:
+            query = query.where(jobs_table.c.status.in_([status.value for status in statuses]))
+        if provider is not None:
+            query = query.where(jobs_table.c.provider == provider)
+        query = query.order_by(jobs_table.c.created_at.desc(), jobs_table.c.job_id.desc()).limit(limit)
+        with self._connect() as connection:
+            return [self._job(data) for data in connection.execute(query).scalars()]
+
+    def delete_finished_before(self, cutoff: datetime) -> int:
+        """Delete jobs in a final status created before ``cutoff``. Returns the number removed."""
+        with self._connect(write=True) as connection:
+            result = connection.execute(
+                delete(jobs_table).where(
+                    jobs_table.c.status.in_([status.value for status in FINAL_STATUSES]),
+                    jobs_table.c.created_at < cutoff,
+                )
+            )
+            return result.rowcount
+
+    def delete(self, job_ids: Sequence[str]) -> None:
+        """Delete jobs by id."""
+        if not job_ids:
+            return
+        with self._connect(write=True) as connection:
+            connection.execute(delete(jobs_table).where(jobs_table.c.job_id.in_(job_ids)))
+
+    def create_batch(self, status: ScenarioBatchStatus, pending: Sequence[PendingProviderBatch]) -> None:
+        """Store a newly submitted scenario batch, its already failed items and its provider jobs."""
+        with self._connect(write=True) as connection:
+            connection.execute(batches_table.insert().values(
+                batch_id=status.batch_id, total=status.total, created_at=status.created_at,
+            ))
+            self._add_batch_results(connection, status.batch_id, status.results)
+            if pending:
+                connection.execute(provider_batches_table.insert(), [
+                    {"provider_batch_id": job.provider_batch_id, "batch_id": status.batch_id,
+                     "data": job.model_dump_json()}
+                    for job in pending
+                ])
+
+    def _add_batch_results(self, connection: Connection, batch_id: str,
+                           results: Sequence[BatchScenarioResult]) -> None:
+        if not results:
+            return
+        # An item collected twice by racing workers keeps its first result
+        statement = self._insert()(batch_results_table).on_conflict_do_nothing()
+        connection.execute(statement, [
+            {"batch_id": batch_id, "item_index": result.index, "data": result.model_dump_json()}
+            for result in results
+        ])
+
+    def get_batch(self, batch_id: str) -> Optional[Tuple[ScenarioBatchStatus, List[PendingProviderBatch]]]:
+        """Load a scenario batch's status and the provider jobs it still waits on."""
+        with self._connect() as connection:
+            row = connection.execute(
+                select(batches_table.c.total, batches_table.c.created_at).where(batches_table.c.batch_id == batch_id)
+            ).first()
+            if row is None:
+                return None
+            results = connection.execute(
+                select(batch_results_table.c.data)
+                .where(batch_results_table.c.batch_id == batch_id)
+                .order_by(batch_results_table.c.item_index)
+            ).scalars().all()
+            pending = connection.execute(
+                select(provider_batches_table.c.data).where(provider_batches_table.c.batch_id == batch_id)
+            ).scalars().all()
+        status = ScenarioBatchStatus(
+            batch_id=batch_id,
+            status=ScenarioBatchState.PROCESSING if pending else ScenarioBatchState.COMPLETED,
+            created_at=row.created_at,
+            total=row.total,
+            results=[BatchScenarioResult.model_validate_json(data) for data in results],
+        )
+        return status, [PendingProviderBatch.model_validate_json(data) for data in pending]
+
+    def claim_batch_check(self, batch_id: str, min_interval_s: float) -> bool:
+        """Claim the next provider poll of a batch.
+
+        Succeeds for one caller at most every ``min_interval_s``, whichever
+        worker it runs in, so providers are not polled once per client poll.
+        """
+        now = datetime.utcnow()
+        with self._connect(write=True) as connection:
+            result = connection.execute(
+                update(batches_table)
+                .where(
+                    batches_table.c.batch_id == batch_id,
+                    or_(
+                        batches_table.c.checked_at.is_(None),
+                        batches_table.c.checked_at <= now - timedelta(seconds=min_interval_s),
+                    ),
+                )
+                .values(checked_at=now)
+            )
+            return result.rowcount == 1
+
+    def finish_provider_batch(self, batch_id: str, provider_batch_id: str,
+                              results: Sequence[BatchScenarioResult]) -> None:
+        """Record the items a provider job produced and stop waiting on it."""
+        with self._connect(write=True) as connection:
+            self._add_batch_results(connection, batch_id, results)
+            connection.execute(
+                delete(provider_batches_table).where(provider_batches_table.c.provider_batch_id == provider_batch_id)
+            )
+
+    def delete_batches_before(self, cutoff: datetime) -> Tuple[int, int]:
+        """Delete scenario batches submitted before ``cutoff``, finished or not.
+
+        Returns:
+            Tuple of (batches removed, bytes of stored results removed).
+        """
+        with self._connect(write=True) as connection:
+            batch_ids = connection.execute(
+                select(batches_table.c.batch_id).where(batches_table.c.created_at < cutoff)
+            ).scalars().all()
+            if not batch_ids:
+                return 0, 0
+            reclaimed = connection.execute(
+                select(func.coalesce(func.sum(func.length(batch_results_table.c.data)), 0))
+                .where(batch_results_table.c.batch_id.in_(batch_ids))
+            ).scalar_one()
+            for table in (batch_results_table, provider_batches_table, batches_table):
+                connection.execute(delete(table).where(table.c.batch_id.in_(batch_ids)))
+            return len(batch_ids), reclaimed
+
+    def clear(self) -> None:
+        """Delete every job."""
+        with self._connect(write=True) as connection:
+            connection.execute(delete(jobs_table))
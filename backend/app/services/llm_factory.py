@@ -5,6 +5,8 @@ from typing import List, Optional
 from app.core.config import settings
 from app.services.anthropic_service import AnthropicService
 from app.services.llm_service import LLMProvider, LLMService, MockLLMService
+from app.services.managed_service import ManagedLLMService
+from app.services.mock_service import SimulatedLLMService
 from app.services.openai_service import OpenAIService
 
 
@@ -15,6 +17,10 @@ class LLMFactory:
     def create(provider: LLMProvider, api_key: Optional[str] = None) -> LLMService:
         """Create an LLM service instance based on provider.
         
+        Services are cheap wrappers; the underlying SDK client and its HTTP
+        connection pool are shared through the process-wide client registry,
+        and calls pass the provider's shared admission controller.
+        
         Args:
             provider: The LLM provider to create a service for.
             api_key: Optional API key override.
@@ -36,9 +42,37 @@ class LLMFactory:
         provider_str = provider.value if hasattr(provider, 'value') else str(provider)
         
         if provider_str == "openai":
-            return OpenAIService(api_key=api_key)
+            return ManagedLLMService(OpenAIService(api_key=api_key), provider_str)
+        elif provider_str == "anthropic":
+            return ManagedLLMService(AnthropicService(api_key=api_key), provider_str)
+        elif provider_str == "mock":
+            return ManagedLLMService(SimulatedLLMService(), provider_str)
+        else:
+            raise ValueError(f"Unknown provider: {provider}")
+    
+    @staticmethod
+    def get_model(provider: LLMProvider) -> str:
+        """Get the model a provider's service generates with.
+        
+        Lets callers price or size requests without building a service.
+        
+        Args:
+            provider: The LLM provider.
+            
+        Returns:
+            The configured model identifier.
+            
+        Raises:
+            ValueError: If the provider is not supported.
+        """
+        provider_str = provider.value if hasattr(provider, 'value') else str(provider)
+        
+        if provider_str == "openai":
+            return settings.openai_model
         elif provider_str == "anthropic":
-            return AnthropicService(api_key=api_key)
+            return settings.anthropic_model
+        elif provider_str == "mock":
+            return "mock"
         else:
             raise ValueError(f"Unknown provider: {provider}")
     
@@ -61,5 +95,8 @@ class LLMFactory:
             available.append(LLMProvider.OPENAI)
         if settings.anthropic_api_key:
             available.append(LLMProvider.ANTHROPIC)
+        # Last, so unpinned requests prefer real providers
+        if settings.mock_provider_enabled:
+            available.append(LLMProvider.MOCK)
         
         return available 
\ No newline at end of file
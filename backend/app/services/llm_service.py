@@ -1,7 +1,17 @@
 """Abstract base classes and enums for LLM services."""
 
+import asyncio
+import uuid
 from abc import ABC, abstractmethod
 from enum import Enum
+from typing import AsyncIterator, Dict, Optional, Union
+
+from app.core.config import settings
+
+LOCAL_BATCH_CONCURRENCY = 4  # Prompts generated at once by the local batch stand-in
+
+# Local stand-in batches by id, kept until their results are fetched or they expire
+_local_batches: Dict[str, asyncio.Task] = {}
 
 
 class LLMProvider(str, Enum):
@@ -12,13 +22,79 @@ class LLMProvider(str, Enum):
     MOCK = "mock"
 
 
+class LLMServiceError(Exception):
+    """Error raised when a call to an LLM provider fails.
+    
+    ``retryable`` marks transient failures (timeouts, connection errors,
+    5xx responses) that may succeed if the call is sent again.
+    """
+    
+    def __init__(self, message: str, provider: Optional[str] = None,
+                 status_code: Optional[int] = None, retryable: bool = False):
+        super().__init__(message)
+        self.provider = provider
+        self.status_code = status_code
+        self.retryable = retryable
+
+
+class LLMRateLimitError(LLMServiceError):
+    """Raised when a provider rejects a call with HTTP 429.
+    
+    ``retry_after`` holds the seconds the provider asked callers to wait,
+    when its response said.
+    """
+    
+    def __init__(self, message: str, provider: Optional[str] = None, status_code: Optional[int] = 429,
+                 retry_after: Optional[float] = None):
+        super().__init__(message, provider=provider, status_code=status_code, retryable=True)
+        self.retry_after = retry_after
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """Seconds from the Retry-After header of a provider SDK error's response, if any."""
+    response = getattr(error, "response", None)
+    value = response.headers.get("retry-after") if response is not None else None
+    try:
+        return max(0.0, float(value)) if value is not None else None
+    except ValueError:
+        # An HTTP date; the caller falls back to its own backoff
+        return None
+
+
+class LLMTimeoutError(LLMServiceError):
+    """Raised when a provider call exceeds its timeout."""
+    
+    def __init__(self, message: str, provider: Optional[str] = None):
+        super().__init__(message, provider=provider, retryable=True)
+
+
+class DeadlineExceededError(LLMServiceError):
+    """Raised when the request's deadline passes before the call completes.
+    
+    Not retryable: the caller has already given up on the answer.
+    """
+    
+    def __init__(self, message: str, provider: Optional[str] = None):
+        super().__init__(message, provider=provider, status_code=504)
+
+
+class CircuitOpenError(LLMServiceError):
+    """Raised without calling the provider while its circuit breaker is open."""
+    
+    def __init__(self, message: str, provider: Optional[str] = None):
+        super().__init__(message, provider=provider, status_code=503)
+
+
 class LLMService(ABC):
     """Abstract base class for LLM providers.
     
     This class defines the interface that all LLM service implementations
-    must follow for text generation and cost estimation.
+    must follow for text generation, streaming and cost estimation.
     """
     
+    # Fraction of the regular price charged for ``submit_batch`` jobs
+    batch_price_factor: float = 1.0
+    
     @abstractmethod
     async def generate(self, prompt: str, max_tokens: int = 2000) -> str:
         """Generate text from a prompt.
@@ -35,6 +111,25 @@ class LLMService(ABC):
         """
         pass
     
+    @abstractmethod
+    def generate_stream(self, prompt: str, max_tokens: int = 2000) -> AsyncIterator[str]:
+        """Generate text from a prompt, yielding chunks as they arrive.
+        
+        Implementations are async generators, so callers iterate with
+        ``async for chunk in service.generate_stream(prompt)``.
+        
+        Args:
+            prompt: The input prompt for text generation.
+            max_tokens: Maximum number of tokens to generate.
+            
+        Yields:
+            Consecutive pieces of the generated text.
+            
+        Raises:
+            Exception: If generation fails.
+        """
+        pass
+    
     @abstractmethod
     def estimate_cost(self, prompt: str, max_tokens: int = 2000) -> float:
         """Estimate cost in USD for the generation.
@@ -47,6 +142,70 @@ class LLMService(ABC):
             Estimated cost in USD.
         """
         pass
+    
+    async def submit_batch(self, prompts: Dict[str, str], max_tokens: int = 2000) -> str:
+        """Submit many prompts as one offline batch without waiting for it.
+        
+        Providers with a batch API override this and ``fetch_batch`` to run
+        every prompt in a single discounted job. This default is a local
+        stand-in that runs ``generate`` a few prompts at a time in a
+        background task, so batch mode also works offline.
+        
+        Args:
+            prompts: Prompts keyed by a caller-chosen id.
+            max_tokens: Maximum number of tokens to generate per prompt.
+            
+        Returns:
+            The id to pass to ``fetch_batch``.
+            
+        Raises:
+            LLMServiceError: If the batch cannot be submitted.
+        """
+        batch_id = f"local-{uuid.uuid4()}"
+        task = asyncio.create_task(self._generate_locally(prompts, max_tokens))
+        task.add_done_callback(lambda _: asyncio.get_running_loop().call_later(
+            settings.batch_retention_s, _local_batches.pop, batch_id, None
+        ))
+        _local_batches[batch_id] = task
+        return batch_id
+    
+    async def fetch_batch(self, batch_id: str) -> Optional[Dict[str, Union[str, LLMServiceError]]]:
+        """Check on a submitted batch.
+        
+        Args:
+            batch_id: The id returned by ``submit_batch``.
+            
+        Returns:
+            None while the batch is running; afterwards the generated text,
+            or the error for that prompt, keyed by the caller's ids. Prompts
+            the provider returned nothing for are missing.
+            
+        Raises:
+            LLMServiceError: If the batch cannot be retrieved.
+        """
+        task = _local_batches.get(batch_id)
+        if task is None:
+            # It may be running in another worker, which a later poll can reach
+            raise LLMServiceError(f"Unknown batch: {batch_id}", retryable=True)
+        if not task.done():
+            return None
+        del _local_batches[batch_id]
+        return task.result()
+    
+    async def _generate_locally(self, prompts: Dict[str, str],
+                                max_tokens: int) -> Dict[str, Union[str, LLMServiceError]]:
+        semaphore = asyncio.Semaphore(LOCAL_BATCH_CONCURRENCY)
+        
+        async def run(custom_id: str, prompt: str):
+            async with semaphore:
+                try:
+                    return custom_id, await self.generate(prompt, max_tokens)
+                except LLMServiceError as e:
+                    return custom_id, e
+                except Exception as e:
+                    return custom_id, LLMServiceError(str(e))
+        
+        return dict(await asyncio.gather(*(run(c, p) for c, p in prompts.items())))
 
 
 class MockLLMService(LLMService):
@@ -54,5 +213,10 @@ class MockLLMService(LLMService):
     async def generate(self, prompt: str, max_tokens: int = 2000) -> str:
         return f"[MOCK SCENARIO GENERATED FOR PROMPT: {prompt[:40]}...]"
 
+    async def generate_stream(self, prompt: str, max_tokens: int = 2000) -> AsyncIterator[str]:
+        words = (await self.generate(prompt, max_tokens)).split(" ")
+        for i, word in enumerate(words):
+            yield word if i == len(words) - 1 else word + " "
+
     def estimate_cost(self, prompt: str, max_tokens: int = 2000) -> float:
         return 0.0
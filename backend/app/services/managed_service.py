@@ -0,0 +1,280 @@
+"""LLM service wrapper that applies process-wide call policies."""
+
+import asyncio
+import logging
+import time
+from typing import AsyncIterator, Dict, Optional, Union
+
+from app.core.config import settings
+from app.schemas.llm import LLMUsage
+from app.services import deadlines, token_counter
+from app.services.admission import admission_controller
+from app.services.llm_service import (
+    DeadlineExceededError, LLMRateLimitError, LLMService, LLMServiceError, LLMTimeoutError
+)
+from app.services.metrics import (
+    LLM_RATE_LIMITED, LLM_REQUEST_DURATION, LLM_TIME_TO_FIRST_TOKEN, LLM_TOKENS_PER_SECOND
+)
+from app.services.resilience import NegativeCache, backoff_delay, resilience
+
+logger = logging.getLogger("managed_service")
+
+
+class ManagedLLMService(LLMService):
+    """Wraps a provider service so every call passes admission control and resilience checks.
+
+    Calls wait for a slot in the provider's adaptive concurrency limit and
+    its request/token per-minute budgets. A call the provider rejects with
+    HTTP 429 shrinks the limit and, after waiting out the provider's
+    Retry-After (or a jittered backoff), is queued again instead of failing.
+
+    Transient failures (timeouts, connection errors, 5xx) are retried with
+    jittered exponential backoff and counted by the provider's circuit
+    breaker; while it is open calls fail fast with ``CircuitOpenError`` so
+    callers can reroute. Each call is bounded by an adaptive timeout derived
+    from the provider's p99 latency. Non-retryable failures are remembered
+    briefly and replayed for identical calls.
+
+    A request deadline set with ``deadlines.deadline_scope`` caps the wait
+    for admission, each attempt and the backoff between retries; once it
+    passes the call fails with ``DeadlineExceededError`` without counting
+    against the provider's health.
+    """
+
+    def __init__(self, service: LLMService, provider: str):
+        self.service = service
+        self.provider = provider
+        self.model = service.model
+        self.admission = admission_controller.for_provider(provider)
+        self.batch_price_factor = service.batch_price_factor
+
+    @property
+    def last_usage(self) -> Optional[LLMUsage]:
+        return getattr(self.service, "last_usage", None)
+
+    def _estimate_tokens(self, prompt: str, max_tokens: int) -> int:
+        return token_counter.count_prompt_tokens(self.model, prompt) + max_tokens
+
+    def _actual_tokens(self) -> Optional[int]:
+        usage = self.last_usage
+        if usage is None:
+            return None
+        return usage.input_tokens + usage.output_tokens + usage.cache_read_tokens + usage.cache_write_tokens
+
+    def _check_negative_cache(self, prompt: str, max_tokens: int) -> str:
+        """Raise a remembered hard failure for this call, or return its cache key."""
+        key = NegativeCache.key(self.provider, self.model, prompt, max_tokens)
+        error = resilience.negative_cache.get(key)
+        if error is not None:
+            logger.info(f"{self.provider} call short-circuited by cached failure: {error}")
+            raise error
+        return key
+
+    def _observe(self, outcome: str, started: float, decode_started: Optional[float] = None) -> None:
+        """Record a call's latency and, on success, its output token rate."""
+        now = time.monotonic()
+        LLM_REQUEST_DURATION.observe(now - started, provider=self.provider, model=self.model, outcome=outcome)
+        if outcome == "rate_limited":
+            LLM_RATE_LIMITED.inc(provider=self.provider)
+        usage = self.last_usage
+        elapsed = now - (decode_started or started)
+        if outcome == "success" and usage is not None and usage.output_tokens and elapsed > 0:
+            LLM_TOKENS_PER_SECOND.observe(usage.output_tokens / elapsed, provider=self.provider, model=self.model)
+
+    def _timeout_error(self, timeout: float) -> LLMTimeoutError:
+        return LLMTimeoutError(f"{self.provider} call timed out after {timeout:.1f}s", provider=self.provider)
+
+    def _deadline_error(self) -> DeadlineExceededError:
+        return DeadlineExceededError(f"Request deadline exceeded waiting for {self.provider}", provider=self.provider)
+
+    async def _acquire(self, tokens: int, breaker):
+        """Wait for an admission permit, for no longer than the request deadline.
+
+        Any failure here gives back the breaker's probe slot, which the
+        caller claimed without sending anything yet.
+        """
+        try:
+            left = deadlines.check(self.provider)
+            if left is None:
+                return await self.admission.acquire(tokens)
+            return await asyncio.wait_for(self.admission.acquire(tokens), left)
+        except asyncio.TimeoutError:
+            breaker.release_probe()
+            raise self._deadline_error()
+        except BaseException:
+            breaker.release_probe()
+            raise
+
+    async def _handle_failure(self, error: LLMServiceError, breaker, failure_key: str, retries: int) -> None:
+        """Record a failed attempt and sleep before the retry, or re-raise it.
+
+        Raises:
+            LLMServiceError: If the failure is not retryable, retries are
+                exhausted or the circuit breaker opened.
+        """
+        if not error.retryable:
+            # The provider answered, so it is healthy; the request itself is bad
+            breaker.release_probe()
+            resilience.negative_cache.put(failure_key, error)
+            raise error
+        breaker.record_failure()
+        if retries >= settings.llm_max_retries or not breaker.allow():
+            raise error
+        delay = backoff_delay(retries)
+        left = deadlines.remaining()
+        if left is not None and delay >= left:
+            # The retry could not finish in time; report the real failure
+            breaker.release_probe()
+            raise error
+        logger.info(f"{self.provider} call failed ({error}), retrying in {delay:.2f}s")
+        await asyncio.sleep(delay)
+
+    async def _pause_for_rate_limit(self, error: LLMRateLimitError, breaker, requeues: int) -> None:
+        """Wait before re-queueing a rate-limited call, or re-raise it.
+
+        Raises:
+            LLMRateLimitError: If requeues are exhausted or the wait would
+                outlast the request deadline.
+        """
+        if requeues >= settings.llm_rate_limit_max_requeues:
+            breaker.release_probe()
+            raise error
+        delay = error.retry_after if error.retry_after is not None else backoff_delay(requeues)
+        left = deadlines.remaining()
+        if left is not None and delay >= left:
+            breaker.release_probe()
+            raise error
+        logger.info(f"{self.provider} call rate limited, re-queueing in {delay:.2f}s (attempt {requeues + 1})")
+        await asyncio.sleep(delay)
+
+    async def generate(self, prompt: str, max_tokens: int = 2000) -> str:
+        failure_key = self._check_negative_cache(prompt, max_tokens)
+        # Fail an expired request before it can claim the breaker's probe slot
+        deadlines.check(self.provider)
+        breaker = resilience.check_breaker(self.provider)
+        latency = resilience.latency(self.provider)
+        tokens = self._estimate_tokens(prompt, max_tokens)
+        retries = requeues = 0
+        while True:
+            timeout = latency.timeout()
+            permit = await self._acquire(tokens, breaker)
+            left = deadlines.remaining()
+            bounded_by_deadline = left is not None and left < timeout
+            if bounded_by_deadline:
+                timeout = max(left, 0.0)
+            started = time.monotonic()
+            try:
+                text = await asyncio.wait_for(self.service.generate(prompt, max_tokens), timeout)
+            except asyncio.TimeoutError:
+                self.admission.release(permit, success=False)
+                self._observe("timeout", started)
+                if bounded_by_deadline:
+                    # The caller's budget ran out, not the provider's patience
+                    breaker.release_probe()
+                    raise self._deadline_error()
+                error = self._timeout_error(timeout)
+            except LLMRateLimitError as e:
+                self.admission.release(permit, rate_limited=True)
+                self._observe("rate_limited", started)
+                await self._pause_for_rate_limit(e, breaker, requeues)
+                requeues += 1
+                continue
+            except LLMServiceError as e:
+                self.admission.release(permit, success=False)
+                self._observe("error", started)
+                error = e
+            except BaseException:
+                self.admission.release(permit, success=False)
+                breaker.release_probe()
+                raise
+            else:
+                self.admission.release(permit, actual_tokens=self._actual_tokens())
+                self._observe("success", started)
+                breaker.record_success()
+                latency.record(time.monotonic() - started)
+                return text
+            await self._handle_failure(error, breaker, failure_key, retries)
+            retries += 1
+
+    async def generate_stream(self, prompt: str, max_tokens: int = 2000) -> AsyncIterator[str]:
+        failure_key = self._check_negative_cache(prompt, max_tokens)
+        # Fail an expired request before it can claim the breaker's probe slot
+        deadlines.check(self.provider)
+        breaker = resilience.check_breaker(self.provider)
+        latency = resilience.latency(self.provider)
+        tokens = self._estimate_tokens(prompt, max_tokens)
+        retries = requeues = 0
+        while True:
+            timeout = latency.timeout()
+            permit = await self._acquire(tokens, breaker)
+            left = deadlines.remaining()
+            bounded_by_deadline = left is not None and left < timeout
+            if bounded_by_deadline:
+                timeout = max(left, 0.0)
+            started = time.monotonic()
+            first_chunk_at = None
+            sent = False
+            stream = self.service.generate_stream(prompt, max_tokens).__aiter__()
+            try:
+                # The timeout bounds the wait for the first chunk; once text
+                # flows the caller sees progress and owns cancellation
+                try:
+                    chunk = await asyncio.wait_for(stream.__anext__(), timeout)
+                except StopAsyncIteration:
+                    chunk = None
+                if chunk is not None:
+                    first_chunk_at = time.monotonic()
+                    LLM_TIME_TO_FIRST_TOKEN.observe(first_chunk_at - started, provider=self.provider, model=self.model)
+                    sent = True
+                    yield chunk
+                    async for chunk in stream:
+                        yield chunk
+            except asyncio.TimeoutError:
+                self.admission.release(permit, success=False)
+                self._observe("timeout", started)
+                if bounded_by_deadline:
+                    # The caller's budget ran out, not the provider's patience
+                    breaker.release_probe()
+                    raise self._deadline_error()
+                error = self._timeout_error(timeout)
+            except LLMRateLimitError as e:
+                self.admission.release(permit, rate_limited=True)
+                self._observe("rate_limited", started)
+                # Only re-queue if nothing was sent to the caller yet
+                if sent:
+                    breaker.release_probe()
+                    raise
+                await self._pause_for_rate_limit(e, breaker, requeues)
+                requeues += 1
+                continue
+            except LLMServiceError as e:
+                self.admission.release(permit, success=False)
+                self._observe("error", started)
+                error = e
+            except BaseException:
+                self.admission.release(permit, success=False)
+                breaker.release_probe()
+                raise
+            else:
+                self.admission.release(permit, actual_tokens=self._actual_tokens())
+                self._observe("success", started, decode_started=first_chunk_at)
+                breaker.record_success()
+                latency.record(time.monotonic() - started)
+                return
+            if sent:
+                # Part of the answer already reached the caller; it cannot be retried
+                breaker.record_failure()
+                raise error
+            await self._handle_failure(error, breaker, failure_key, retries)
+            retries += 1
+
+    async def submit_batch(self, prompts: Dict[str, str], max_tokens: int = 2000) -> str:
+        # Provider batch jobs have their own quotas and run offline, so they
+        # bypass the interactive admission and retry policies
+        return await self.service.submit_batch(prompts, max_tokens)
+
+    async def fetch_batch(self, batch_id: str) -> Optional[Dict[str, Union[str, LLMServiceError]]]:
+        return await self.service.fetch_batch(batch_id)
+
+    def estimate_cost(self, prompt: str, max_tokens: int = 2000) -> float:
+        return self.service.estimate_cost(prompt, max_tokens)
@@ -0,0 +1,268 @@
+"""In-process metrics with Prometheus text exposition."""
+
+import math
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from threading import Lock
+from typing import Callable, Dict, List, Sequence, Tuple
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+LLM_LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0, 300.0)
+TOKENS_PER_SECOND_BUCKETS = (5, 10, 20, 40, 60, 80, 100, 150, 200, 400)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric(ABC):
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.lock = Lock()
+
+    def _key(self, labels: Dict[str, object]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    @abstractmethod
+    def samples(self) -> List[str]:
+        """Return the exposition lines for every label set."""
+        pass
+
+
+class Counter(_Metric):
+    """Monotonically increasing count per label set."""
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self.values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        with self.lock:
+            return self.values.get(self._key(labels), 0)
+
+    def samples(self) -> List[str]:
+        with self.lock:
+            items = sorted(self.values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(v)}" for key, v in items]
+
+
+class Histogram(_Metric):
+    """Bucketed distribution per label set, with cumulative bucket counts on export."""
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [count per bucket (last is +Inf)], sum, count
+        self.series: Dict[LabelValues, list] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self.lock:
+            series = self.series.get(key)
+            if series is None:
+                series = self.series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def count(self, **labels) -> int:
+        with self.lock:
+            series = self.series.get(self._key(labels))
+            return series[2] if series else 0
+
+    def samples(self) -> List[str]:
+        with self.lock:
+            items = sorted((key, (list(s[0]), s[1], s[2])) for key, s in self.series.items())
+        lines = []
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class GaugeCallback(_Metric):
+    """Gauge whose values are read from a callback at scrape time."""
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str],
+                 callback: Callable[[], Dict[LabelValues, float]]):
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback
+
+    def samples(self) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+                for key, value in sorted(self.callback().items())]
+
+
+class MetricsRegistry:
+    """Holds every metric of the process and renders them for scraping."""
+
+    def __init__(self):
+        self.metrics: Dict[str, _Metric] = {}
+        self.lock = Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self.lock:
+            if metric.name in self.metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def gauge_callback(self, name: str, documentation: str, labelnames: Sequence[str],
+                       callback: Callable[[], Dict[LabelValues, float]]) -> GaugeCallback:
+        """Register a gauge computed on scrape. Replaces an existing one with the same name."""
+        gauge = GaugeCallback(name, documentation, labelnames, callback)
+        with self.lock:
+            self.metrics[name] = gauge
+        return gauge
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        with self.lock:
+            metrics = list(self.metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.header())
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+# Global metrics registry instance
+metrics = MetricsRegistry()
+
+HTTP_REQUEST_DURATION = metrics.histogram(
+    "threatforge_http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ("method", "route", "status"),
+)
+LLM_REQUEST_DURATION = metrics.histogram(
+    "threatforge_llm_request_duration_seconds",
+    "LLM provider call latency",
+    ("provider", "model", "outcome"),
+    LLM_LATENCY_BUCKETS,
+)
+LLM_TIME_TO_FIRST_TOKEN = metrics.histogram(
+    "threatforge_llm_time_to_first_token_seconds",
+    "Time from sending a streaming LLM call to its first chunk",
+    ("provider", "model"),
+    LLM_LATENCY_BUCKETS,
+)
+LLM_TOKENS_PER_SECOND = metrics.histogram(
+    "threatforge_llm_tokens_per_second",
+    "Output tokens per second of successful LLM calls",
+    ("provider", "model"),
+    TOKENS_PER_SECOND_BUCKETS,
+)
+LLM_RATE_LIMITED = metrics.counter(
+    "threatforge_llm_rate_limited_total",
+    "LLM calls rejected by the provider with HTTP 429",
+    ("provider",),
+)
+JOB_CACHE_LOOKUPS = metrics.counter(
+    "threatforge_job_cache_lookups_total",
+    "Job result cache lookups by result",
+    ("result",),
+)
+JOB_CACHE_EVICTIONS = metrics.counter(
+    "threatforge_job_cache_evictions_total",
+    "Job result cache entries removed, by reason",
+    ("reason",),
+)
+JOB_ETA_ERROR = metrics.histogram(
+    "threatforge_job_eta_error_seconds",
+    "Absolute error of the completion time estimated when a job was submitted",
+    (),
+    LLM_LATENCY_BUCKETS,
+)
+JANITOR_SWEEP_DURATION = metrics.histogram(
+    "threatforge_janitor_sweep_duration_seconds",
+    "Duration of background maintenance sweeps",
+    ("sweep",),
+)
+JANITOR_REMOVED = metrics.counter(
+    "threatforge_janitor_removed_total",
+    "Expired items removed by background maintenance sweeps",
+    ("sweep",),
+)
+JANITOR_RECLAIMED_BYTES = metrics.counter(
+    "threatforge_janitor_reclaimed_bytes_total",
+    "Memory or disk bytes reclaimed by background maintenance sweeps",
+    ("sweep",),
+)
+UPLOADS = metrics.counter(
+    "threatforge_uploads_total",
+    "Accepted file uploads, including deduplicated ones",
+)
+UPLOAD_BYTES = metrics.counter(
+    "threatforge_upload_bytes_total",
+    "Bytes received in accepted file uploads",
+)
+UPLOAD_DEDUPE_HITS = metrics.counter(
+    "threatforge_upload_dedupe_hits_total",
+    "Uploads whose content matched an already stored file",
+)
+RATE_LIMIT_REJECTIONS = metrics.counter(
+    "threatforge_rate_limit_rejections_total",
+    "Requests rejected by the per-client rate limiter",
+    ("route",),
+)
+
+
+def _job_cache_hit_ratio() -> Dict[LabelValues, float]:
+    hits = JOB_CACHE_LOOKUPS.value(result="hit") + JOB_CACHE_LOOKUPS.value(result="disk_hit")
+    total = hits + JOB_CACHE_LOOKUPS.value(result="miss")
+    return {(): hits / total if total else 0.0}
+
+
+metrics.gauge_callback(
+    "threatforge_job_cache_hit_ratio",
+    "Fraction of job cache lookups that returned a stored result",
+    (),
+    _job_cache_hit_ratio,
+)
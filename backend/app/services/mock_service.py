@@ -0,0 +1,104 @@
+"""Mock LLM provider that simulates realistic latency, output length and failures."""
+
+import asyncio
+import random
+import time
+from typing import AsyncIterator, Optional
+
+from app.core.config import settings
+from app.schemas.llm import LLMUsage
+from app.services import token_counter
+from app.services.llm_service import LLMRateLimitError, LLMService, LLMServiceError
+from app.services.usage_tracker import usage_tracker
+
+STREAM_CHUNK_INTERVAL = 0.05  # Seconds of simulated generation per streamed chunk
+
+VOCABULARY = (
+    "the attacker gains initial access through a phishing email and moves laterally "
+    "across the network while the security team reviews alerts escalates to incident "
+    "response isolates affected hosts restores backups and notifies stakeholders about "
+    "the breach impact on customer data availability integrity and confidentiality"
+).split()
+
+_shared_random = random.Random(settings.mock_seed)
+
+
+class SimulatedLLMService(LLMService):
+    """Mock provider whose timing and failures follow configurable distributions.
+
+    Time-to-first-token and output length are log-normal (set by a median
+    and a sigma), decode speed is normal in tokens per second, and a call
+    fails with HTTP 429 or a retryable 5xx at the configured rates. Nothing
+    leaves the process, so the job pipeline, admission control and caching
+    can be load-tested offline with ``LLMProvider.MOCK``.
+    """
+
+    def __init__(self, seed: Optional[int] = None):
+        self.model = "mock"
+        # Services are created per call, so they share one generator unless seeded explicitly
+        self.random = random.Random(seed) if seed is not None else _shared_random
+        self.last_usage: Optional[LLMUsage] = None
+
+    def _ttft(self) -> float:
+        return self.random.lognormvariate(0, settings.mock_ttft_sigma) * settings.mock_ttft_median_ms / 1000
+
+    def _tokens_per_second(self) -> float:
+        return max(1.0, self.random.gauss(settings.mock_tokens_per_sec_mean, settings.mock_tokens_per_sec_stddev))
+
+    def _output_tokens(self, max_tokens: int) -> int:
+        length = self.random.lognormvariate(0, settings.mock_output_tokens_sigma) * settings.mock_output_tokens_median
+        return max(1, min(max_tokens, int(length)))
+
+    def _maybe_fail(self) -> None:
+        roll = self.random.random()
+        if roll < settings.mock_rate_limit_rate:
+            raise LLMRateLimitError("Mock provider rate limit exceeded", provider="mock")
+        if roll < settings.mock_rate_limit_rate + settings.mock_error_rate:
+            raise LLMServiceError("Mock provider internal error", provider="mock", status_code=500, retryable=True)
+
+    def _words(self, prompt: str, count: int) -> list:
+        # Deterministic per prompt so repeated runs produce comparable output
+        words = ["[MOCK]"] + prompt.split()[:8]
+        words += [VOCABULARY[(i * 7) % len(VOCABULARY)] for i in range(max(0, count - len(words)))]
+        return words[:count]
+
+    def _record_usage(self, prompt: str, output_tokens: int) -> None:
+        self.last_usage = LLMUsage(
+            provider="mock",
+            model=self.model,
+            requests=1,
+            input_tokens=token_counter.count_prompt_tokens(self.model, prompt),
+            output_tokens=output_tokens
+        )
+        usage_tracker.record(self.last_usage)
+
+    async def generate(self, prompt: str, max_tokens: int = 2000) -> str:
+        token_counter.check_context_window(self.model, prompt, max_tokens)
+        self._maybe_fail()
+        output_tokens = self._output_tokens(max_tokens)
+        await asyncio.sleep(self._ttft() + output_tokens / self._tokens_per_second())
+        self._record_usage(prompt, output_tokens)
+        return " ".join(self._words(prompt, output_tokens))
+
+    async def generate_stream(self, prompt: str, max_tokens: int = 2000) -> AsyncIterator[str]:
+        token_counter.check_context_window(self.model, prompt, max_tokens)
+        self._maybe_fail()
+        output_tokens = self._output_tokens(max_tokens)
+        rate = self._tokens_per_second()
+        words = self._words(prompt, output_tokens)
+        await asyncio.sleep(self._ttft())
+        # Emit whatever would have been decoded in each interval, paced by
+        # wall-clock time so slow consumers do not slow the simulated model
+        started = time.monotonic()
+        sent = 0
+        while sent < len(words):
+            due = min(len(words), max(sent + 1, int((time.monotonic() - started) * rate)))
+            chunk = " ".join(words[sent:due])
+            yield chunk if sent == 0 else " " + chunk
+            sent = due
+            if sent < len(words):
+                await asyncio.sleep(STREAM_CHUNK_INTERVAL)
+        self._record_usage(prompt, output_tokens)
+
+    def estimate_cost(self, prompt: str, max_tokens: int = 2000) -> float:
+        return token_counter.estimate_cost(self.model, prompt, max_tokens)
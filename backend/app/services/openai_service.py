@@ -1,54 +1,149 @@
-from openai import AsyncOpenAI
-from typing import Optional
-from app.services.llm_service import LLMService
+import json
+from typing import AsyncIterator, Dict, Optional, Union
+import openai
+from openai.types import CompletionUsage
+from app.services.llm_service import (
+    LLMRateLimitError, LLMService, LLMServiceError, LLMTimeoutError, retry_after_seconds
+)
 from app.core.config import settings
+from app.services.client_registry import client_registry
+from app.services.prompts import SYSTEM_PROMPT
+from app.services.usage_tracker import usage_tracker
+from app.services import token_counter
+from app.schemas.llm import LLMUsage
+
+BATCH_TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
 
 class OpenAIService(LLMService):
+    batch_price_factor = 0.5  # Batch API calls are billed at half price
+
     def __init__(self, api_key: Optional[str] = None):
         self.api_key = api_key or settings.openai_api_key
         if not self.api_key:
             raise ValueError("OpenAI API key not provided")
-        self.client = AsyncOpenAI(api_key=self.api_key)
-        self.model = "gpt-4o-mini"
+        self.client = client_registry.get_client("openai", self.api_key)
+        self.model = settings.openai_model
+        self.last_usage: Optional[LLMUsage] = None
         
+    def _build_messages(self, prompt: str) -> list:
+        # OpenAI caches prompt prefixes automatically, so the system prompt and
+        # the static template body must come first and stay byte-identical.
+        return [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ]
+
     async def generate(self, prompt: str, max_tokens: int = 2000) -> str:
+        token_counter.check_context_window(self.model, prompt, max_tokens)
         try:
             response = await self.client.chat.completions.create(
                 model=self.model,
-                messages=[
-                    {"role": "system", "content": """You are an elite cybersecurity expert with 15+ years of experience in threat modeling, incident response, and security architecture. You specialize in creating highly realistic, technically accurate, and operationally relevant cybersecurity scenarios.
-
-Your expertise includes:
-- Advanced persistent threats (APTs) and nation-state actors
-- Modern attack techniques (living-off-the-land, supply chain attacks, zero-day exploits)
-- Industry-specific threat landscapes and compliance requirements
-- Real-world incident response procedures and decision-making frameworks
-- Emerging technologies and their security implications
-
-You excel at creating scenarios that:
-- Challenge participants with realistic technical and business constraints
-- Incorporate current threat intelligence and attack trends
-- Provide clear learning objectives and measurable outcomes
-- Balance technical depth with executive-level strategic thinking
-- Include realistic injects that test both technical skills and leadership decision-making
-
-Always provide scenarios that are actionable, educational, and reflect real-world cybersecurity challenges."""},
-                    {"role": "user", "content": prompt}
-                ],
+                messages=self._build_messages(prompt),
                 max_tokens=max_tokens,
                 temperature=0.7
             )
+            self._record_usage(response.usage)
             return response.choices[0].message.content
         except Exception as e:
-            raise Exception(f"OpenAI generation failed: {str(e)}")
+            raise self._translate_error("generation", e) from e
+
+    async def generate_stream(self, prompt: str, max_tokens: int = 2000) -> AsyncIterator[str]:
+        token_counter.check_context_window(self.model, prompt, max_tokens)
+        try:
+            stream = await self.client.chat.completions.create(
+                model=self.model,
+                messages=self._build_messages(prompt),
+                max_tokens=max_tokens,
+                temperature=0.7,
+                stream=True,
+                stream_options={"include_usage": True}
+            )
+            async for chunk in stream:
+                if chunk.usage:
+                    self._record_usage(chunk.usage)
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        except Exception as e:
+            raise self._translate_error("streaming", e) from e
+    
+    async def submit_batch(self, prompts: Dict[str, str], max_tokens: int = 2000) -> str:
+        lines = []
+        for custom_id, prompt in prompts.items():
+            token_counter.check_context_window(self.model, prompt, max_tokens)
+            lines.append(json.dumps({
+                "custom_id": custom_id,
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {
+                    "model": self.model,
+                    "messages": self._build_messages(prompt),
+                    "max_tokens": max_tokens,
+                    "temperature": 0.7
+                }
+            }))
+        try:
+            input_file = await self.client.files.create(
+                file=("batch.jsonl", "\n".join(lines).encode()), purpose="batch"
+            )
+            batch = await self.client.batches.create(
+                input_file_id=input_file.id, endpoint="/v1/chat/completions", completion_window="24h"
+            )
+        except Exception as e:
+            raise self._translate_error("batch", e) from e
+        return batch.id
+
+    async def fetch_batch(self, batch_id: str) -> Optional[Dict[str, Union[str, LLMServiceError]]]:
+        results: Dict[str, Union[str, LLMServiceError]] = {}
+        try:
+            batch = await self.client.batches.retrieve(batch_id)
+            if batch.status not in BATCH_TERMINAL_STATUSES:
+                return None
+            if batch.output_file_id:
+                output = await self.client.files.content(batch.output_file_id)
+                for line in output.text.splitlines():
+                    item = json.loads(line)
+                    response = item.get("response") or {}
+                    if response.get("status_code") == 200:
+                        body = response["body"]
+                        self._record_usage(CompletionUsage.model_validate(body["usage"]))
+                        results[item["custom_id"]] = body["choices"][0]["message"]["content"]
+                    else:
+                        results[item["custom_id"]] = LLMServiceError(
+                            f"OpenAI batch item failed: {item.get('error') or response}",
+                            provider="openai", status_code=response.get("status_code")
+                        )
+        except Exception as e:
+            raise self._translate_error("batch", e) from e
+        return results
+
+    def _record_usage(self, usage) -> None:
+        if usage is None:
+            return
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached = (details.cached_tokens or 0) if details else 0
+        self.last_usage = LLMUsage(
+            provider="openai",
+            model=self.model,
+            requests=1,
+            input_tokens=usage.prompt_tokens - cached,
+            output_tokens=usage.completion_tokens,
+            cache_read_tokens=cached
+        )
+        usage_tracker.record(self.last_usage)
+    
+    def _translate_error(self, kind: str, e: Exception) -> LLMServiceError:
+        message = f"OpenAI {kind} failed: {str(e)}"
+        if isinstance(e, openai.RateLimitError):
+            return LLMRateLimitError(message, provider="openai", retry_after=retry_after_seconds(e))
+        if isinstance(e, openai.APITimeoutError):
+            return LLMTimeoutError(message, provider="openai")
+        if isinstance(e, openai.APIConnectionError):
+            return LLMServiceError(message, provider="openai", retryable=True)
+        if isinstance(e, openai.APIStatusError):
+            retryable = e.status_code >= 500 or e.status_code == 408
+            return LLMServiceError(message, provider="openai", status_code=e.status_code, retryable=retryable)
+        return LLMServiceError(message, provider="openai")
     
     def estimate_cost(self, prompt: str, max_tokens: int = 2000) -> float:
-        # GPT-4 Turbo pricing (as of 2024)
-        input_price = 0.01  # per 1K tokens
-        output_price = 0.03  # per 1K tokens
-        
-        # Rough estimation
-        prompt_tokens = len(prompt) / 4  # ~4 chars per token
-        total_tokens = (prompt_tokens + max_tokens) / 1000
-        
-        return (prompt_tokens / 1000 * input_price) + (max_tokens / 1000 * output_price)
\ No newline at end of file
+        return token_counter.estimate_cost(self.model, prompt, max_tokens)
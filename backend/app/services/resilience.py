@@ -0,0 +1,237 @@
+"""Retry backoff, adaptive timeouts, circuit breakers and negative caching for LLM calls."""
+
+import hashlib
+import logging
+import random
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from threading import Lock
+from typing import Deque, Dict, List, Optional, Sequence, Tuple
+
+from app.core.config import settings
+from app.schemas.llm import ProviderHealth
+from app.services.llm_service import CircuitOpenError, LLMServiceError
+
+logger = logging.getLogger("resilience")
+
+LATENCY_WINDOW = 500  # Successful call latencies kept per provider
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+def percentile(values: Sequence[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile of the values, or None if there are none."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(q * len(ordered))) - 1))
+    return ordered[index]
+
+
+def backoff_delay(attempt: int) -> float:
+    """Seconds to sleep before retry number ``attempt`` (0-based), with full jitter."""
+    ceiling = min(settings.llm_retry_max_delay_ms, settings.llm_retry_base_delay_ms * (2 ** attempt))
+    return random.uniform(0, ceiling) / 1000
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker for one provider.
+
+    After ``llm_breaker_failure_threshold`` transient failures in a row the
+    breaker opens and calls fail fast for ``llm_breaker_reset_s``. Then a
+    single probe call is let through: success closes the breaker, failure
+    opens it again.
+    """
+
+    def __init__(self, provider: str):
+        self.provider = provider
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+        self.lock = Lock()
+
+    def allow(self) -> bool:
+        """Return whether a call may be sent now."""
+        with self.lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() - self.opened_at >= settings.llm_breaker_reset_s:
+                self.state = HALF_OPEN
+                self.probe_in_flight = False
+            if self.state == HALF_OPEN and not self.probe_in_flight:
+                self.probe_in_flight = True
+                return True
+            return False
+
+    def is_available(self) -> bool:
+        """Return whether a call would be allowed, without claiming the probe slot."""
+        with self.lock:
+            if self.state == OPEN:
+                return time.monotonic() - self.opened_at >= settings.llm_breaker_reset_s
+            return self.state == CLOSED or not self.probe_in_flight
+
+    def record_success(self) -> None:
+        with self.lock:
+            if self.state != CLOSED:
+                logger.info(f"{self.provider} circuit breaker closed")
+            self.state = CLOSED
+            self.consecutive_failures = 0
+            self.probe_in_flight = False
+
+    def record_failure(self) -> None:
+        with self.lock:
+            self.consecutive_failures += 1
+            self.probe_in_flight = False
+            if self.state == HALF_OPEN or self.consecutive_failures >= settings.llm_breaker_failure_threshold:
+                if self.state != OPEN:
+                    logger.warning(f"{self.provider} circuit breaker opened after "
+                                   f"{self.consecutive_failures} consecutive failures")
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+
+    def release_probe(self) -> None:
+        """Give back a probe slot whose call ended without a verdict (e.g. cancelled)."""
+        with self.lock:
+            self.probe_in_flight = False
+
+    def retry_at(self) -> Optional[datetime]:
+        with self.lock:
+            if self.state != OPEN:
+                return None
+            remaining = settings.llm_breaker_reset_s - (time.monotonic() - self.opened_at)
+            return datetime.now() + timedelta(seconds=max(0.0, remaining))
+
+
+class LatencyTracker:
+    """Keeps recent successful call latencies to derive an adaptive timeout."""
+
+    def __init__(self):
+        self.samples: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self.lock = Lock()
+
+    def record(self, seconds: float) -> None:
+        with self.lock:
+            self.samples.append(seconds)
+
+    def p99(self) -> Optional[float]:
+        with self.lock:
+            return percentile(list(self.samples), 0.99)
+
+    def timeout(self) -> float:
+        """Per-call timeout: a multiple of p99, clamped to the configured bounds."""
+        with self.lock:
+            count = len(self.samples)
+        if count < settings.llm_timeout_min_samples:
+            return settings.llm_timeout_s
+        adaptive = self.p99() * settings.llm_timeout_p99_multiplier
+        return max(settings.llm_min_timeout_s, min(settings.llm_timeout_s, adaptive))
+
+
+class NegativeCache:
+    """Short-lived memory of hard failures, replayed without calling the provider."""
+
+    def __init__(self):
+        self.entries: Dict[str, Tuple[float, LLMServiceError]] = {}
+        self.lock = Lock()
+
+    @staticmethod
+    def key(provider: str, model: str, prompt: str, max_tokens: int) -> str:
+        return hashlib.sha256(f"{provider}\0{model}\0{max_tokens}\0{prompt}".encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[LLMServiceError]:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            expires, error = entry
+            if time.monotonic() >= expires:
+                del self.entries[key]
+                return None
+            return error
+
+    def put(self, key: str, error: LLMServiceError) -> None:
+        with self.lock:
+            now = time.monotonic()
+            # Drop expired entries so the cache stays small
+            for stale in [k for k, (expires, _) in self.entries.items() if expires <= now]:
+                del self.entries[stale]
+            self.entries[key] = (now + settings.llm_negative_cache_ttl_s, error)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+
+
+class ResilienceRegistry:
+    """Per-provider circuit breakers and latency trackers plus a shared negative cache."""
+
+    def __init__(self):
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self.latencies: Dict[str, LatencyTracker] = {}
+        self.negative_cache = NegativeCache()
+        self.registry_lock = Lock()
+
+    def breaker(self, provider: str) -> CircuitBreaker:
+        with self.registry_lock:
+            breaker = self.breakers.get(provider)
+            if breaker is None:
+                breaker = self.breakers[provider] = CircuitBreaker(provider)
+            return breaker
+
+    def latency(self, provider: str) -> LatencyTracker:
+        with self.registry_lock:
+            tracker = self.latencies.get(provider)
+            if tracker is None:
+                tracker = self.latencies[provider] = LatencyTracker()
+            return tracker
+
+    def order_by_health(self, providers: List) -> List:
+        """Move providers whose breaker is open behind the healthy ones."""
+        def name(provider) -> str:
+            return provider.value if hasattr(provider, 'value') else str(provider)
+        healthy = [p for p in providers if self.breaker(name(p)).is_available()]
+        unhealthy = [p for p in providers if p not in healthy]
+        return healthy + unhealthy
+
+    def check_breaker(self, provider: str) -> CircuitBreaker:
+        """Return the provider's breaker, failing fast if it does not allow a call.
+
+        Raises:
+            CircuitOpenError: If the breaker is open.
+        """
+        breaker = self.breaker(provider)
+        if not breaker.allow():
+            raise CircuitOpenError(f"{provider} is temporarily unavailable (circuit open)", provider=provider)
+        return breaker
+
+    def snapshot(self) -> List[ProviderHealth]:
+        with self.registry_lock:
+            providers = sorted(set(self.breakers) | set(self.latencies))
+        result = []
+        for provider in providers:
+            breaker = self.breaker(provider)
+            tracker = self.latency(provider)
+            p99 = tracker.p99()
+            result.append(ProviderHealth(
+                provider=provider,
+                state=breaker.state,
+                consecutive_failures=breaker.consecutive_failures,
+                retry_at=breaker.retry_at(),
+                timeout_s=round(tracker.timeout(), 2),
+                p99_latency_ms=p99 * 1000 if p99 is not None else None,
+            ))
+        return result
+
+    def reset(self) -> None:
+        with self.registry_lock:
+            self.breakers.clear()
+            self.latencies.clear()
+        self.negative_cache.clear()
+
+
+# Global resilience registry instance
+resilience = ResilienceRegistry()
@@ -0,0 +1,268 @@
+"""Bounded in-memory cache of generated threat models."""
+
+import heapq
+import logging
+import random
+from collections import OrderedDict
+from datetime import datetime
+from threading import Lock
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from app.schemas.threat_model import CacheEntry, ResultCacheStats
+from app.services.metrics import JOB_CACHE_EVICTIONS
+
+logger = logging.getLogger("result_cache")
+
+ENTRY_OVERHEAD_BYTES = 512  # Rough per-entry cost of the model objects and bookkeeping
+
+
+class FrequencySketch:
+    """Count-min sketch of recent access frequency, as used by TinyLFU.
+
+    Counts are approximate (never under-estimated) and halved after
+    ``sample_size`` increments, so popularity decays and one-time bursts
+    do not pin entries forever.
+    """
+
+    DEPTH = 4
+
+    def __init__(self, width: int = 4096, sample_size: Optional[int] = None):
+        self.width = width
+        self.sample_size = sample_size or width * 10
+        self.rows = [[0] * width for _ in range(self.DEPTH)]
+        self.seeds = [random.getrandbits(32) for _ in range(self.DEPTH)]
+        self.additions = 0
+
+    def _indexes(self, key: str) -> Iterator[Tuple[List[int], int]]:
+        for row, seed in zip(self.rows, self.seeds):
+            yield row, hash((seed, key)) % self.width
+
+    def increment(self, key: str) -> None:
+        for row, index in self._indexes(key):
+            row[index] += 1
+        self.additions += 1
+        if self.additions >= self.sample_size:
+            self._age()
+
+    def estimate(self, key: str) -> int:
+        return min(row[index] for row, index in self._indexes(key))
+
+    def _age(self) -> None:
+        for row in self.rows:
+            for index, count in enumerate(row):
+                row[index] = count >> 1
+        self.additions //= 2
+
+
+class ResultCache:
+    """LRU cache of ``CacheEntry`` objects bounded by a byte budget.
+
+    Entries past their ``expires_at`` are treated as absent and dropped.
+    When a new entry needs room, the least recently used entries are the
+    eviction candidates, but a TinyLFU admission check only evicts them if
+    the new key has been requested at least as often as each of them:
+    popular results are not displaced by a stream of one-off requests.
+
+    ``lookup`` and ``put`` are the policy-aware operations. The mapping
+    methods (``cache[key]``, ``in``, ``len``, ``keys``...) are plain views
+    that neither count as accesses nor refresh recency.
+
+    A heap of ``(expires_at, key)`` lets ``purge_expired`` visit only the
+    entries that have expired. Heap items of replaced or removed entries
+    are skipped when they surface.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self.sizes: Dict[str, int] = {}
+        self.expiry_index: List[Tuple[datetime, str]] = []
+        self.sketch = FrequencySketch()
+        self.bytes = 0
+        self.hits = self.misses = 0
+        self.evictions = self.expirations = self.rejections = 0
+        self.lock = Lock()
+
+    @staticmethod
+    def _size(entry: CacheEntry) -> int:
+        return len(entry.threat_model.model_dump_json()) + ENTRY_OVERHEAD_BYTES
+
+    @staticmethod
+    def _expired(entry: CacheEntry, now: datetime) -> bool:
+        return entry.expires_at is not None and entry.expires_at <= now
+
+    def _index_expiry(self, key: str, entry: CacheEntry) -> None:
+        if entry.expires_at is None:
+            return
+        heapq.heappush(self.expiry_index, (entry.expires_at, key))
+        if len(self.expiry_index) > 2 * len(self.entries) + 1024:
+            # Mostly items of replaced entries; rebuild from the live ones
+            self.expiry_index = [
+                (live.expires_at, live_key) for live_key, live in self.entries.items()
+                if live.expires_at is not None
+            ]
+            heapq.heapify(self.expiry_index)
+
+    def _remove(self, key: str) -> CacheEntry:
+        self.bytes -= self.sizes.pop(key)
+        return self.entries.pop(key)
+
+    def _evict(self, key: str, reason: str) -> None:
+        self._remove(key)
+        if reason == "expired":
+            self.expirations += 1
+        else:
+            self.evictions += 1
+        JOB_CACHE_EVICTIONS.inc(reason=reason)
+
+    def lookup(self, key: str) -> Optional[CacheEntry]:
+        """Return a live entry, counting the access, or None on a miss."""
+        now = datetime.now()
+        with self.lock:
+            self.sketch.increment(key)
+            entry = self.entries.get(key)
+            if entry is not None and self._expired(entry, now):
+                self._evict(key, "expired")
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            entry.access_count += 1
+            entry.last_accessed = now
+            self.entries.move_to_end(key)
+            return entry
+
+    def put(self, key: str, entry: CacheEntry) -> bool:
+        """Insert or replace an entry if the admission policy lets it in. Returns whether it was stored."""
+        size = self._size(entry)
+        now = datetime.now()
+        with self.lock:
+            if size > self.max_bytes:
+                self.rejections += 1
+                return False
+            # The entry being replaced makes room too
+            replacing = key in self.entries
+            freed = self.sizes[key] if replacing else 0
+            # Least recently used entries that would have to go to make room
+            victims = []
+            for victim in self.entries:
+                if self.bytes - freed + size <= self.max_bytes:
+                    break
+                if victim != key:
+                    victims.append(victim)
+                    freed += self.sizes[victim]
+            frequency = self.sketch.estimate(key)
+            for victim in victims:
+                if not self._expired(self.entries[victim], now) and self.sketch.estimate(victim) > frequency:
+                    # A rejected refresh keeps the entry it would have replaced
+                    self.rejections += 1
+                    return False
+            if replacing:
+                self._remove(key)
+            for victim in victims:
+                self._evict(victim, "expired" if self._expired(self.entries[victim], now) else "capacity")
+            self.entries[key] = entry
+            self.sizes[key] = size
+            self.bytes += size
+            self._index_expiry(key, entry)
+            return True
+
+    def remove_where(self, predicate: Callable[[CacheEntry], bool]) -> int:
+        """Drop every entry matching ``predicate``. Returns the number removed."""
+        with self.lock:
+            keys = [key for key, entry in self.entries.items() if predicate(entry)]
+            for key in keys:
+                self._evict(key, "expired")
+        return len(keys)
+
+    def purge_expired(self) -> Tuple[int, int]:
+        """Drop entries past their ``expires_at``, visiting only those.
+
+        Returns:
+            Tuple of (entries removed, bytes reclaimed).
+        """
+        now = datetime.now()
+        removed = reclaimed = 0
+        with self.lock:
+            while self.expiry_index and self.expiry_index[0][0] <= now:
+                _, key = heapq.heappop(self.expiry_index)
+                entry = self.entries.get(key)
+                if entry is None:
+                    continue
+                if not self._expired(entry, now):
+                    # Replaced since; the new entry has its own index item
+                    continue
+                reclaimed += self.sizes[key]
+                self._evict(key, "expired")
+                removed += 1
+        return removed, reclaimed
+
+    def stats(self) -> ResultCacheStats:
+        with self.lock:
+            lookups = self.hits + self.misses
+            return ResultCacheStats(
+                entries=len(self.entries),
+                bytes=self.bytes,
+                max_bytes=self.max_bytes,
+                hits=self.hits,
+                misses=self.misses,
+                hit_ratio=self.hits / lookups if lookups else 0.0,
+                evictions=self.evictions,
+                expirations=self.expirations,
+                rejections=self.rejections,
+            )
+
+    # Mapping view
+
+    def __getitem__(self, key: str) -> CacheEntry:
+        with self.lock:
+            return self.entries[key]
+
+    def __setitem__(self, key: str, entry: CacheEntry) -> None:
+        """Store an entry unconditionally, evicting least recently used ones to fit."""
+        size = self._size(entry)
+        with self.lock:
+            if key in self.entries:
+                self._remove(key)
+            while self.entries and self.bytes + size > self.max_bytes:
+                self._evict(next(iter(self.entries)), "capacity")
+            self.entries[key] = entry
+            self.sizes[key] = size
+            self.bytes += size
+            self._index_expiry(key, entry)
+
+    def __delitem__(self, key: str) -> None:
+        with self.lock:
+            self._remove(key)
+
+    def __contains__(self, key: object) -> bool:
+        with self.lock:
+            return key in self.entries
+
+    def __len__(self) -> int:
+        with self.lock:
+            return len(self.entries)
+
+    def get(self, key: str, default: Optional[CacheEntry] = None) -> Optional[CacheEntry]:
+        with self.lock:
+            return self.entries.get(key, default)
+
+    def keys(self) -> List[str]:
+        with self.lock:
+            return list(self.entries)
+
+    def values(self) -> List[CacheEntry]:
+        with self.lock:
+            return list(self.entries.values())
+
+    def items(self) -> List[Tuple[str, CacheEntry]]:
+        with self.lock:
+            return list(self.entries.items())
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+            self.sizes.clear()
+            self.expiry_index.clear()
+            self.bytes = 0
@@ -0,0 +1,126 @@
+"""Single-flight coalescing of identical concurrent calls."""
+
+import asyncio
+import hashlib
+import logging
+from threading import Lock
+from typing import Awaitable, Callable, Dict, List, Optional, TypeVar
+
+from app.services import deadlines
+from app.services.llm_service import DeadlineExceededError
+
+logger = logging.getLogger("single_flight")
+
+T = TypeVar("T")
+
+
+def normalize_key(*parts) -> str:
+    """Hash the parts into a key, ignoring differences in whitespace."""
+    normalized = "\0".join(" ".join(str(part).split()) for part in parts)
+    return hashlib.sha256(normalized.encode()).hexdigest()
+
+
+def _resolve(waiter: asyncio.Future, task: asyncio.Task) -> None:
+    if waiter.done():
+        return
+    if task.cancelled():
+        waiter.cancel()
+    elif task.exception() is not None:
+        waiter.set_exception(task.exception())
+    else:
+        waiter.set_result(task.result())
+
+
+class _Flight:
+    """One in-flight call and the callers waiting on it."""
+
+    def __init__(self):
+        self.task: Optional[asyncio.Task] = None
+        self.waiters: List[asyncio.Future] = []
+
+
+class SingleFlight:
+    """Runs at most one call per key; concurrent callers share its result.
+
+    The first caller for a key starts the call as a task; callers arriving
+    while it runs wait for the same outcome instead of starting another.
+    The call is cancelled only when every waiting caller has gone away.
+    It runs without the first caller's request deadline; instead every
+    caller gives up at its own deadline, leaving the others waiting.
+    Waiters are woken thread-safely, so callers may live on different event
+    loops.
+    """
+
+    def __init__(self):
+        self.flights: Dict[str, _Flight] = {}
+        self.lock = Lock()
+        self.started = 0
+        self.coalesced = 0
+
+    async def run(self, key: str, call: Callable[[], Awaitable[T]]) -> T:
+        """Run ``call`` unless an identical one is in flight, and return its result.
+
+        Args:
+            key: Identifies calls that are interchangeable.
+            call: Zero-argument coroutine function performing the call.
+
+        Returns:
+            The result of the shared call.
+
+        Raises:
+            DeadlineExceededError: If this caller's deadline passes first.
+            Exception: Whatever the shared call raised.
+        """
+        left = deadlines.check()
+        loop = asyncio.get_running_loop()
+        waiter = loop.create_future()
+        with self.lock:
+            flight = self.flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self.flights[key] = _Flight()
+                self.started += 1
+            else:
+                self.coalesced += 1
+            flight.waiters.append(waiter)
+        if leader:
+            flight.task = loop.create_task(call(), context=deadlines.detached_context())
+            flight.task.add_done_callback(lambda task: self._finish(key, flight, task))
+        else:
+            logger.info(f"Coalesced duplicate call onto in-flight {key[:12]}")
+        try:
+            if left is not None:
+                await asyncio.wait((waiter,), timeout=left)
+                if not waiter.done():
+                    self._leave(key, flight, waiter)
+                    raise DeadlineExceededError("Request deadline exceeded waiting for a shared call")
+            return await waiter
+        except asyncio.CancelledError:
+            self._leave(key, flight, waiter)
+            raise
+
+    def _finish(self, key: str, flight: _Flight, task: asyncio.Task) -> None:
+        with self.lock:
+            if self.flights.get(key) is flight:
+                del self.flights[key]
+            waiters, flight.waiters = flight.waiters, []
+        if not task.cancelled():
+            task.exception()  # Mark retrieved; waiters re-raise it
+        for waiter in waiters:
+            waiter.get_loop().call_soon_threadsafe(_resolve, waiter, task)
+
+    def _leave(self, key: str, flight: _Flight, waiter: asyncio.Future) -> None:
+        """Drop a cancelled waiter; cancel the call when nobody is left waiting."""
+        with self.lock:
+            if waiter in flight.waiters:
+                flight.waiters.remove(waiter)
+            if flight.waiters or flight.task is None or flight.task.done():
+                return
+            # New callers must not attach to a call that is being cancelled
+            if self.flights.get(key) is flight:
+                del self.flights[key]
+        flight.task.get_loop().call_soon_threadsafe(flight.task.cancel)
+
+    def in_flight(self) -> int:
+        with self.lock:
+            return len(self.flights)
@@ -0,0 +1,217 @@
+"""Offline token counting, per-model pricing and context-window checks."""
+
+import logging
+import re
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from typing import Dict
+
+from app.schemas.llm import ModelSpec
+from app.services.prompts import SYSTEM_PROMPT, split_prompt
+
+try:
+    import tiktoken
+except ImportError:  # Optional dependency; fall back to the heuristic tokenizer
+    tiktoken = None
+
+logger = logging.getLogger("token_counter")
+
+# Published list prices, USD per million tokens
+MODEL_SPECS: Dict[str, ModelSpec] = {
+    "gpt-4o-mini": ModelSpec(
+        input_price=0.15,
+        output_price=0.60,
+        cache_read_price=0.075,
+        context_window=128000,
+        max_output_tokens=16384,
+    ),
+    "gpt-4o": ModelSpec(
+        input_price=2.50,
+        output_price=10.00,
+        cache_read_price=1.25,
+        context_window=128000,
+        max_output_tokens=16384,
+    ),
+    "claude-3-5-sonnet": ModelSpec(
+        input_price=3.00,
+        output_price=15.00,
+        cache_read_price=0.30,
+        cache_write_price=3.75,
+        context_window=200000,
+        max_output_tokens=8192,
+    ),
+    "claude-3-5-haiku": ModelSpec(
+        input_price=0.80,
+        output_price=4.00,
+        cache_read_price=0.08,
+        cache_write_price=1.00,
+        context_window=200000,
+        max_output_tokens=8192,
+    ),
+    "mock": ModelSpec(
+        input_price=0.0,
+        output_price=0.0,
+        context_window=200000,
+        max_output_tokens=8192,
+    ),
+}
+
+
+class ContextWindowExceededError(ValueError):
+    """Raised when a prompt plus its output budget does not fit the model."""
+
+
+class Tokenizer(ABC):
+    """Interface for offline tokenizers."""
+
+    @abstractmethod
+    def count(self, text: str) -> int:
+        """Return the number of tokens in the text."""
+        pass
+
+
+class HeuristicTokenizer(Tokenizer):
+    """Approximates BPE tokenizers by splitting words and punctuation.
+
+    Short words count as one token and long words as one token per six
+    characters, which tracks modern English BPE vocabularies closely enough
+    for cost estimates and context checks.
+    """
+
+    PIECE_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+    def count(self, text: str) -> int:
+        return sum(1 + (len(piece) - 1) // 6 for piece in self.PIECE_PATTERN.findall(text))
+
+
+class TiktokenTokenizer(Tokenizer):
+    """Exact tokenizer for OpenAI models, backed by tiktoken."""
+
+    def __init__(self, encoding_name: str):
+        self.encoding = tiktoken.get_encoding(encoding_name)
+
+    def count(self, text: str) -> int:
+        return len(self.encoding.encode(text, disallowed_special=()))
+
+
+_tokenizers: Dict[str, Tokenizer] = {}
+_default_tokenizer = HeuristicTokenizer()
+
+
+def register_tokenizer(model_prefix: str, tokenizer: Tokenizer) -> None:
+    """Use a tokenizer for every model whose name starts with the prefix.
+
+    Args:
+        model_prefix: Model name or prefix, e.g. "gpt-4o".
+        tokenizer: The tokenizer to use for matching models.
+    """
+    _tokenizers[model_prefix] = tokenizer
+    _count_static.cache_clear()
+
+
+def _match_prefix(model: str, table: dict):
+    """Find the entry for a model by exact name, then by longest prefix."""
+    if model in table:
+        return table[model]
+    matches = [prefix for prefix in table if model.startswith(prefix)]
+    if matches:
+        return table[max(matches, key=len)]
+    return None
+
+
+def get_tokenizer(model: str) -> Tokenizer:
+    """Return the registered tokenizer for a model, or the heuristic default."""
+    return _match_prefix(model, _tokenizers) or _default_tokenizer
+
+
+def get_model_spec(model: str) -> ModelSpec:
+    """Return pricing and limits for a model.
+
+    Raises:
+        ValueError: If the model has no pricing entry.
+    """
+    spec = _match_prefix(model, MODEL_SPECS)
+    if spec is None:
+        raise ValueError(f"No pricing available for model: {model}")
+    return spec
+
+
+@lru_cache(maxsize=256)
+def _count_static(model: str, text: str) -> int:
+    """Count tokens of text that is shared across requests, memoized."""
+    return get_tokenizer(model).count(text)
+
+
+def count_tokens(model: str, text: str) -> int:
+    """Count the tokens of arbitrary text for a model."""
+    return get_tokenizer(model).count(text)
+
+
+def count_prompt_tokens(model: str, prompt: str) -> int:
+    """Count the input tokens a generation call sends, including the system prompt.
+
+    The system prompt and the static template prefix are memoized, so only
+    the request-specific fields are tokenized per call.
+
+    Args:
+        model: Model the prompt is sent to.
+        prompt: A plain prompt or a ``CacheablePrompt``.
+
+    Returns:
+        Estimated number of input tokens.
+    """
+    static_prefix, dynamic_suffix = split_prompt(prompt)
+    total = _count_static(model, SYSTEM_PROMPT) + count_tokens(model, dynamic_suffix)
+    if static_prefix:
+        total += _count_static(model, static_prefix)
+    return total
+
+
+def estimate_cost(model: str, prompt: str, max_tokens: int = 2000) -> float:
+    """Estimate the worst-case cost in USD of a generation.
+
+    Assumes no prompt-cache hits and that the full ``max_tokens`` budget is used.
+
+    Raises:
+        ValueError: If the model has no pricing entry.
+    """
+    spec = get_model_spec(model)
+    prompt_tokens = count_prompt_tokens(model, prompt)
+    return (prompt_tokens * spec.input_price + max_tokens * spec.output_price) / 1_000_000
+
+
+def check_context_window(model: str, prompt: str, max_tokens: int = 2000) -> int:
+    """Verify a prompt plus its output budget fits the model's context window.
+
+    Args:
+        model: Model the prompt will be sent to.
+        prompt: The prompt to check.
+        max_tokens: Output tokens requested.
+
+    Returns:
+        The estimated prompt token count.
+
+    Raises:
+        ContextWindowExceededError: If the request cannot fit.
+    """
+    spec = _match_prefix(model, MODEL_SPECS)
+    prompt_tokens = count_prompt_tokens(model, prompt)
+    if spec is None:
+        return prompt_tokens
+    if max_tokens > spec.max_output_tokens:
+        raise ContextWindowExceededError(
+            f"max_tokens {max_tokens} exceeds the {spec.max_output_tokens} output token limit of {model}"
+        )
+    if prompt_tokens + max_tokens > spec.context_window:
+        raise ContextWindowExceededError(
+            f"Prompt of ~{prompt_tokens} tokens plus {max_tokens} output tokens exceeds "
+            f"the {spec.context_window} token context window of {model}"
+        )
+    return prompt_tokens
+
+
+if tiktoken is not None:
+    try:
+        register_tokenizer("gpt-4o", TiktokenTokenizer("o200k_base"))
+    except Exception as e:  # Encoding files may be unavailable offline
+        logger.warning(f"tiktoken unavailable, using heuristic token counts: {e}")
@@ -0,0 +1,49 @@
+"""Process-wide aggregation of provider-reported token usage."""
+
+import logging
+from threading import Lock
+from typing import Dict, List, Tuple
+
+from app.schemas.llm import LLMUsage
+
+logger = logging.getLogger("usage_tracker")
+
+
+class UsageTracker:
+    """Aggregates token usage, including prompt-cache reads and writes, per provider and model."""
+
+    def __init__(self):
+        self.usage: Dict[Tuple[str, str], LLMUsage] = {}
+        self.usage_lock = Lock()
+
+    def record(self, usage: LLMUsage) -> None:
+        """Add the usage of a single call to the running totals."""
+        key = (usage.provider, usage.model)
+        with self.usage_lock:
+            total = self.usage.get(key)
+            if total is None:
+                total = self.usage[key] = LLMUsage(provider=usage.provider, model=usage.model)
+            total.requests += usage.requests
+            total.input_tokens += usage.input_tokens
+            total.output_tokens += usage.output_tokens
+            total.cache_read_tokens += usage.cache_read_tokens
+            total.cache_write_tokens += usage.cache_write_tokens
+        logger.debug(
+            f"{usage.provider}/{usage.model} usage: input={usage.input_tokens} "
+            f"output={usage.output_tokens} cache_read={usage.cache_read_tokens} "
+            f"cache_write={usage.cache_write_tokens}"
+        )
+
+    def snapshot(self) -> List[LLMUsage]:
+        """Return a copy of the aggregated usage for every provider and model."""
+        with self.usage_lock:
+            return [usage.model_copy() for usage in self.usage.values()]
+
+    def reset(self) -> None:
+        """Clear all aggregated usage."""
+        with self.usage_lock:
+            self.usage.clear()
+
+
+# Global usage tracker instance
+usage_tracker = UsageTracker()
@@ -1,7 +1,15 @@
 import pytest
 import os
+import uuid
+from datetime import datetime
 from fastapi.testclient import TestClient
+
+# Keep the job store in memory and the result cache off disk
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+os.environ.setdefault('RESULT_CACHE_DISK_PATH', '')
+
 from app.main import app
+from app.schemas.threat_model import CacheEntry, ThreatModelResponse
 
 @pytest.fixture(scope='session', autouse=True)
 def set_test_env():
@@ -13,10 +21,27 @@ def set_test_env():
     os.environ.pop('OPENAI_API_KEY', None)
     os.environ.pop('ANTHROPIC_API_KEY', None)
 
+@pytest.fixture(autouse=True)
+def upload_dir(tmp_path, monkeypatch):
+    """Keep files uploaded by tests out of the source tree."""
+    from app.services import file_service
+    monkeypatch.setattr(file_service, 'UPLOAD_DIR', tmp_path / 'uploads')
+
 @pytest.fixture
 def client():
     return TestClient(app)
 
+@pytest.fixture
+def make_entry():
+    """Factory for cached threat model results."""
+    def make(key, text='x' * 100, created_at=None, expires_at=None):
+        now = created_at or datetime.now()
+        result = ThreatModelResponse(id=str(uuid.uuid4()), threat_model=text, estimated_cost=0.0,
+                                     provider_used='openai', framework='STRIDE', content_analyzed='system')
+        return CacheEntry(cache_key=key, threat_model=result, created_at=now, last_accessed=now,
+                          expires_at=expires_at)
+    return make
+
 @pytest.fixture
 def mock_llm(monkeypatch):
     class MockLLM:
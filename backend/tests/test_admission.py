@@ -0,0 +1,137 @@
+import asyncio
+import time
+import pytest
+from app.core.config import settings
+from app.services.admission import ProviderAdmission, TokenBucket
+from app.services import deadlines
+from app.services.llm_service import LLMRateLimitError, MockLLMService, retry_after_seconds
+from app.services.managed_service import ManagedLLMService
+
+@pytest.fixture
+def limits(monkeypatch):
+    monkeypatch.setattr(settings, 'llm_initial_concurrency', 2)
+    monkeypatch.setattr(settings, 'llm_min_concurrency', 1)
+    monkeypatch.setattr(settings, 'llm_max_concurrency', 8)
+
+def test_token_bucket_wait_time():
+    bucket = TokenBucket(per_minute=60)
+    assert bucket.wait_time(60) == 0
+    bucket.take(60)
+    assert bucket.wait_time(30) == pytest.approx(30, abs=0.1)
+    # Requests larger than the whole budget are clamped to capacity
+    bucket.refund(60)
+    assert bucket.wait_time(1000) == 0
+
+@pytest.mark.asyncio
+async def test_concurrency_limit_queues_callers(limits):
+    admission = ProviderAdmission('test', rpm_limit=1000, tpm_limit=1000000)
+    first = await admission.acquire(10)
+    second = await admission.acquire(10)
+    third = asyncio.create_task(admission.acquire(10))
+    await asyncio.sleep(0.01)
+    assert not third.done()
+    assert admission.stats().queued == 1
+    admission.release(first)
+    permit = await asyncio.wait_for(third, timeout=1)
+    assert admission.in_flight == 2
+    admission.release(second)
+    admission.release(permit)
+    assert admission.in_flight == 0
+
+@pytest.mark.asyncio
+async def test_aimd_limit(limits):
+    admission = ProviderAdmission('test', rpm_limit=1000, tpm_limit=1000000)
+    permit = await admission.acquire(10)
+    admission.release(permit)
+    assert admission.limit == pytest.approx(2.5)
+    permit = await admission.acquire(10)
+    admission.release(permit, rate_limited=True)
+    assert admission.limit == pytest.approx(1.25)
+    assert admission.stats().rate_limited == 1
+
+@pytest.mark.asyncio
+async def test_token_refund(limits):
+    admission = ProviderAdmission('test', rpm_limit=1000, tpm_limit=1000)
+    permit = await admission.acquire(800)
+    admission.release(permit, actual_tokens=100)
+    assert admission.tokens.available == pytest.approx(900, abs=1)
+
+class FlakyService(MockLLMService):
+    model = 'mock'
+
+    def __init__(self, failures, retry_after=None):
+        self.failures = failures
+        self.retry_after = retry_after
+        self.calls = 0
+        self.called_at = []
+
+    async def generate(self, prompt, max_tokens=2000):
+        self.calls += 1
+        self.called_at.append(time.monotonic())
+        if self.calls <= self.failures:
+            raise LLMRateLimitError('slow down', provider='test', status_code=429, retry_after=self.retry_after)
+        return 'ok'
+
+@pytest.fixture
+def fast_backoff(monkeypatch):
+    monkeypatch.setattr(settings, 'llm_retry_base_delay_ms', 1)
+    monkeypatch.setattr(settings, 'llm_retry_max_delay_ms', 2)
+
+@pytest.mark.asyncio
+async def test_managed_service_requeues_rate_limited_calls(limits, fast_backoff, monkeypatch):
+    monkeypatch.setattr(settings, 'llm_rate_limit_max_requeues', 2)
+    inner = FlakyService(failures=2)
+    service = ManagedLLMService(inner, 'flaky-requeue')
+    assert await service.generate('prompt') == 'ok'
+    assert inner.calls == 3
+    assert service.admission.in_flight == 0
+
+@pytest.mark.asyncio
+async def test_managed_service_gives_up_after_requeues(limits, fast_backoff, monkeypatch):
+    monkeypatch.setattr(settings, 'llm_rate_limit_max_requeues', 1)
+    service = ManagedLLMService(FlakyService(failures=5), 'flaky-give-up')
+    with pytest.raises(LLMRateLimitError):
+        await service.generate('prompt')
+    assert service.admission.in_flight == 0
+
+def test_retry_after_header_is_parsed():
+    class Response:
+        def __init__(self, headers):
+            self.headers = headers
+
+    class SDKError(Exception):
+        def __init__(self, headers):
+            self.response = Response(headers)
+
+    assert retry_after_seconds(SDKError({'retry-after': '2.5'})) == 2.5
+    assert retry_after_seconds(SDKError({'retry-after': 'Wed, 21 Oct 2026 07:28:00 GMT'})) is None
+    assert retry_after_seconds(SDKError({})) is None
+    assert retry_after_seconds(Exception()) is None
+
+@pytest.mark.asyncio
+async def test_rate_limited_call_waits_for_retry_after(limits):
+    inner = FlakyService(failures=1, retry_after=0.1)
+    service = ManagedLLMService(inner, 'flaky-retry-after')
+    assert await service.generate('prompt') == 'ok'
+    assert inner.called_at[1] - inner.called_at[0] >= 0.1
+
+@pytest.mark.asyncio
+async def test_rate_limited_call_backs_off_without_retry_after(limits, monkeypatch):
+    monkeypatch.setattr('app.services.managed_service.backoff_delay', lambda attempt: 0.05 * (attempt + 1))
+    inner = FlakyService(failures=2)
+    service = ManagedLLMService(inner, 'flaky-backoff')
+    assert await service.generate('prompt') == 'ok'
+    first, second, third = inner.called_at
+    assert second - first >= 0.05 and third - second >= 0.1
+
+@pytest.mark.asyncio
+async def test_retry_after_past_the_deadline_fails_at_once(limits):
+    inner = FlakyService(failures=1, retry_after=30)
+    service = ManagedLLMService(inner, 'flaky-deadline')
+    started = time.monotonic()
+    with deadlines.deadline_scope(5):
+        with pytest.raises(LLMRateLimitError):
+            await service.generate('prompt')
+    assert time.monotonic() - started < 1
+    assert inner.calls == 1
+    assert service.admission.in_flight == 0
@@ -0,0 +1,40 @@
+import pytest
+from app.core.config import settings
+from app.services.client_registry import LLMClientRegistry
+
+@pytest.mark.asyncio
+async def test_client_reused_per_provider_and_key():
+    registry = LLMClientRegistry()
+    first = registry.get_client("openai", "key-a")
+    second = registry.get_client("openai", "key-a")
+    other_key = registry.get_client("openai", "key-b")
+    other_provider = registry.get_client("anthropic", "key-a")
+    assert first is second
+    assert first is not other_key
+    assert first is not other_provider
+    await registry.aclose()
+
+@pytest.mark.asyncio
+async def test_pool_limits_from_settings():
+    registry = LLMClientRegistry()
+    client = registry.get_client("anthropic", "key-a")
+    pool = client._client._transport._pool
+    assert pool._max_connections == settings.llm_max_connections
+    assert pool._max_keepalive_connections == settings.llm_max_keepalive_connections
+    await registry.aclose()
+
+@pytest.mark.asyncio
+async def test_warmup_and_close(monkeypatch):
+    monkeypatch.setattr(settings, "llm_prewarm_connections", False)
+    registry = LLMClientRegistry()
+    await registry.warmup({"openai": "key-a", "anthropic": "key-b"})
+    assert len(registry.clients) == 2
+    client = registry.get_client("openai", "key-a")
+    await registry.aclose()
+    assert registry.clients == {}
+    assert client.is_closed()
+
+def test_unknown_provider():
+    registry = LLMClientRegistry()
+    with pytest.raises(ValueError):
+        registry.get_client("unknown", "key")
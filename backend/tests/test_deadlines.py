@@ -0,0 +1,99 @@
+import asyncio
+import time
+import pytest
+from fastapi import HTTPException, Request
+from httpx import AsyncClient, ASGITransport
+from app.api.cancellation import run_cancellable
+from app.main import app
+from app.services import deadlines
+from app.services.admission import admission_controller
+from app.services.llm_service import DeadlineExceededError, MockLLMService
+from app.services.managed_service import ManagedLLMService
+from app.services.resilience import resilience
+
+SCENARIO = {
+    "company_name": "TestCo",
+    "industry": "Finance",
+    "company_size": "medium",
+    "technologies": ["AWS"],
+    "threat_actor": "ransomware",
+    "scenario_type": "ransomware",
+    "participants": ["Security Team"],
+    "duration_hours": 2
+}
+
+class SlowService(MockLLMService):
+    model = 'mock'
+
+    def __init__(self, delay=5):
+        self.delay = delay
+        self.cancelled = False
+
+    async def generate(self, prompt, max_tokens=2000):
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        return 'late'
+
+@pytest.fixture(autouse=True)
+def clean_state():
+    resilience.reset()
+    admission_controller.reset()
+    yield
+    resilience.reset()
+    admission_controller.reset()
+
+def disconnecting_request(after):
+    async def receive():
+        await asyncio.sleep(after)
+        return {"type": "http.disconnect"}
+    return Request({"type": "http", "method": "POST", "path": "/", "headers": []}, receive)
+
+def test_nested_scope_only_tightens():
+    assert deadlines.remaining() is None
+    with deadlines.deadline_scope(10):
+        with deadlines.deadline_scope(60):
+            assert deadlines.remaining() <= 10
+        with deadlines.deadline_scope(1):
+            assert deadlines.remaining() <= 1
+    assert deadlines.remaining() is None
+
+@pytest.mark.asyncio
+async def test_deadline_caps_provider_call_without_tripping_breaker():
+    service = ManagedLLMService(SlowService(), 'deadline-test')
+    start = time.monotonic()
+    with deadlines.deadline_scope(0.05):
+        with pytest.raises(DeadlineExceededError):
+            await service.generate('prompt')
+    assert time.monotonic() - start < 1
+    assert resilience.breaker('deadline-test').consecutive_failures == 0
+    assert service.admission.in_flight == 0
+
+@pytest.mark.asyncio
+async def test_expired_deadline_fails_before_calling_provider():
+    slow = SlowService()
+    with deadlines.deadline_scope(-1):
+        with pytest.raises(DeadlineExceededError):
+            await ManagedLLMService(slow, 'deadline-test').generate('prompt')
+    assert not slow.cancelled
+
+@pytest.mark.asyncio
+async def test_disconnect_cancels_call_and_frees_slot():
+    slow = SlowService()
+    service = ManagedLLMService(slow, 'deadline-test')
+    with pytest.raises(HTTPException) as exc:
+        await run_cancellable(disconnecting_request(0.05), service.generate('prompt'), 30)
+    assert exc.value.status_code == 499
+    assert slow.cancelled
+    assert service.admission.in_flight == 0
+
+@pytest.mark.asyncio
+async def test_header_deadline_returns_504(monkeypatch):
+    monkeypatch.setattr('app.services.llm_factory.LLMFactory.create', lambda provider: SlowService())
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        resp = await ac.post("/api/scenarios/generate", json=SCENARIO, headers={"X-Request-Timeout": "0.05"})
+        assert resp.status_code == 504
+        resp = await ac.post("/api/scenarios/generate", json=SCENARIO, headers={"X-Request-Timeout": "soon"})
+        assert resp.status_code == 400
@@ -0,0 +1,115 @@
+import asyncio
+import io
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import func, select, text
+from app.schemas.threat_model import AsyncThreatModelRequest, JobStatus
+from app.services.disk_cache import DiskResultCache, results_table
+from app.services.job_service import JobService
+from app.cache_admin import main as cache_admin
+
+def test_roundtrip_is_compressed(tmp_path, make_entry):
+    cache = DiskResultCache(str(tmp_path / 'cache' / 'results.db'))
+    entry = make_entry('a', text='threat ' * 200)
+    cache.put('a', entry)
+    assert cache.get('a').threat_model == entry.threat_model
+    assert cache.get('missing') is None
+    stats = cache.stats()
+    assert stats.entries == 1
+    assert 0 < stats.bytes < len(entry.model_dump_json())
+
+def test_expired_entries_are_dropped(tmp_path, make_entry):
+    cache = DiskResultCache(str(tmp_path / 'results.db'))
+    cache.put('old', make_entry('old', expires_at=datetime.now() - timedelta(seconds=1)))
+    cache.put('stale', make_entry('stale', created_at=datetime.now() - timedelta(days=40)))
+    cache.put('live', make_entry('live'))
+    assert cache.get('old') is None
+    # Lookups never write, so the expired row waits for the purge
+    assert cache.purge(older_than=datetime.now() - timedelta(days=30))[0] == 2
+    assert [key for key, _ in cache.entries()] == ['live']
+
+def test_purge_trims_least_recently_used(tmp_path, make_entry):
+    cache = DiskResultCache(str(tmp_path / 'results.db'))
+    for key in ('a', 'b', 'c'):
+        cache.put(key, make_entry(key))
+    cache.get('a')
+    removed, reclaimed = cache.purge(max_bytes=cache.stats().bytes - 1)
+    assert removed == 1 and reclaimed > 0
+    assert sorted(key for key, _ in cache.entries()) == ['a', 'c']
+
+def test_lookups_buffer_access_times(tmp_path, make_entry):
+    cache = DiskResultCache(str(tmp_path / 'results.db'))
+    cache.put('a', make_entry('a', created_at=datetime.now() - timedelta(days=1)))
+    cache.get('a')
+    with cache.engine.connect() as connection:
+        stored = connection.execute(select(results_table.c.last_accessed)).scalar_one()
+    assert stored < datetime.now() - timedelta(hours=1)
+    assert cache.flush_access_times() == 1
+    with cache.engine.connect() as connection:
+        stored = connection.execute(select(results_table.c.last_accessed)).scalar_one()
+    assert stored > datetime.now() - timedelta(minutes=1)
+
+def test_export_import(tmp_path, make_entry):
+    source = DiskResultCache(str(tmp_path / 'source.db'))
+    source.put('a', make_entry('a'))
+    source.put('b', make_entry('b'))
+    buffer = io.BytesIO()
+    assert source.export_to(buffer) == 2
+    target = DiskResultCache(str(tmp_path / 'target.db'))
+    assert target.import_from(io.BytesIO(buffer.getvalue()), batch_size=1) == 2
+    assert target.get('b').threat_model == source.get('b').threat_model
+
+def test_cache_admin_export_import(tmp_path, make_entry):
+    source = DiskResultCache(str(tmp_path / 'source.db'))
+    source.put('a', make_entry('a'))
+    dump = str(tmp_path / 'results.jsonl.gz')
+    cache_admin(['--path', source.path, 'export', dump])
+    cache_admin(['--path', str(tmp_path / 'target.db'), 'import', dump])
+    assert DiskResultCache(str(tmp_path / 'target.db')).stats().entries == 1
+
+@pytest.mark.asyncio
+async def test_memory_miss_falls_back_to_disk(tmp_path, monkeypatch, make_entry):
+    monkeypatch.setattr('app.services.job_service.settings.result_cache_disk_path', str(tmp_path / 'results.db'))
+    request = AsyncThreatModelRequest(content='a web app', framework='STRIDE', llm_provider='openai')
+    writer = JobService()
+    key = writer._generate_cache_key(request)
+    stored = make_entry(key)
+    await writer._store_cached(key, stored)
+
+    # A fresh process with an empty memory cache still answers from disk
+    reader = JobService()
+    job_id = reader.create_job(request)
+    while reader.tasks:
+        await asyncio.sleep(0.01)
+    job = reader.get_job_status(job_id)
+    assert job.status == JobStatus.COMPLETED
+    assert job.result.id == stored.threat_model.id
+    assert key in reader.cache
+
+def summed(cache):
+    with cache.engine.connect() as connection:
+        return tuple(connection.execute(
+            select(func.count(), func.coalesce(func.sum(results_table.c.size), 0))
+        ).one())
+
+def test_running_total_tracks_writes(tmp_path, make_entry):
+    cache = DiskResultCache(str(tmp_path / 'results.db'))
+    cache.put('a', make_entry('a'))
+    cache.put('b', make_entry('b'))
+    cache.put('a', make_entry('a', text='y' * 500))
+    stats = cache.stats()
+    assert (stats.entries, stats.bytes) == summed(cache)
+    assert cache.purge(max_bytes=1)[0] == 2
+    stats = cache.stats()
+    assert (stats.entries, stats.bytes) == summed(cache) == (0, 0)
+
+def test_running_total_is_seeded_for_existing_files(tmp_path, make_entry):
+    path = str(tmp_path / 'results.db')
+    cache = DiskResultCache(path)
+    cache.put('a', make_entry('a'))
+    with cache.engine.begin() as connection:
+        connection.execute(text('DROP TABLE results_total'))
+    reopened = DiskResultCache(path)
+    stats = reopened.stats()
+    assert (stats.entries, stats.bytes) == summed(reopened)
+    assert stats.entries == 1
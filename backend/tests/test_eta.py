@@ -0,0 +1,90 @@
+import asyncio
+import pytest
+from app.core.config import settings
+from app.schemas.threat_model import AsyncThreatModelRequest, JobStatus
+from app.services.eta import MIN_SAMPLES, StageEstimator, retry_after_ms, size_bucket
+from app.services.hedging import hedged_generator
+from app.services.job_service import JobService
+from app.services.job_store import JobStore
+from app.services.llm_service import LLMProvider, MockLLMService
+
+def test_size_buckets():
+    assert size_bucket('x' * 100) == 0
+    assert size_bucket('x' * 1024) == 1
+    assert size_bucket('x' * 4096) == 3
+
+def test_estimates_fall_back_to_broader_keys_and_prior():
+    eta = StageEstimator()
+    assert eta.estimate('generate', 'openai', 'STRIDE', 1) == settings.job_eta_default_s
+    assert eta.estimate('prepare', 'openai', 'STRIDE', 1) == 0.0
+    for _ in range(MIN_SAMPLES):
+        eta.record('generate', 'openai', 'STRIDE', 1, 10.0)
+        eta.record('generate', 'anthropic', 'PASTA', 3, 30.0)
+    assert eta.estimate('generate', 'openai', 'STRIDE', 1) == 10.0
+    # An unseen framework uses the provider's measurements at that size
+    assert eta.estimate('generate', 'openai', 'LINDDUN', 1) == 10.0
+    # An unpinned provider uses every provider's measurements
+    assert 10.0 < eta.estimate('generate', None, None, None) < 30.0
+    assert eta.remaining('generate', 'openai', 'STRIDE', 1) == 10.0
+
+def test_provider_members_and_names_share_estimates():
+    eta = StageEstimator()
+    for _ in range(MIN_SAMPLES):
+        eta.record('generate', LLMProvider.OPENAI, 'STRIDE', 1, 10.0)
+        eta.record('generate', 'anthropic', 'STRIDE', 1, 30.0)
+    assert eta.estimate('generate', 'openai', 'STRIDE', 1) == 10.0
+    assert eta.estimate('generate', LLMProvider.ANTHROPIC, 'STRIDE', 1) == 30.0
+    assert {type(key[0]) for _, key in eta.stats if key[0] is not None} == {str}
+
+def test_moving_average_follows_recent_durations():
+    eta = StageEstimator()
+    for _ in range(MIN_SAMPLES):
+        eta.record('generate', 'openai', 'STRIDE', 0, 10.0)
+    for _ in range(20):
+        eta.record('generate', 'openai', 'STRIDE', 0, 2.0)
+    assert eta.estimate('generate', 'openai', 'STRIDE', 0) == pytest.approx(2.0, abs=0.1)
+
+def test_retry_after_is_clamped_and_backs_off_when_overdue():
+    assert retry_after_ms(3.0, 10.0) == 3000
+    assert retry_after_ms(0.01, 10.0) == settings.job_poll_min_ms
+    assert retry_after_ms(600.0, 600.0) == settings.job_poll_max_ms
+    assert retry_after_ms(-5.0, 8.0) == 2000
+
+class TimedGeneration:
+    def __init__(self, delay):
+        self.delay = delay
+
+    async def __call__(self, prompt, providers, max_tokens=2000):
+        await asyncio.sleep(self.delay)
+        return 'threat model', providers[0], MockLLMService()
+
+@pytest.mark.asyncio
+async def test_jobs_learn_stage_durations(monkeypatch):
+    monkeypatch.setattr(hedged_generator, 'generate', TimedGeneration(delay=0.05))
+    service = JobService(JobStore('sqlite://'))
+
+    def request(i):
+        return AsyncThreatModelRequest(content=f'Learned system {i}', framework='STRIDE', llm_provider='openai')
+
+    first = service.create_job(request(0))
+    job = service.get_job_status(first)
+    assert (job.estimated_completion - job.created_at).total_seconds() == pytest.approx(settings.job_eta_default_s)
+    assert job.retry_after_ms == settings.job_poll_min_ms
+    await asyncio.sleep(0.01)
+    # Mid-generation the hint points at the expected end of the stage
+    assert service.get_job_status(first).retry_after_ms == settings.job_poll_max_ms
+    while service.tasks:
+        await asyncio.sleep(0.01)
+    assert service.get_job_status(first).retry_after_ms is None
+
+    for i in range(1, MIN_SAMPLES):
+        service.create_job(request(i))
+        while service.tasks:
+            await asyncio.sleep(0.01)
+    learned = service.create_job(request(MIN_SAMPLES))
+    job = service.get_job_status(learned)
+    assert (job.estimated_completion - job.created_at).total_seconds() < 1
+    while service.tasks:
+        await asyncio.sleep(0.01)
+    assert service.get_job_status(learned).status == JobStatus.COMPLETED
+    assert not service.next_change and not service.submitted_eta
@@ -0,0 +1,81 @@
+import uuid
+from datetime import datetime
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from app.main import app
+from app.api.fields import parse_fields
+from app.schemas.threat_model import JobStatus, JobStatusResponse
+from app.services.job_service import job_service
+
+client = TestClient(app)
+
+def create_job(content='Sparse fields system'):
+    response = client.post("/api/threat-model/generate-async", json={
+        "content": content, "framework": "STRIDE", "llm_provider": "openai"
+    })
+    assert response.status_code == 200
+    return response.json()
+
+def test_parse_fields():
+    assert parse_fields(None, JobStatusResponse) is None
+    assert parse_fields('status, progress', JobStatusResponse) == {'status': True, 'progress': True}
+    assert parse_fields('result.threat_model,result.id', JobStatusResponse) == {
+        'result': {'threat_model': True, 'id': True}
+    }
+    assert parse_fields('result.threat_model,result', JobStatusResponse) == {'result': True}
+    for bad in ('nope', 'result.nope', 'status.value'):
+        with pytest.raises(HTTPException) as error:
+            parse_fields(bad, JobStatusResponse)
+        assert error.value.status_code == 400
+
+def test_job_status_fields_and_result_endpoint():
+    job_id = create_job()['job_id']
+    sparse = client.get(f"/api/threat-model/jobs/{job_id}?fields=status,progress")
+    assert sparse.status_code == 200
+    assert set(sparse.json()) == {'status', 'progress'}
+    assert sparse.headers['ETag'] == client.get(f"/api/threat-model/jobs/{job_id}").headers['ETag']
+    assert client.get(f"/api/threat-model/jobs/{job_id}?fields=bogus").status_code == 400
+
+    job = job_service.get_job_status(job_id)
+    assert job.status == 'completed'
+    assert client.get(f"/api/threat-model/jobs/{job_id}?include_result=false").json()['result'] is None
+    nested = client.get(f"/api/threat-model/jobs/{job_id}?fields=status,result.threat_model").json()
+    assert nested == {'status': 'completed', 'result': {'threat_model': job.result.threat_model}}
+
+    result = client.get(f"/api/threat-model/jobs/{job_id}/result")
+    assert result.status_code == 200
+    assert result.json()['id'] == job.result.id
+    assert client.get(f"/api/threat-model/jobs/{job_id}/result",
+                      headers={'If-None-Match': result.headers['ETag']}).status_code == 304
+    only_text = client.get(f"/api/threat-model/jobs/{job_id}/result?fields=threat_model").json()
+    assert list(only_text) == ['threat_model']
+
+def test_result_endpoint_errors():
+    assert client.get("/api/threat-model/jobs/abcdef/result").status_code == 404
+    now = datetime.now()
+    job = JobStatusResponse(job_id=str(uuid.uuid4()), status=JobStatus.PROCESSING, progress=50, message='',
+                            created_at=now, updated_at=now)
+    job_service.jobs[job.job_id] = job
+    try:
+        assert client.get(f"/api/threat-model/jobs/{job.job_id}/result").status_code == 409
+    finally:
+        del job_service.jobs[job.job_id]
+
+def test_generate_async_returns_cached_result_inline():
+    first = create_job('Inline cache system')
+    assert first['status'] in ('pending', 'processing', 'completed')
+    assert first['result'] is None
+    response = client.post("/api/threat-model/generate-async?include_result=true", json={
+        "content": 'Inline cache system', "framework": "STRIDE", "llm_provider": "openai"
+    })
+    data = response.json()
+    assert data['status'] == 'completed'
+    assert data['result']['threat_model']
+
+def test_generate_fields():
+    response = client.post("/api/threat-model/generate?fields=id,threat_model", json={
+        "content": 'Sync sparse system', "framework": "STRIDE", "llm_provider": "openai"
+    })
+    assert response.status_code == 200
+    assert set(response.json()) == {'id', 'threat_model'}
@@ -1,17 +1,14 @@
 import os
 import shutil
 import pytest
-from pathlib import Path
 from fastapi import UploadFile
 from io import BytesIO
 from app.services import file_service
 from app.schemas.threat_model import SupportedFileTypes
 
-UPLOADS_PATH = Path(__file__).parent.parent / "uploads"
-
 def cleanup_uploads():
-    if UPLOADS_PATH.exists():
-        shutil.rmtree(UPLOADS_PATH)
+    if file_service.UPLOAD_DIR.exists():
+        shutil.rmtree(file_service.UPLOAD_DIR)
 
 class DummyUploadFile:
     def __init__(self, filename, content):
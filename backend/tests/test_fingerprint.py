@@ -0,0 +1,54 @@
+import uuid
+from datetime import datetime
+import pytest
+from app.schemas.threat_model import AsyncThreatModelRequest, FileUploadResponse
+from app.services import file_service
+from app.services.fingerprint import normalize_text, threat_model_fingerprint
+
+@pytest.fixture
+def uploads():
+    file_service.db_files.clear()
+    yield file_service.db_files
+    file_service.db_files.clear()
+
+def add_upload(uploads, content_hash, filename='diagram.drawio'):
+    file_id = str(uuid.uuid4())
+    uploads[file_id] = FileUploadResponse(file_id=file_id, filename=filename, file_type='drawio', size=10,
+                                          upload_date=datetime.now(), content_hash=content_hash)
+    return file_id
+
+def key(**fields):
+    return threat_model_fingerprint(AsyncThreatModelRequest(**{'content': 'A web app', **fields}))
+
+def test_normalize_text():
+    assert normalize_text('  Web App\n\twith  DB ') == 'web app with db'
+    assert normalize_text(None) is None
+
+def test_trivial_differences_share_a_key():
+    assert key(content='A  web\napp ') == key()
+    assert key(framework='ATTACK_TREES') == key(framework='Attack Trees')
+    assert key(llm_provider='OpenAI') == key(llm_provider='openai')
+    assert len(key()) == 64
+
+def test_meaningful_differences_change_the_key():
+    assert key(content='A mobile app') != key()
+    assert key(framework='PASTA') != key()
+    assert key(llm_provider='anthropic') != key(llm_provider='openai') != key()
+
+def test_uploads_are_keyed_by_content(uploads):
+    first = add_upload(uploads, 'a' * 64)
+    second = add_upload(uploads, 'a' * 64, filename='copy.drawio')
+    other = add_upload(uploads, 'b' * 64)
+    assert key(file_id=first) == key(file_id=second)
+    assert key(file_id=first) != key(file_id=other)
+    assert key(file_id=first) != key()
+
+def test_model_and_prompt_version_invalidate(monkeypatch):
+    before = key(llm_provider='openai')
+    monkeypatch.setattr('app.services.llm_factory.settings.openai_model', 'gpt-next')
+    assert key(llm_provider='openai') != before
+    # Unpinned requests may be answered by any provider's model
+    monkeypatch.undo()
+    unpinned = key()
+    monkeypatch.setattr('app.services.fingerprint.THREAT_MODEL_PROMPT_VERSION', 2)
+    assert key() != unpinned
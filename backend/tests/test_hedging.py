@@ -0,0 +1,103 @@
+import asyncio
+import pytest
+from app.core.config import settings
+from app.services.hedging import HedgedGenerator
+from app.services.llm_factory import LLMFactory
+from app.services.llm_service import LLMServiceError, MockLLMService
+
+class DelayedService(MockLLMService):
+    def __init__(self, name, delay, fail=False, status_code=503):
+        self.name = name
+        self.delay = delay
+        self.fail = fail
+        self.status_code = status_code
+        self.cancelled = False
+
+    async def generate(self, prompt, max_tokens=2000):
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        if self.fail:
+            raise LLMServiceError(f"{self.name} failed", self.name, self.status_code,
+                                  retryable=self.status_code >= 500)
+        return f"answer from {self.name}"
+
+@pytest.fixture
+def services(monkeypatch):
+    registry = {}
+    monkeypatch.setattr(LLMFactory, 'create', lambda provider: registry[provider])
+    monkeypatch.setattr(settings, 'llm_hedging_enabled', True)
+    monkeypatch.setattr(settings, 'llm_hedge_delay_ms', 20)
+    monkeypatch.setattr(settings, 'llm_hedge_use_p95', False)
+    return registry
+
+def _stats(generator):
+    return {s.provider: s for s in generator.snapshot()}
+
+@pytest.mark.asyncio
+async def test_fast_primary_is_not_hedged(services):
+    services['openai'] = DelayedService('openai', 0)
+    services['anthropic'] = DelayedService('anthropic', 0)
+    generator = HedgedGenerator()
+    text, provider, _ = await generator.generate('prompt', ['openai', 'anthropic'])
+    assert provider == 'openai'
+    assert 'anthropic' not in _stats(generator)
+
+@pytest.mark.asyncio
+async def test_slow_primary_loses_race(services):
+    services['openai'] = DelayedService('openai', 1)
+    services['anthropic'] = DelayedService('anthropic', 0)
+    generator = HedgedGenerator()
+    text, provider, _ = await generator.generate('prompt', ['openai', 'anthropic'])
+    assert provider == 'anthropic'
+    assert text == 'answer from anthropic'
+    await asyncio.sleep(0)
+    assert services['openai'].cancelled
+    stats = _stats(generator)
+    assert stats['anthropic'].wins == 1
+    assert stats['anthropic'].hedges == 1
+    assert stats['openai'].losses == 1
+
+@pytest.mark.asyncio
+async def test_failed_primary_hedges_immediately(services):
+    services['openai'] = DelayedService('openai', 0, fail=True)
+    services['anthropic'] = DelayedService('anthropic', 0)
+    generator = HedgedGenerator()
+    text, provider, _ = await generator.generate('prompt', ['openai', 'anthropic'])
+    assert provider == 'anthropic'
+    assert _stats(generator)['openai'].errors == 1
+
+@pytest.mark.asyncio
+async def test_non_retryable_primary_failure_is_not_hedged(services):
+    services['openai'] = DelayedService('openai', 0, fail=True, status_code=400)
+    services['anthropic'] = DelayedService('anthropic', 0)
+    generator = HedgedGenerator()
+    with pytest.raises(LLMServiceError, match="openai failed"):
+        await generator.generate('prompt', ['openai', 'anthropic'])
+    assert 'anthropic' not in _stats(generator)
+
+@pytest.mark.asyncio
+async def test_all_providers_fail(services):
+    services['openai'] = DelayedService('openai', 0, fail=True)
+    services['anthropic'] = DelayedService('anthropic', 0, fail=True)
+    with pytest.raises(Exception, match="failed"):
+        await HedgedGenerator().generate('prompt', ['openai', 'anthropic'])
+
+@pytest.mark.asyncio
+async def test_disabled_uses_single_provider(services, monkeypatch):
+    monkeypatch.setattr(settings, 'llm_hedging_enabled', False)
+    services['openai'] = DelayedService('openai', 0.05)
+    generator = HedgedGenerator()
+    _, provider, _ = await generator.generate('prompt', ['openai', 'anthropic'])
+    assert provider == 'openai'
+
+def test_hedge_delay_uses_p95(monkeypatch):
+    monkeypatch.setattr(settings, 'llm_hedge_use_p95', True)
+    monkeypatch.setattr(settings, 'llm_hedge_min_samples', 10)
+    generator = HedgedGenerator()
+    assert generator.hedge_delay('openai') == settings.llm_hedge_delay_ms / 1000
+    for i in range(1, 21):
+        generator._record_latency('openai', i / 10)
+    assert generator.hedge_delay('openai') == pytest.approx(1.9)
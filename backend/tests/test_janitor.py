@@ -0,0 +1,91 @@
+import heapq
+import uuid
+from datetime import datetime, timedelta
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.schemas.threat_model import AsyncThreatModelRequest, FileUploadResponse, JobStatus
+from app.services import file_service
+from app.services.janitor import Janitor, janitor
+from app.services.job_service import JobService
+from app.services.job_store import JobStore
+from app.services.metrics import JANITOR_RECLAIMED_BYTES, JANITOR_SWEEP_DURATION
+from app.services.result_cache import ResultCache
+
+def test_cache_purge_visits_only_expired_entries(make_entry):
+    cache = ResultCache(1 << 20)
+    now = datetime.now()
+    cache.put('old', make_entry('old', expires_at=now - timedelta(seconds=1)))
+    cache.put('live', make_entry('live', expires_at=now + timedelta(hours=1)))
+    # Replacing an entry leaves a stale index item behind that must be skipped
+    cache.put('renewed', make_entry('renewed', expires_at=now - timedelta(seconds=1)))
+    cache.put('renewed', make_entry('renewed', expires_at=now + timedelta(hours=1)))
+    removed, reclaimed = cache.purge_expired()
+    assert removed == 1 and reclaimed > 0
+    assert sorted(cache.keys()) == ['live', 'renewed']
+    # The live entries' index items are still waiting
+    assert len(cache.expiry_index) == 2
+
+def test_finished_jobs_expire_from_memory_and_store(monkeypatch, make_entry):
+    service = JobService(JobStore('sqlite://'))
+    request = AsyncThreatModelRequest(content='a cached system', framework='STRIDE', llm_provider='openai')
+    service.cache.put(service._generate_cache_key(request), make_entry('key'))
+    job_id = service.create_job(request)
+    assert service.get_job_status(job_id).status == JobStatus.COMPLETED
+    service.flush()
+    assert service.sweep_finished_jobs() == (0, 0)
+    monkeypatch.setattr('app.services.job_service.settings.job_retention_s', -1)
+    removed, reclaimed = service.sweep_finished_jobs()
+    assert removed == 1 and reclaimed > 0
+    assert service.get_job_status(job_id) is None
+    assert service.finished_index == []
+
+@pytest.fixture
+def uploads():
+    file_service.db_files.clear()
+    file_service.upload_index.clear()
+    yield
+    file_service.db_files.clear()
+    file_service.upload_index.clear()
+
+def test_old_uploads_are_deleted(tmp_path, uploads):
+    path = tmp_path / 'diagram.drawio'
+    path.write_bytes(b'<mxfile/>')
+    file_id = str(uuid.uuid4())
+    uploaded = datetime.utcnow() - timedelta(hours=2)
+    file_service.db_files[file_id] = FileUploadResponse(file_id=file_id, filename='diagram.drawio', file_type='drawio',
+                                                        size=9, upload_date=uploaded, file_path=str(path))
+    heapq.heappush(file_service.upload_index, (uploaded, file_id))
+    assert file_service.sweep_old_files(max_age_hours=3) == (0, 0)
+    assert file_service.sweep_old_files(max_age_hours=1) == (1, 9)
+    assert not path.exists()
+    assert file_id not in file_service.db_files
+
+def test_old_scenario_batches_are_deleted(monkeypatch):
+    from app.schemas.scenario import BatchItemStatus, BatchScenarioResult, ScenarioBatchState, ScenarioBatchStatus
+    from app.services import janitor as janitor_module
+    store = JobStore('sqlite://')
+    monkeypatch.setattr(janitor_module.job_service, 'store', store)
+    for batch_id, created_at in (('old', datetime.utcnow() - timedelta(days=3)), ('new', datetime.utcnow())):
+        result = BatchScenarioResult(index=0, status=BatchItemStatus.FAILED, error='not available')
+        store.create_batch(ScenarioBatchStatus(batch_id=batch_id, status=ScenarioBatchState.COMPLETED,
+                                               created_at=created_at, total=1, results=[result]), [])
+    monkeypatch.setattr('app.services.janitor.settings.batch_retention_s', 24 * 3600)
+    removed, reclaimed = janitor_module._sweep_scenario_batches()
+    assert removed == 1 and reclaimed > 0
+    assert store.get_batch('old') is None
+    assert store.get_batch('new') is not None
+
+def test_run_once_reports_and_isolates_failures():
+    sweeper = Janitor(interval_s=60)
+    sweeper.register('good', lambda: (2, 100))
+    sweeper.register('broken', lambda: 1 / 0)
+    before = JANITOR_RECLAIMED_BYTES.value(sweep='good')
+    assert sweeper.run_once() == {'good': (2, 100)}
+    assert JANITOR_RECLAIMED_BYTES.value(sweep='good') == before + 100
+    assert JANITOR_SWEEP_DURATION.count(sweep='broken') >= 1
+
+def test_lifespan_starts_and_stops_janitor():
+    with TestClient(app):
+        assert janitor.task is not None and not janitor.task.done()
+    assert janitor.task is None
@@ -0,0 +1,307 @@
+import asyncio
+import json
+import threading
+import time
+from datetime import datetime
+import pytest
+from fastapi.testclient import TestClient
+from httpx import AsyncClient, ASGITransport
+from sqlalchemy import create_engine, text
+from app.core.config import settings
+from app.main import app
+from app.schemas.threat_model import AsyncThreatModelRequest, JobStatus, JobStatusResponse
+from app.services.hedging import hedged_generator
+from app.services.job_events import JobEventBus
+from app.services.job_queue import JobQueue
+from app.services.job_service import JobService, job_service
+from app.services.job_store import JobStore
+from app.services.llm_service import MockLLMService
+
+class SlowGeneration:
+    """Stands in for the hedged generator, recording whether it was aborted."""
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.cancelled = False
+
+    async def __call__(self, prompt, providers, max_tokens=2000):
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        return 'threat model', providers[0], MockLLMService()
+
+def make_job(job_id, status, created_at):
+    return JobStatusResponse(job_id=job_id, status=status, progress=0, message='', created_at=created_at,
+                             updated_at=created_at)
+
+def make_request(content='Web app with a database', priority='normal'):
+    return AsyncThreatModelRequest(content=content, framework='STRIDE', llm_provider='openai', priority=priority)
+
+@pytest.mark.asyncio
+async def test_cancel_aborts_generation_and_stays_cancelled(monkeypatch):
+    generation = SlowGeneration(delay=5)
+    monkeypatch.setattr(hedged_generator, 'generate', generation)
+    service = JobService()
+    job_id = service.create_job(make_request())
+    await asyncio.sleep(0.01)
+    task = service.tasks[job_id]
+    assert service.cancel_job(job_id)
+    await asyncio.gather(task, return_exceptions=True)
+    assert generation.cancelled
+    assert service.get_job_status(job_id).status == JobStatus.CANCELLED
+    assert job_id not in service.tasks
+    assert not service.cache
+    # A late update cannot resurrect a cancelled job
+    service._update_job_status(job_id, JobStatus.COMPLETED, 100, 'done')
+    assert service.get_job_status(job_id).status == JobStatus.CANCELLED
+
+@pytest.mark.asyncio
+async def test_finished_tasks_leave_the_registry(monkeypatch):
+    monkeypatch.setattr(hedged_generator, 'generate', SlowGeneration(delay=0))
+    service = JobService()
+    job_id = service.create_job(make_request())
+    await asyncio.sleep(0.05)
+    assert service.get_job_status(job_id).status == JobStatus.COMPLETED
+    assert not service.tasks
+
+@pytest.mark.asyncio
+async def test_shutdown_drains_then_cancels(monkeypatch):
+    service = JobService()
+    monkeypatch.setattr(hedged_generator, 'generate', SlowGeneration(delay=0.02))
+    quick = service.create_job(make_request('quick'))
+    await asyncio.sleep(0)
+    slow_generation = SlowGeneration(delay=5)
+    monkeypatch.setattr(hedged_generator, 'generate', slow_generation)
+    slow = service.create_job(make_request('slow'))
+    await service.shutdown(grace_s=0.2)
+    assert service.get_job_status(quick).status == JobStatus.COMPLETED
+    assert service.get_job_status(slow).status == JobStatus.CANCELLED
+    assert slow_generation.cancelled
+    assert not service.tasks
+
+def test_queue_orders_by_priority_with_aging(monkeypatch):
+    monkeypatch.setattr(settings, 'job_priority_aging_s', 30)
+    queue = JobQueue()
+    queue.push('low', 'low', None)
+    queue.push('normal', 'normal', None)
+    queue.push('high', 'high', None)
+    assert [queue.position(job_id) for job_id in ('high', 'normal', 'low')] == [1, 2, 3]
+    assert queue.remove('normal')
+    assert queue.position('low') == 2
+    assert [queue.pop()[0], queue.pop()[0], queue.pop()] == ['high', 'low', None]
+    # Without a head start the older low-priority job is served first
+    monkeypatch.setattr(settings, 'job_priority_aging_s', 0)
+    queue.push('old-low', 'low', None)
+    queue.push('new-high', 'high', None)
+    assert queue.pop()[0] == 'old-low'
+
+@pytest.mark.asyncio
+async def test_workers_bound_concurrency_and_report_positions(monkeypatch):
+    monkeypatch.setattr(settings, 'job_workers', 1)
+    monkeypatch.setattr(hedged_generator, 'generate', SlowGeneration(delay=5))
+    service = JobService()
+    running = service.create_job(make_request('running'))
+    await asyncio.sleep(0.01)
+    bulk = service.create_job(make_request('bulk', priority='low'))
+    analyst = service.create_job(make_request('analyst', priority='high'))
+    assert list(service.tasks) == [running]
+    assert service.get_job_status(running).queue_position is None
+    assert service.get_job_status(analyst).queue_position == 1
+    assert service.get_job_status(bulk).queue_position == 2
+    # Cancelling the running job lets the high-priority one start next
+    service.cancel_job(running)
+    await asyncio.sleep(0.01)
+    assert list(service.tasks) == [analyst]
+    assert service.get_job_status(bulk).queue_position == 1
+    await service.shutdown(grace_s=0)
+    assert service.get_job_status(bulk).status == JobStatus.CANCELLED
+    assert len(service.queue) == 0
+
+@pytest.mark.asyncio
+async def test_store_shares_jobs_between_workers(monkeypatch):
+    monkeypatch.setattr(settings, 'job_store_flush_interval_s', 60)
+    generation = SlowGeneration(delay=5)
+    monkeypatch.setattr(hedged_generator, 'generate', generation)
+    store = JobStore('sqlite://')
+    owner, other = JobService(store), JobService(store)
+    job_id = owner.create_job(make_request())
+    # Creation wakes the writer thread at once rather than waiting for the flush interval
+    for _ in range(100):
+        if await asyncio.to_thread(other.get_job_status, job_id) is not None:
+            break
+        await asyncio.sleep(0.01)
+    assert other.get_job_status(job_id) is not None
+    assert owner.get_job_status(job_id).progress == 50
+    owner.flush()
+    assert other.get_job_status(job_id).progress == 50
+    assert [job.job_id for job in other.list_jobs()] == [job_id]
+    # A cancel through another worker stops the owner's generation at its next flush
+    task = owner.tasks[job_id]
+    assert other.cancel_job(job_id)
+    owner.flush()
+    await asyncio.gather(task, return_exceptions=True)
+    assert generation.cancelled
+    assert owner.get_job_status(job_id).status == JobStatus.CANCELLED
+    # A final state in the store is never overwritten
+    owner.jobs[job_id].status = JobStatus.COMPLETED
+    store.save([owner.jobs[job_id]])
+    assert store.get(job_id).status == JobStatus.CANCELLED
+
+@pytest.mark.asyncio
+async def test_locked_store_does_not_block_the_event_loop(monkeypatch):
+    monkeypatch.setattr(hedged_generator, 'generate', SlowGeneration(delay=0.01))
+    store = JobStore('sqlite://')
+    saved = threading.Event()
+
+    def locked_save(jobs):
+        time.sleep(0.3)
+        saved.set()
+
+    monkeypatch.setattr(store, 'save', locked_save)
+    service = JobService(store)
+    start = time.monotonic()
+    job_id = service.create_job(make_request('A system behind a locked database'))
+    while service.tasks:
+        await asyncio.sleep(0.01)
+    # The job ran to completion while the writer thread was still waiting on the database
+    assert time.monotonic() - start < 0.3
+    assert service.get_job_status(job_id).status == JobStatus.COMPLETED
+    assert await asyncio.to_thread(saved.wait, 5)
+
+def test_store_cleanup_removes_only_old_finished_jobs():
+    store = JobStore('sqlite://')
+    old = datetime(2020, 1, 1)
+    store.save([
+        make_job('aa', JobStatus.COMPLETED, old),
+        make_job('bb', JobStatus.PROCESSING, old),
+        make_job('cc', JobStatus.COMPLETED, datetime.now()),
+    ])
+    JobService(store).cleanup_old_jobs(days=1)
+    assert sorted(job.job_id for job in store.list()) == ['bb', 'cc']
+
+@pytest.mark.asyncio
+async def test_event_stream_pushes_transitions_and_final_result(monkeypatch):
+    monkeypatch.setattr(hedged_generator, 'generate', SlowGeneration(delay=0.05))
+    job_id = job_service.create_job(make_request('pushed'))
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        resp = await ac.get(f"/api/threat-model/jobs/{job_id}/events")
+    assert resp.status_code == 200
+    frames = [frame for frame in resp.text.split("\n\n") if frame]
+    names = [frame.split("\n")[0] for frame in frames]
+    assert names[-1] == "event: final" and names.count("event: final") == 1
+    assert "event: status" in names
+    final = json.loads(frames[-1].split("data: ", 1)[1])
+    assert final["status"] == "completed"
+    assert final["result"]["threat_model"] == 'threat model'
+    assert job_service.events.subscriber_count() == 0
+
+@pytest.mark.asyncio
+async def test_event_bus_delivers_across_threads():
+    bus = JobEventBus()
+    job = make_job('ab', JobStatus.PROCESSING, datetime.now())
+    with bus.subscribe('ab') as subscription:
+        thread = threading.Thread(target=bus.publish, args=(job,))
+        thread.start()
+        assert (await subscription.get(timeout=1)).job_id == 'ab'
+        thread.join()
+        assert await subscription.get(timeout=0.01) is None
+    assert bus.subscriber_count() == 0
+
+@pytest.mark.asyncio
+async def test_long_poll_waits_for_change_or_returns_304(monkeypatch):
+    monkeypatch.setattr(hedged_generator, 'generate', SlowGeneration(delay=5))
+    job_id = job_service.create_job(make_request('long poll'))
+    await asyncio.sleep(0.01)
+    url = f"/api/threat-model/jobs/{job_id}"
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        first = await ac.get(url)
+        etag = first.headers["etag"]
+        assert etag == f'"{first.json()["version"]}"'
+        # Unchanged within the wait
+        unchanged = await ac.get(url, params={"wait": 0.05}, headers={"If-None-Match": etag})
+        assert unchanged.status_code == 304 and not unchanged.content
+        # A change wakes the waiting poll without waiting out the timeout
+        asyncio.get_running_loop().call_later(0.05, job_service.cancel_job, job_id)
+        started = asyncio.get_running_loop().time()
+        changed = await ac.get(url, params={"wait": 5}, headers={"If-None-Match": etag})
+        assert asyncio.get_running_loop().time() - started < 1
+        assert changed.status_code == 200
+        assert changed.json()["status"] == "cancelled"
+        assert changed.headers["etag"] != etag
+
+def test_store_pages_by_cursor_with_filters():
+    store = JobStore('sqlite://')
+    created = datetime(2024, 1, 1)
+    jobs = [make_job(f'{i:02x}', JobStatus.COMPLETED if i % 2 else JobStatus.FAILED, created) for i in range(5)]
+    jobs[0].provider = 'anthropic'
+    store.save(jobs)
+    # Equal timestamps are ordered by id, so no job is skipped or repeated
+    first = store.list(2)
+    second = store.list(2, before=(first[-1].created_at, first[-1].job_id))
+    third = store.list(2, before=(second[-1].created_at, second[-1].job_id))
+    assert [job.job_id for job in first + second + third] == ['04', '03', '02', '01', '00']
+    assert [job.job_id for job in store.list(statuses=[JobStatus.FAILED])] == ['04', '02', '00']
+    assert [job.job_id for job in store.list(provider='anthropic')] == ['00']
+
+def test_store_adds_columns_missing_from_older_tables(tmp_path):
+    url = f"sqlite:///{tmp_path / 'jobs.db'}"
+    with create_engine(url).begin() as connection:
+        connection.execute(text(
+            "CREATE TABLE jobs (job_id VARCHAR(64) PRIMARY KEY, status VARCHAR(16) NOT NULL, "
+            "created_at DATETIME NOT NULL, updated_at DATETIME NOT NULL, data TEXT NOT NULL)"
+        ))
+    store = JobStore(url)
+    job = make_job('aa', JobStatus.COMPLETED, datetime.now())
+    job.provider = 'openai'
+    store.save([job])
+    assert [job.job_id for job in store.list(provider='openai')] == ['aa']
+
+def test_store_shares_scenario_batches_between_workers(tmp_path):
+    from app.schemas.scenario import (
+        BatchItemStatus, BatchScenarioResult, PendingProviderBatch, ScenarioBatchState, ScenarioBatchStatus,
+        ScenarioRequest
+    )
+    url = f"sqlite:///{tmp_path / 'jobs.db'}"
+    submitter, poller = JobStore(url), JobStore(url)
+    item = ScenarioRequest(company_name='A', industry='Finance', company_size='small', threat_actor='insider')
+    failed = BatchScenarioResult(index=1, status=BatchItemStatus.FAILED, error='not available')
+    submitter.create_batch(
+        ScenarioBatchStatus(batch_id='b1', status=ScenarioBatchState.PROCESSING, created_at=datetime(2020, 1, 1),
+                            total=2, results=[failed]),
+        [PendingProviderBatch(provider_batch_id='p1', provider='openai', items={0: item})],
+    )
+    status, pending = poller.get_batch('b1')
+    assert status.status == ScenarioBatchState.PROCESSING
+    assert [job.items[0].company_name for job in pending] == ['A']
+    # Only one worker polls the providers per interval
+    assert poller.claim_batch_check('b1', 60)
+    assert not submitter.claim_batch_check('b1', 60)
+    done = BatchScenarioResult(index=0, status=BatchItemStatus.FAILED, error='expired')
+    poller.finish_provider_batch('b1', 'p1', [done])
+    # A racing worker collecting the same job does not duplicate or replace results
+    submitter.finish_provider_batch('b1', 'p1', [done.model_copy(update={'error': 'late'})])
+    status, pending = submitter.get_batch('b1')
+    assert status.status == ScenarioBatchState.COMPLETED and pending == []
+    assert [(result.index, result.error) for result in status.results] == [(0, 'expired'), (1, 'not available')]
+    assert submitter.get_batch('unknown') is None
+
+def test_list_endpoint_returns_summaries_and_next_cursor():
+    client = TestClient(app)
+    for i in range(3):
+        client.post("/api/threat-model/generate-async", json={
+            "content": f"Paged system {i}", "framework": "STRIDE", "llm_provider": "openai"
+        })
+    response = client.get("/api/threat-model/jobs?limit=2")
+    assert response.status_code == 200
+    page = response.json()
+    assert len(page) == 2 and all(job['result'] is None for job in page)
+    assert page[0]['provider'] == 'openai'
+    cursor = response.headers['X-Next-Cursor']
+    assert 'rel="next"' in response.headers['Link']
+    rest = client.get(f"/api/threat-model/jobs?limit=2&cursor={cursor}").json()
+    assert not {job['job_id'] for job in page} & {job['job_id'] for job in rest}
+    completed = client.get("/api/threat-model/jobs?status=completed&include_result=true").json()
+    assert completed and all(job['status'] == 'completed' and job['result'] for job in completed)
+    assert client.get("/api/threat-model/jobs?cursor=not-a-cursor").status_code == 400
@@ -38,4 +38,91 @@ async def test_error_on_missing_api_key(monkeypatch):
     monkeypatch.setattr(LLMFactory, 'create', lambda provider: (_ for _ in ()).throw(Exception('Missing API key')))
     with pytest.raises(Exception) as exc:
         LLMFactory.create(LLMProvider.OPENAI)
-    assert 'Missing API key' in str(exc.value) 
\ No newline at end of file
+    assert 'Missing API key' in str(exc.value) 
+
+@pytest.mark.asyncio
+async def test_mock_generate_stream_matches_generate():
+    from app.services.llm_service import MockLLMService
+    service = MockLLMService()
+    chunks = [chunk async for chunk in service.generate_stream('a prompt about streaming')]
+    assert len(chunks) > 1
+    assert "".join(chunks) == await service.generate('a prompt about streaming')
+
+def _fake_anthropic_client(calls):
+    from types import SimpleNamespace
+    async def create(**kwargs):
+        calls.append(kwargs)
+        return SimpleNamespace(
+            content=[SimpleNamespace(text='cached answer')],
+            usage=SimpleNamespace(input_tokens=50, output_tokens=20,
+                                  cache_read_input_tokens=1200, cache_creation_input_tokens=0)
+        )
+    return SimpleNamespace(beta=SimpleNamespace(prompt_caching=SimpleNamespace(
+        messages=SimpleNamespace(create=create))))
+
+@pytest.mark.asyncio
+async def test_anthropic_prompt_caching_breakpoints():
+    from app.services.anthropic_service import AnthropicService
+    from app.services.prompts import CacheablePrompt
+    from app.services.usage_tracker import usage_tracker
+    usage_tracker.reset()
+    calls = []
+    service = AnthropicService(api_key='test-key')
+    service.client = _fake_anthropic_client(calls)
+    result = await service.generate(CacheablePrompt('static instructions', '\n\nvariable fields'))
+    assert result == 'cached answer'
+    kwargs = calls[0]
+    assert kwargs['system'][0]['cache_control'] == {'type': 'ephemeral'}
+    blocks = kwargs['messages'][0]['content']
+    assert blocks[0] == {'type': 'text', 'text': 'static instructions', 'cache_control': {'type': 'ephemeral'}}
+    assert blocks[1] == {'type': 'text', 'text': '\n\nvariable fields'}
+    assert service.last_usage.cache_read_tokens == 1200
+    totals = usage_tracker.snapshot()
+    assert totals[0].provider == 'anthropic'
+    assert totals[0].cache_read_tokens == 1200
+    usage_tracker.reset()
+
+def test_prompts_share_static_prefix():
+    from app.api.scenarios import build_prompt
+    from app.schemas.scenario import ScenarioRequest
+    from app.services.prompts import SCENARIO_INSTRUCTIONS
+    first = build_prompt(ScenarioRequest(company_name='A', industry='Finance', company_size='small', threat_actor='apt'))
+    second = build_prompt(ScenarioRequest(company_name='B', industry='Health', company_size='large', threat_actor='insider'))
+    assert first.static_prefix == second.static_prefix == SCENARIO_INSTRUCTIONS
+    assert str(first).startswith(SCENARIO_INSTRUCTIONS)
+    assert 'Company Name**: A' in first.dynamic_suffix
+
+@pytest.mark.asyncio
+async def test_local_batch_keeps_per_prompt_errors():
+    import asyncio
+    from app.services.llm_service import LLMServiceError, MockLLMService
+
+    class PickyService(MockLLMService):
+        async def generate(self, prompt, max_tokens=2000):
+            if prompt == 'bad':
+                raise Exception('rejected')
+            return f'answer to {prompt}'
+
+    service = PickyService()
+    batch_id = await service.submit_batch({'a': 'good', 'b': 'bad'})
+    while (results := await service.fetch_batch(batch_id)) is None:
+        await asyncio.sleep(0)
+    assert results['a'] == 'answer to good'
+    assert isinstance(results['b'], LLMServiceError)
+    assert 'rejected' in str(results['b'])
+
+@pytest.mark.asyncio
+async def test_unfetched_local_batches_expire(monkeypatch):
+    import asyncio
+    from app.core.config import settings
+    from app.services.llm_service import LLMServiceError, MockLLMService, _local_batches
+    monkeypatch.setattr(settings, 'batch_retention_s', 0)
+    service = MockLLMService()
+    batch_id = await service.submit_batch({'a': 'prompt'})
+    for _ in range(10):
+        await asyncio.sleep(0)
+    assert batch_id not in _local_batches
+    # Another worker may own an unknown batch, so asking again later is allowed
+    with pytest.raises(LLMServiceError) as error:
+        await service.fetch_batch(batch_id)
+    assert error.value.retryable
@@ -0,0 +1,23 @@
+import json
+import pytest
+from app.loadtest import LoadTestConfig, _parse_mix, run_load_test
+from app.main import app
+
+@pytest.mark.asyncio
+async def test_load_test_reports_every_operation():
+    config = LoadTestConfig(duration_s=0.3, users=3, provider="openai", poll_interval_s=0.01, seed=7)
+    report = await run_load_test(config, app)
+    json.dumps(report)
+    assert report["requests"] > 0
+    assert report["throughput_rps"] > 0
+    for operation in ("generate", "reroll", "upload", "generate_async"):
+        stats = report["operations"][operation]
+        assert stats["errors"] == 0, stats
+        assert stats["latency_ms"]["p50"] <= stats["latency_ms"]["p99"]
+    assert report["event_loop_lag_ms"]["p50"] is not None
+    assert "rss_growth_mb" in report["memory"]
+
+def test_parse_mix():
+    assert _parse_mix("generate=2,upload") == {"generate": 2.0, "upload": 1.0}
+    with pytest.raises(Exception):
+        _parse_mix("delete=1")
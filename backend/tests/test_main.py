@@ -84,3 +84,8 @@ def test_clear_all_files():
     response = client.get("/api/threat-model/files")
     assert response.status_code == 200
     assert len(response.json()) == 0
+
+def test_llm_usage():
+    response = client.get("/api/llm/usage")
+    assert response.status_code == 200
+    assert isinstance(response.json(), list)
@@ -0,0 +1,44 @@
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.services.metrics import MetricsRegistry
+
+def test_histogram_renders_cumulative_buckets():
+    registry = MetricsRegistry()
+    histogram = registry.histogram("test_latency_seconds", "Test latency", ("route",), buckets=(0.1, 1.0))
+    histogram.observe(0.05, route="/a")
+    histogram.observe(0.5, route="/a")
+    histogram.observe(5, route="/a")
+    text = registry.render()
+    assert "# TYPE test_latency_seconds histogram" in text
+    assert 'test_latency_seconds_bucket{route="/a",le="0.1"} 1' in text
+    assert 'test_latency_seconds_bucket{route="/a",le="1"} 2' in text
+    assert 'test_latency_seconds_bucket{route="/a",le="+Inf"} 3' in text
+    assert 'test_latency_seconds_count{route="/a"} 3' in text
+
+def test_counter_and_label_validation():
+    registry = MetricsRegistry()
+    counter = registry.counter("test_total", "Test counter", ("kind",))
+    counter.inc(kind='say "hi"')
+    counter.inc(2, kind='say "hi"')
+    assert 'test_total{kind="say \\"hi\\""} 3' in registry.render()
+    with pytest.raises(ValueError):
+        counter.inc(other="x")
+    with pytest.raises(ValueError):
+        registry.counter("test_total", "Duplicate")
+
+def test_metrics_endpoint_reports_routes_and_uploads():
+    client = TestClient(app)
+    client.get("/api/threat-model/jobs/does-not-exist")
+    upload = client.post("/api/threat-model/upload",
+                         files={"file": ("metrics.drawio", b"<mxfile>metrics</mxfile>", "application/xml")})
+    assert upload.status_code == 200
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    text = response.text
+    assert 'route="/api/threat-model/jobs/{job_id}"' in text
+    assert "threatforge_upload_bytes_total" in text
+    assert 'threatforge_jobs{status="pending"}' in text
+    assert "threatforge_job_cache_hit_ratio" in text
+    client.delete(f"/api/threat-model/files/{upload.json()['file_id']}")
@@ -0,0 +1,53 @@
+import time
+import pytest
+from app.core.config import settings
+from app.services.llm_factory import LLMFactory
+from app.services.llm_service import LLMProvider, LLMRateLimitError, LLMServiceError
+from app.services.mock_service import SimulatedLLMService
+from app.services.managed_service import ManagedLLMService
+
+@pytest.fixture
+def fast_mock(monkeypatch):
+    monkeypatch.setattr(settings, 'mock_ttft_median_ms', 20)
+    monkeypatch.setattr(settings, 'mock_ttft_sigma', 0.0)
+    monkeypatch.setattr(settings, 'mock_tokens_per_sec_mean', 1000)
+    monkeypatch.setattr(settings, 'mock_tokens_per_sec_stddev', 0)
+    monkeypatch.setattr(settings, 'mock_output_tokens_median', 100)
+    monkeypatch.setattr(settings, 'mock_output_tokens_sigma', 0.0)
+
+@pytest.mark.asyncio
+async def test_generate_follows_latency_and_length(fast_mock):
+    service = SimulatedLLMService(seed=1)
+    start = time.monotonic()
+    text = await service.generate('describe the incident', max_tokens=50)
+    elapsed = time.monotonic() - start
+    # 20ms to first token plus 50 tokens at 1000 tokens/sec
+    assert 0.06 <= elapsed < 0.5
+    assert len(text.split()) == 50
+    assert service.last_usage.output_tokens == 50
+
+@pytest.mark.asyncio
+async def test_stream_matches_length(fast_mock):
+    service = SimulatedLLMService(seed=1)
+    chunks = [chunk async for chunk in service.generate_stream('describe the incident')]
+    assert len("".join(chunks).split()) == 100
+    assert service.last_usage.output_tokens == 100
+
+@pytest.mark.asyncio
+async def test_failure_rates(fast_mock, monkeypatch):
+    monkeypatch.setattr(settings, 'mock_rate_limit_rate', 1.0)
+    with pytest.raises(LLMRateLimitError):
+        await SimulatedLLMService(seed=1).generate('prompt')
+    monkeypatch.setattr(settings, 'mock_rate_limit_rate', 0.0)
+    monkeypatch.setattr(settings, 'mock_error_rate', 1.0)
+    with pytest.raises(LLMServiceError) as exc:
+        await SimulatedLLMService(seed=1).generate('prompt')
+    assert exc.value.retryable
+
+def test_mock_selectable_outside_testing(monkeypatch):
+    monkeypatch.delenv('TESTING')
+    monkeypatch.setattr(settings, 'mock_provider_enabled', True)
+    assert LLMProvider.MOCK in LLMFactory.get_available_providers()
+    service = LLMFactory.create(LLMProvider.MOCK)
+    assert isinstance(service, ManagedLLMService)
+    assert isinstance(service.service, SimulatedLLMService)
@@ -0,0 +1,143 @@
+import asyncio
+import pytest
+from app.core.config import settings
+from app.services.hedging import HedgedGenerator
+from app.services.llm_factory import LLMFactory
+from app.services.llm_service import CircuitOpenError, LLMServiceError, LLMTimeoutError, MockLLMService
+from app.services.managed_service import ManagedLLMService
+from app.services.resilience import CircuitBreaker, LatencyTracker, backoff_delay, resilience
+
+@pytest.fixture(autouse=True)
+def fast_policies(monkeypatch):
+    monkeypatch.setattr(settings, 'llm_retry_base_delay_ms', 1)
+    monkeypatch.setattr(settings, 'llm_retry_max_delay_ms', 2)
+    monkeypatch.setattr(settings, 'llm_max_retries', 2)
+    monkeypatch.setattr(settings, 'llm_breaker_failure_threshold', 3)
+    monkeypatch.setattr(settings, 'llm_breaker_reset_s', 30)
+    resilience.reset()
+    yield
+    resilience.reset()
+
+class ScriptedService(MockLLMService):
+    """Raises the scripted errors in order, then answers."""
+    model = 'mock'
+
+    def __init__(self, errors=(), delay=0):
+        self.errors = list(errors)
+        self.delay = delay
+        self.calls = 0
+
+    async def generate(self, prompt, max_tokens=2000):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.errors:
+            raise self.errors.pop(0)
+        return 'ok'
+
+def transient():
+    return LLMServiceError('server error', provider='test', status_code=503, retryable=True)
+
+def test_backoff_delay_is_jittered_and_capped(monkeypatch):
+    monkeypatch.setattr(settings, 'llm_retry_base_delay_ms', 100)
+    monkeypatch.setattr(settings, 'llm_retry_max_delay_ms', 400)
+    delays = [backoff_delay(10) for _ in range(50)]
+    assert all(0 <= d <= 0.4 for d in delays)
+    assert len(set(delays)) > 1
+
+def test_circuit_breaker_opens_and_probes(monkeypatch):
+    breaker = CircuitBreaker('test')
+    for _ in range(3):
+        breaker.record_failure()
+    assert breaker.state == 'open'
+    assert not breaker.allow()
+    assert breaker.retry_at() is not None
+    monkeypatch.setattr(settings, 'llm_breaker_reset_s', 0)
+    # Only one probe is let through while half open
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == 'closed'
+    assert breaker.allow()
+
+def test_adaptive_timeout_tracks_p99(monkeypatch):
+    monkeypatch.setattr(settings, 'llm_timeout_min_samples', 10)
+    monkeypatch.setattr(settings, 'llm_min_timeout_s', 1)
+    monkeypatch.setattr(settings, 'llm_timeout_s', 100)
+    tracker = LatencyTracker()
+    assert tracker.timeout() == 100
+    for _ in range(20):
+        tracker.record(5.0)
+    assert tracker.timeout() == pytest.approx(10.0)
+
+@pytest.mark.asyncio
+async def test_transient_failures_are_retried():
+    inner = ScriptedService(errors=[transient(), transient()])
+    service = ManagedLLMService(inner, 'retry-ok')
+    assert await service.generate('prompt') == 'ok'
+    assert inner.calls == 3
+    assert resilience.breaker('retry-ok').consecutive_failures == 0
+
+@pytest.mark.asyncio
+async def test_timeout_raises_retryable_error(monkeypatch):
+    monkeypatch.setattr(settings, 'llm_timeout_s', 0.01)
+    monkeypatch.setattr(settings, 'llm_max_retries', 0)
+    service = ManagedLLMService(ScriptedService(delay=1), 'slow')
+    with pytest.raises(LLMTimeoutError):
+        await service.generate('prompt')
+    assert service.admission.in_flight == 0
+
+@pytest.mark.asyncio
+async def test_open_breaker_fails_fast():
+    inner = ScriptedService(errors=[transient() for _ in range(10)])
+    service = ManagedLLMService(inner, 'broken')
+    with pytest.raises(LLMServiceError):
+        await service.generate('prompt')
+    assert resilience.breaker('broken').state == 'open'
+    calls = inner.calls
+    with pytest.raises(CircuitOpenError):
+        await service.generate('prompt')
+    assert inner.calls == calls
+
+@pytest.mark.asyncio
+async def test_expired_deadline_does_not_keep_the_probe_slot(monkeypatch):
+    from app.services import deadlines
+    from app.services.llm_service import DeadlineExceededError
+    service = ManagedLLMService(ScriptedService(), 'probing')
+    breaker = resilience.breaker('probing')
+    for _ in range(3):
+        breaker.record_failure()
+    monkeypatch.setattr(settings, 'llm_breaker_reset_s', 0)
+    with deadlines.deadline_scope(-1):
+        with pytest.raises(DeadlineExceededError):
+            await service.generate('prompt')
+        with pytest.raises(DeadlineExceededError):
+            async for _ in service.generate_stream('prompt'):
+                pass
+    assert not breaker.probe_in_flight
+    assert await service.generate('prompt') == 'ok'
+    assert breaker.state == 'closed'
+
+@pytest.mark.asyncio
+async def test_hard_failures_are_negatively_cached():
+    inner = ScriptedService(errors=[LLMServiceError('bad request', provider='test', status_code=400)])
+    service = ManagedLLMService(inner, 'bad-request')
+    for _ in range(2):
+        with pytest.raises(LLMServiceError, match='bad request'):
+            await service.generate('prompt')
+    assert inner.calls == 1
+    # A different prompt still reaches the provider
+    assert await service.generate('other prompt') == 'ok'
+
+@pytest.mark.asyncio
+async def test_hedged_generator_reroutes_around_open_breaker(monkeypatch):
+    monkeypatch.setattr(settings, 'llm_hedging_enabled', False)
+    services = {
+        'openai': ManagedLLMService(ScriptedService(errors=[transient() for _ in range(10)]), 'openai'),
+        'anthropic': ManagedLLMService(ScriptedService(), 'anthropic'),
+    }
+    monkeypatch.setattr(LLMFactory, 'create', lambda provider: services[provider])
+    generator = HedgedGenerator()
+    text, provider, _ = await generator.generate('prompt', ['openai', 'anthropic'])
+    assert (text, provider) == ('ok', 'anthropic')
+    # The open breaker now sends anthropic first
+    assert resilience.order_by_health(['openai', 'anthropic']) == ['anthropic', 'openai']
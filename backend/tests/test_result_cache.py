@@ -0,0 +1,73 @@
+from datetime import datetime, timedelta
+from fastapi.testclient import TestClient
+from app.main import app
+from app.services.result_cache import ENTRY_OVERHEAD_BYTES, FrequencySketch, ResultCache
+
+def sized_cache(entries, make_entry):
+    """A cache with room for exactly ``entries`` entries made by make_entry."""
+    return ResultCache(entries * ResultCache._size(make_entry('k')))
+
+def test_byte_budget_evicts_least_recently_used(make_entry):
+    cache = sized_cache(2, make_entry)
+    assert cache.put('a', make_entry('a'))
+    assert cache.put('b', make_entry('b'))
+    cache.lookup('a')
+    assert cache.put('c', make_entry('c'))
+    assert sorted(cache.keys()) == ['a', 'c']
+    stats = cache.stats()
+    assert stats.evictions == 1
+    assert stats.bytes == cache.bytes <= cache.max_bytes
+    assert cache.bytes > 2 * ENTRY_OVERHEAD_BYTES
+
+def test_admission_keeps_popular_entries(make_entry):
+    cache = sized_cache(1, make_entry)
+    cache.put('popular', make_entry('popular'))
+    for _ in range(5):
+        assert cache.lookup('popular') is not None
+    # A one-off request does not displace a frequently used result
+    assert cache.lookup('one-off') is None
+    assert not cache.put('one-off', make_entry('one-off'))
+    assert 'popular' in cache
+    assert cache.stats().rejections == 1
+    assert cache['popular'].access_count == 6
+
+def test_rejected_refresh_keeps_the_cached_entry(make_entry):
+    cache = sized_cache(2, make_entry)
+    cache.put('popular', make_entry('popular'))
+    for _ in range(5):
+        cache.lookup('popular')
+    cache.put('rare', make_entry('rare'))
+    # A larger refresh would have to displace the more popular entry
+    assert not cache.put('rare', make_entry('rare', text='y' * 200))
+    assert cache['rare'].threat_model.threat_model == 'x' * 100
+    assert sorted(cache.keys()) == ['popular', 'rare']
+    # A refresh that fits replaces the entry in place
+    assert cache.put('rare', make_entry('rare', text='z' * 100))
+    assert cache['rare'].threat_model.threat_model == 'z' * 100
+    assert cache.bytes == sum(cache.sizes.values())
+
+def test_expired_entries_miss_and_are_dropped(make_entry):
+    cache = sized_cache(2, make_entry)
+    cache.put('old', make_entry('old', expires_at=datetime.now() - timedelta(seconds=1)))
+    assert cache.lookup('old') is None
+    assert 'old' not in cache
+    stats = cache.stats()
+    assert (stats.misses, stats.expirations, stats.entries, stats.bytes) == (1, 1, 0, 0)
+
+def test_oversized_entry_is_rejected(make_entry):
+    cache = sized_cache(1, make_entry)
+    assert not cache.put('huge', make_entry('huge', text='x' * 10000))
+    assert len(cache) == 0
+
+def test_sketch_ages_counts():
+    sketch = FrequencySketch(width=64, sample_size=8)
+    for _ in range(7):
+        sketch.increment('key')
+    assert sketch.estimate('key') == 7
+    sketch.increment('key')
+    assert sketch.estimate('key') == 4
+
+def test_cache_stats_endpoint():
+    response = TestClient(app).get('/api/threat-model/cache/stats')
+    assert response.status_code == 200
+    assert {'entries', 'bytes', 'max_bytes', 'hit_ratio', 'evictions'} <= set(response.json())
@@ -127,4 +127,93 @@ async def test_history_endpoints():
             # Delete the first scenario
             del_resp = await ac.delete(f"/api/scenarios/history/{history[0]['id']}")
             assert del_resp.status_code == 200
-            assert del_resp.json().get("success") 
\ No newline at end of file
+            assert del_resp.json().get("success")
+
+
+@pytest.mark.asyncio
+async def test_generate_stream():
+    payload = {
+        "company_name": "TestCo",
+        "industry": "Finance",
+        "company_size": "medium",
+        "technologies": ["AWS"],
+        "threat_actor": "ransomware",
+        "scenario_type": "ransomware",
+        "participants": ["Security Team"],
+        "duration_hours": 2
+    }
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        resp = await ac.post("/api/scenarios/generate-stream", json=payload)
+        assert resp.status_code == 200
+        assert resp.headers["content-type"].startswith("text/event-stream")
+        body = resp.text
+        assert "event: token" in body
+        assert "event: done" in body
+        assert body.index("event: token") < body.index("event: done")
+
+def _batch_item(company, **overrides):
+    item = {
+        "company_name": company,
+        "industry": "Finance",
+        "company_size": "medium",
+        "threat_actor": "ransomware",
+    }
+    item.update(overrides)
+    return item
+
+def _batch_payload(**options):
+    return {
+        "items": [
+            _batch_item("AlphaCo"),
+            _batch_item("BetaCo", llm_provider="anthropic"),
+            # The mock provider is not available in tests, so this item fails
+            _batch_item("GammaCo", llm_provider="mock"),
+        ],
+        **options,
+    }
+
+def _check_batch_results(results):
+    by_index = {result["index"]: result for result in results}
+    assert sorted(by_index) == [0, 1, 2]
+    assert by_index[0]["status"] == "completed"
+    assert by_index[0]["result"]["scenario"]
+    assert by_index[1]["result"]["provider_used"] == "anthropic"
+    assert by_index[2]["status"] == "failed"
+    assert "not available" in by_index[2]["error"]
+
+@pytest.mark.asyncio
+async def test_generate_batch_streams_ndjson():
+    import json
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        resp = await ac.post("/api/scenarios/generate-batch", json=_batch_payload(max_concurrency=2))
+        assert resp.status_code == 200
+        assert resp.headers["content-type"].startswith("application/x-ndjson")
+        _check_batch_results([json.loads(line) for line in resp.text.splitlines()])
+
+@pytest.mark.asyncio
+async def test_provider_batch_is_submitted_and_polled(monkeypatch):
+    import asyncio
+    from app.core.config import settings
+    monkeypatch.setattr(settings, 'llm_batch_poll_interval_s', 0)
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        resp = await ac.post("/api/scenarios/generate-batch", json=_batch_payload(use_provider_batch=True))
+        assert resp.status_code == 202
+        submitted = resp.json()
+        assert resp.headers["location"] == f"/api/scenarios/batches/{submitted['batch_id']}"
+        # Only the rejected item is known before the providers answer
+        assert submitted["status"] == "processing"
+        assert [result["index"] for result in submitted["results"]] == [2]
+        for _ in range(100):
+            status = (await ac.get(resp.headers["location"])).json()
+            if status["status"] == "completed":
+                break
+            await asyncio.sleep(0.01)
+        assert status["total"] == 3
+        _check_batch_results(status["results"])
+        assert (await ac.get("/api/scenarios/batches/unknown")).status_code == 404
+
+@pytest.mark.asyncio
+async def test_generate_batch_rejects_empty():
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        resp = await ac.post("/api/scenarios/generate-batch", json={"items": []})
+        assert resp.status_code == 422
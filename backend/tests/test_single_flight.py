@@ -0,0 +1,105 @@
+import asyncio
+import pytest
+from app.core.config import settings
+from app.services.hedging import HedgedGenerator
+from app.services.llm_factory import LLMFactory
+from app.services import deadlines
+from app.services.llm_service import DeadlineExceededError, MockLLMService
+from app.services.single_flight import SingleFlight, normalize_key
+
+class CountingService(MockLLMService):
+    def __init__(self, delay=0.05, fail=False):
+        self.delay = delay
+        self.fail = fail
+        self.calls = 0
+
+    async def generate(self, prompt, max_tokens=2000):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise Exception("provider failed")
+        return f"answer {self.calls}"
+
+@pytest.fixture
+def service(monkeypatch):
+    service = CountingService()
+    monkeypatch.setattr(LLMFactory, 'create', lambda provider: service)
+    monkeypatch.setattr(settings, 'llm_hedging_enabled', False)
+    monkeypatch.setattr(settings, 'llm_coalesce_requests', True)
+    return service
+
+def test_normalize_key_ignores_whitespace():
+    assert normalize_key('openai', 'a  prompt\n') == normalize_key('openai', 'a prompt')
+    assert normalize_key('openai', 'a prompt') != normalize_key('anthropic', 'a prompt')
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_generations_share_one_call(service):
+    generator = HedgedGenerator()
+    results = await asyncio.gather(*(generator.generate('same prompt', ['openai']) for _ in range(5)))
+    assert service.calls == 1
+    assert {text for text, _, _ in results} == {'answer 1'}
+    assert generator.flights.coalesced == 4
+    assert generator.flights.in_flight() == 0
+
+@pytest.mark.asyncio
+async def test_different_requests_are_not_coalesced(service):
+    generator = HedgedGenerator()
+    await asyncio.gather(generator.generate('first', ['openai']), generator.generate('second', ['openai']))
+    await generator.generate('first', ['openai'])
+    assert service.calls == 3
+
+@pytest.mark.asyncio
+async def test_shared_failure_reaches_every_caller(service):
+    service.fail = True
+    generator = HedgedGenerator()
+    results = await asyncio.gather(*(generator.generate('prompt', ['openai']) for _ in range(3)),
+                                   return_exceptions=True)
+    assert all(str(r) == 'provider failed' for r in results)
+    assert service.calls == 1
+
+@pytest.mark.asyncio
+async def test_call_survives_until_last_waiter_cancels():
+    flights = SingleFlight()
+    started = asyncio.Event()
+    cancelled = asyncio.Event()
+
+    async def call():
+        started.set()
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    first = asyncio.create_task(flights.run('key', call))
+    second = asyncio.create_task(flights.run('key', call))
+    await started.wait()
+    first.cancel()
+    await asyncio.sleep(0.01)
+    assert not cancelled.is_set()
+    second.cancel()
+    await asyncio.wait_for(cancelled.wait(), timeout=1)
+    assert flights.in_flight() == 0
+
+@pytest.mark.asyncio
+async def test_leader_deadline_does_not_cut_off_followers():
+    flights = SingleFlight()
+    seen = []
+
+    async def call():
+        seen.append(deadlines.remaining())
+        await asyncio.sleep(0.1)
+        return 'shared'
+
+    async def impatient():
+        with deadlines.deadline_scope(0.01):
+            return await flights.run('key', call)
+
+    leader = asyncio.create_task(impatient())
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(flights.run('key', call))
+    with pytest.raises(DeadlineExceededError):
+        await leader
+    assert await follower == 'shared'
+    assert seen == [None]
+    assert flights.coalesced == 1 and flights.in_flight() == 0
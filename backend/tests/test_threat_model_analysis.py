@@ -136,6 +136,30 @@ def test_generate_threat_model_different_frameworks():
         assert threat_model["framework"] == framework
         assert len(threat_model["threat_model"]) > 0
 
+def test_generate_threat_model_stream():
+    """Test streaming threat model generation over Server-Sent-Events."""
+    response = client.post("/api/threat-model/generate-stream", json={
+        "content": "A simple web application with user login and data storage",
+        "framework": "STRIDE",
+        "llm_provider": "openai"
+    })
+    
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert "event: token" in response.text
+    assert "event: done" in response.text
+    assert '"provider_used": "openai"' in response.text
+
+def test_generate_threat_model_stream_invalid_provider():
+    """Test that provider validation happens before the stream starts."""
+    response = client.post("/api/threat-model/generate-stream", json={
+        "content": "Test content",
+        "framework": "STRIDE",
+        "llm_provider": "invalid-provider"
+    })
+    
+    assert response.status_code == 400
+
 def test_get_providers():
     """Test getting available providers."""
     response = client.get("/api/threat-model/providers")
@@ -45,10 +45,12 @@ def cleanup_jobs():
     # Clear all jobs before test
     job_service.jobs.clear()
     job_service.cache.clear()
+    job_service.store.clear()
     yield
     # Clear all jobs after test
     job_service.jobs.clear()
     job_service.cache.clear()
+    job_service.store.clear()
 
 def test_create_async_job():
     """Test creating an async threat model generation job."""
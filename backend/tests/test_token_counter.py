@@ -0,0 +1,56 @@
+import pytest
+from app.services import token_counter
+from app.services.prompts import CacheablePrompt
+from app.services.token_counter import ContextWindowExceededError, Tokenizer
+
+class CharTokenizer(Tokenizer):
+    def count(self, text):
+        return len(text)
+
+@pytest.fixture
+def char_tokenizer():
+    token_counter.register_tokenizer("test-model", CharTokenizer())
+    token_counter.MODEL_SPECS["test-model"] = token_counter.ModelSpec(
+        input_price=1.0, output_price=2.0, context_window=1000, max_output_tokens=500
+    )
+    yield
+    token_counter._tokenizers.pop("test-model", None)
+    token_counter.MODEL_SPECS.pop("test-model", None)
+    token_counter._count_static.cache_clear()
+
+def test_heuristic_tokenizer():
+    tokenizer = token_counter.HeuristicTokenizer()
+    assert tokenizer.count("") == 0
+    assert tokenizer.count("the cat sat.") == 4
+    assert tokenizer.count("cybersecurity") == 3
+
+def test_model_spec_prefix_match():
+    spec = token_counter.get_model_spec("claude-3-5-sonnet-20241022")
+    assert spec.input_price == 3.00
+    assert token_counter.get_model_spec("gpt-4o-mini").input_price == 0.15
+    with pytest.raises(ValueError):
+        token_counter.get_model_spec("unknown-model")
+
+def test_static_prefix_is_memoized(char_tokenizer):
+    token_counter._count_static.cache_clear()
+    first = token_counter.count_prompt_tokens("test-model", CacheablePrompt("static", "one"))
+    second = token_counter.count_prompt_tokens("test-model", CacheablePrompt("static", "three"))
+    assert second - first == 2
+    info = token_counter._count_static.cache_info()
+    assert info.misses == 2  # system prompt + static prefix
+    assert info.hits == 2
+
+def test_estimate_cost(char_tokenizer):
+    prompt = "x" * 100
+    prompt_tokens = token_counter.count_prompt_tokens("test-model", prompt)
+    expected = (prompt_tokens * 1.0 + 10 * 2.0) / 1_000_000
+    assert token_counter.estimate_cost("test-model", prompt, max_tokens=10) == pytest.approx(expected)
+
+def test_check_context_window(monkeypatch, char_tokenizer):
+    monkeypatch.setattr(token_counter, "SYSTEM_PROMPT", "")
+    token_counter._count_static.cache_clear()
+    assert token_counter.check_context_window("test-model", "x" * 100, max_tokens=400) == 100
+    with pytest.raises(ContextWindowExceededError):
+        token_counter.check_context_window("test-model", "x" * 700, max_tokens=400)
+    with pytest.raises(ContextWindowExceededError):
+        token_counter.check_context_window("test-model", "x", max_tokens=600)